@@ -19,8 +19,10 @@ from loguru import logger
 
 # Import our components
 try:
-    from utils.chat import SimplePDFChatbot
     import chatbot_config
+    from utils.chat_client import ChatServiceClient
+    from utils.data_manager import DataManager
+    from utils.index_warmup import get_index_warmup
 except ImportError as e:
     st.error(f"❌ Import error: {e}")
     st.info("Make sure all files are in the same directory and dependencies are installed")
@@ -62,18 +64,97 @@ st.markdown("""
 """, unsafe_allow_html=True)
 from loguru import logger
 @st.cache_resource
+def _initialize_engine():
+    """Process-wide clients and index plus one chatbot per bank, shared by every Streamlit session"""
+    from utils.chat import BankChatbots
+    return BankChatbots()
+
 def initialize_chatbot():
     logger.info("ch agent initia")
-    """Initialize chatbot (cached for performance)"""
+    """Initialize chatbot: a client of the chat service if one is configured, else the cached engine"""
     try:
-        return SimplePDFChatbot(), None
+        if chatbot_config.CHAT_SERVICE_URL:
+            # One client (and service session) per Streamlit session
+            return ChatServiceClient(chatbot_config.CHAT_SERVICE_URL), None
+        return _initialize_engine(), None
     except Exception as e:
         return None, str(e)
 
+def get_session_memory():
+    """This browser session's conversation history; the chatbots are shared, its history is not"""
+    chatbot = st.session_state.get("chatbot")
+    if st.session_state.get("memory") is None and chatbot is not None:
+        # None for the chat service client, whose history lives in its service session
+        st.session_state.memory = chatbot.new_memory()
+    return st.session_state.get("memory")
+
+def get_bank_chatbot():
+    """Chatbot answering for this session's current bank, or None until that bank is indexed"""
+    chatbot = st.session_state.get("chatbot")
+    if chatbot is None or isinstance(chatbot, ChatServiceClient):
+        # A service client is bound to its session's bank when it indexes it
+        return chatbot
+    return chatbot.get(st.session_state.get("current_bank"))
+
+def start_chatbot_warmup():
+    """Index the processed transcript on the background worker; the page keeps rendering"""
+    if st.session_state.get("chatbot") is None:
+        if not (chatbot_config.CHAT_SERVICE_URL or os.environ.get("OPENAI_API_KEY")):
+            # Started by the Chatbot tab once the API key is entered
+            return
+        st.session_state.chatbot, error = initialize_chatbot()
+        if error:
+            logger.warning(f"Chatbot failed to initialize: {error}")
+            return
+
+    st.session_state.pop("pdf_processed", None)
+    st.session_state.index_job = get_index_warmup().start(
+        st.session_state.chatbot,
+        st.session_state.raw_text,
+        st.session_state.get("current_bank"),
+        st.session_state.get("text_sections")
+    )
+
+@st.fragment(run_every=1.0)
+def display_indexing_status():
+    """Live indexing progress; reruns the page once the chatbot is ready"""
+    job = st.session_state.get("index_job")
+    if job is None:
+        return
+
+    status = job.snapshot()
+    if status["status"] == "ready":
+        st.session_state.pdf_processed = True
+        st.rerun()
+    elif status["status"] == "failed":
+        st.error(status["message"])
+        if st.button("🔄 Retry indexing", key="retry_indexing"):
+            start_chatbot_warmup()
+    else:
+        st.progress(status["progress"], text=f"⏳ {status['message']} · {status['elapsed_seconds']:.0f}s")
+        st.caption("The other tabs stay usable while the document is indexed.")
+
+def select_comparison_banks():
+    """Other processed banks to compare with; returns every bank of the comparison, or [] for a normal turn"""
+    current_bank = st.session_state.get("current_bank")
+    others = [bank for bank in DataManager().get_bank_list() if bank["has_data"] and bank["key"] != current_bank]
+    if not current_bank or not others:
+        return []
+
+    names = {bank["key"]: bank["name"] for bank in others}
+    selected = st.multiselect(
+        "🔀 Compare with",
+        options=list(names),
+        format_func=lambda key: names[key],
+        key="compare_banks",
+        help="Ask one question across several banks: their transcripts are searched in parallel and answered together",
+    )
+    return [current_bank] + selected if selected else []
+
 def display_chat_history():
     """Display chat history in a nice format"""
     if 'chatbot' in st.session_state and st.session_state.chatbot:
-        history = st.session_state.chatbot.get_chat_history()
+        history = st.session_state.chatbot.get_chat_history(get_session_memory())
 
         if history:
             st.subheader("💬 Chat History")
@@ -93,10 +174,44 @@ def display_chat_history():
         else:
             st.info("💭 No chat history yet. Start a conversation!")
 
+def display_diagnostics():
+    """Show rolling latency and token figures of recent chat turns"""
+    stats = st.session_state.chatbot.get_turn_stats()
+    if not stats.get("turns"):
+        return
+
+    with st.expander("📊 Diagnostics", expanded=False):
+        st.caption(
+            f"Last {stats['turns']} turns · {stats.get('cache_hit_rate', 0):.0%} answered from cache · "
+            f"{stats.get('direct_answer_rate', 0):.0%} answered from extracted metrics · "
+            f"{stats.get('error_rate', 0):.0%} errors"
+        )
+        labels = {
+            "total_ms": "Turn (ms)",
+            "retrieval_ms": "Retrieval (ms)",
+            "llm_ms": "LLM (ms)",
+            "ttft_ms": "First token (ms)",
+            "retrieved_chunks": "Retrieved chunks",
+            "retrieved_chars": "Retrieved characters",
+            "prompt_tokens": "Prompt tokens",
+            "completion_tokens": "Completion tokens",
+        }
+        rows = [
+            {"Metric": label, "p50": stats[field]["p50"], "p95": stats[field]["p95"]}
+            for field, label in labels.items() if field in stats
+        ]
+        st.table(rows)
+
 def run_chatbot_agent():
     """Main Streamlit application"""
     
-    if os.environ.get('OPENAI_API_KEY') == None:   # only proceed if user entered something
+    if chatbot_config.CHAT_SERVICE_URL:
+        # The chat service holds the API key, the app only needs a client
+        if st.session_state.get("chatbot") is None:
+            st.session_state.chatbot, error = initialize_chatbot()
+            if error:
+                st.error(f"Chatbot failed to initialize: {error}")
+    elif os.environ.get('OPENAI_API_KEY') == None:   # only proceed if user entered something
         api_key = st.chat_input("Enter API key")
         if api_key:  # only assign if user entered something
             os.environ['OPENAI_API_KEY'] = api_key
@@ -108,11 +223,15 @@ def run_chatbot_agent():
                 st.error("Chatbot object is None for unknown reason")
             # st.session_state.chatbot.process_pdf(st.session_state.filepath) 
     
-    if 'chatbot' in st.session_state and 'raw_text' in st.session_state:
+    if st.session_state.get('chatbot') and 'raw_text' in st.session_state:
         logger.info("chatbot agent 112")
-        if 'pdf_processed' not in st.session_state and os.environ.get('OPENAI_API_KEY') != None:
+        has_key = chatbot_config.CHAT_SERVICE_URL or os.environ.get('OPENAI_API_KEY') != None
+        if 'pdf_processed' not in st.session_state and has_key:
             logger.info("chatbot agent 114")
-            st.session_state.chatbot.process_pdf(st.session_state.filepath)
+            job = st.session_state.get("index_job")
+            if job is None or job.bank_key != st.session_state.get("current_bank"):
+                start_chatbot_warmup()
+            display_indexing_status()
     
     # Header
     st.markdown('<div class="main-header">🤖 Simple PDF Chatbot</div>', unsafe_allow_html=True)
@@ -121,7 +240,6 @@ def run_chatbot_agent():
     # Initialize session state
     if 'chatbot' not in st.session_state:
         st.session_state.chatbot = None
-        st.session_state.messages = []
 
         # Status and Controls
         st.header("CHATBOT")
@@ -136,12 +254,23 @@ def run_chatbot_agent():
         with col1:
             st.header("💬 Chat with Your Document")
 
+            cache_stats = st.session_state.chatbot.get_answer_cache_stats()
+            if cache_stats.get("hits"):
+                st.caption(
+                    f"⚡ Answer cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                    f"{cache_stats['saved_tokens']:,} tokens saved"
+                )
+
+            if chatbot_config.TELEMETRY_ENABLED:
+                display_diagnostics()
+
             # Chat messages container
             chat_container = st.container()
 
-            # Display existing messages
+            # Display existing messages; the session's memory is the only history store
+            memory = get_session_memory()
             with chat_container:
-                for message in st.session_state.messages:
+                for message in st.session_state.chatbot.get_chat_history(memory):
                     if message["role"] == "user":
                         st.markdown(f"""
                         <div class="chat-message user-message">
@@ -155,24 +284,54 @@ def run_chatbot_agent():
                         </div>
                         """, unsafe_allow_html=True)
 
+                # Failed turns are not part of the history, show the last error once
+                if st.session_state.get("chat_error"):
+                    st.error(st.session_state.pop("chat_error"))
+
         # Chat input
         
             
-            user_input = st.chat_input("Ask a question about your document...")
+            compare_banks = select_comparison_banks()
+            placeholder = ("Ask a question across the selected banks..." if compare_banks
+                           else "Ask a question about your document...")
+            user_input = st.chat_input(placeholder)
             logger.info("dddeee")
             if user_input:
                 logger.info("eee")
-                # Add user message to session
-                st.session_state.messages.append({"role": "user", "content": user_input})
-
-                # Get bot response
-                with st.spinner("🤔 Thinking..."):
-                    try:
-                        response = st.session_state.chatbot.chat(user_input)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                    except Exception as e:
-                        error_response = f"❌ Error: {e}"
-                        st.session_state.messages.append({"role": "assistant", "content": error_response})
+                with chat_container:
+                    st.markdown(f"""
+                    <div class="chat-message user-message">
+                    <strong>👤 You:</strong> {user_input}
+                    </div>
+                    """, unsafe_allow_html=True)
+                    response_placeholder = st.empty()
+
+                # Stream bot response as it is generated, from the current bank's chatbot
+                bank_chatbot = get_bank_chatbot()
+                if bank_chatbot is None:
+                    st.session_state.chat_error = "❌ The document is still being indexed, please try again."
+                    st.rerun()
+                response = ""
+                if compare_banks:
+                    stream = bank_chatbot.compare_stream(user_input, compare_banks, history=memory)
+                else:
+                    stream = bank_chatbot.chat_stream(user_input, history=memory)
+                try:
+                    for token in stream:
+                        response += token
+                        response_placeholder.markdown(f"""
+                        <div class="chat-message bot-message">
+                        <strong>🤖 Bot:</strong> {response}▌
+                        </div>
+                        """, unsafe_allow_html=True)
+                except Exception as e:
+                    response = f"❌ Error: {e}"
+                finally:
+                    # Also runs when Streamlit interrupts the script mid-stream;
+                    # closing the stream records the exchange in the session's memory
+                    stream.close()
+                    if response.startswith("❌"):
+                        st.session_state.chat_error = response
 
                 # Rerun to show new messages
                 st.rerun()
@@ -19,6 +19,7 @@ import os
 sys.path.append(str(Path(__file__).parent.parent))
 
 from utils.data_manager import DataManager
+from utils.metric_store import load_or_extract_metrics
 from processors.transcript_processor_factory import TranscriptProcessorFactory
 
 # Download required NLTK data
@@ -264,9 +265,22 @@ class EnhancedPreprocessingAgent:
             except Exception as e:
                 logger.warning(f"Auto-save warning: {e}")
 
+            # Figures the chatbot can quote without retrieval or an LLM call
+            try:
+                load_or_extract_metrics(
+                    self.data_manager, self.current_bank, raw_text,
+                    processed_data.get("text_sections", [])
+                )
+            except Exception as e:
+                logger.warning(f"Metric extraction warning: {e}")
+
             progress_bar.progress(100)
             status_text.text("✅ Processing complete & saved!")
 
+            # Index for the chatbot in the background while the user moves on
+            from agents.chatbot_agent import start_chatbot_warmup
+            start_chatbot_warmup()
+
             return True
         except Exception as e:
             st.error(f"❌ Processing error: {str(e)}")
@@ -0,0 +1,229 @@
+"""
+Batch Question Pack
+Answers a standard list of questions for several banks' transcripts without
+the Streamlit UI, concurrently and under a shared rate budget
+
+    python batch_qa.py --banks jp_morgan,bank_of_america --questions config/standard_questions.txt \\
+        --output results/2q25.jsonl --csv results/2q25.csv
+
+Banks must have been preprocessed once in the app (data/banks/<bank>/document_data_latest.json).
+Re-running with the same --output resumes: answered questions are skipped
+and failed ones are retried.
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+import chatbot_config
+from utils.batch_embedder import RateLimiter
+from utils.data_manager import DataManager
+from utils.tokens import count_tokens
+
+CSV_FIELDS = ["bank_key", "bankfile", "question_id", "question", "answer", "latency_ms", "error", "answered_at"]
+
+
+def load_questions(path: str) -> List[Tuple[str, str]]:
+    """
+    Read a question pack
+
+    Text files hold one question per line, optionally as "id | question";
+    JSON files hold a list of strings or of {"id", "question"} objects.
+
+    Returns:
+        (question id, question) pairs; ids default to a hash of the question
+    """
+    def default_id(question: str) -> str:
+        return hashlib.sha1(question.encode("utf-8")).hexdigest()[:10]
+
+    questions = []
+    if path.endswith(".json"):
+        with open(path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                if isinstance(item, str):
+                    questions.append((default_id(item), item))
+                else:
+                    questions.append((item.get("id") or default_id(item["question"]), item["question"]))
+        return questions
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "|" in line:
+                question_id, question = (part.strip() for part in line.split("|", 1))
+            else:
+                question_id, question = default_id(line), line
+            questions.append((question_id, question))
+    return questions
+
+
+def load_answered(output_path: Path) -> Set[Tuple[str, str]]:
+    """(bank, question id) pairs already answered without error in an earlier run"""
+    answered = set()
+    if not output_path.exists():
+        return answered
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write leaves a partial last line
+                continue
+            if not row.get("error"):
+                answered.add((row["bank_key"], row["question_id"]))
+    return answered
+
+
+def export_csv(output_path: Path, csv_path: str):
+    """Write the latest row per bank and question from the JSONL results to CSV"""
+    latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            latest[(row["bank_key"], row["question_id"])] = row
+
+    Path(csv_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for row in sorted(latest.values(), key=lambda r: (r["bank_key"], r["question_id"])):
+            writer.writerow(row)
+    print(f"📄 CSV written to {csv_path} ({len(latest)} rows)")
+
+
+def estimate_turn_tokens(question: str) -> int:
+    """Prompt + completion tokens one answer may use, for the rate budget"""
+    if chatbot_config.CONTEXT_PACKING_ENABLED:
+        context = chatbot_config.CONTEXT_TOKEN_BUDGET
+    else:
+        context = chatbot_config.SIMILARITY_SEARCH_K * chatbot_config.CHUNK_SIZE // 4
+    return count_tokens(question, chatbot_config.OPENAI_MODEL) + context + chatbot_config.MAX_TOKENS + 200
+
+
+def prepare_chatbots(bank_keys: List[str]) -> Dict[str, Any]:
+    """One chatbot per bank, all sharing the process-wide index (one index per document)"""
+    from utils.chat import SimplePDFChatbot
+
+    data_manager = DataManager()
+    chatbots = {}
+    for bank_key in bank_keys:
+        document_data = data_manager.load_analysis_results(bank_key, "document_data")
+        if not document_data or not document_data.get("text"):
+            print(f"⚠️ {bank_key}: no preprocessed transcript, skipping (process it in the app first)")
+            continue
+
+        bot = SimplePDFChatbot()
+        if bot.process_text(document_data["text"], bank_key, document_data.get("text_sections")):
+            chatbots[bank_key] = bot
+        else:
+            print(f"❌ {bank_key}: indexing failed, skipping")
+    return chatbots
+
+
+async def run_batch(chatbots: Dict[str, Any], questions: List[Tuple[str, str]],
+                    answered: Set[Tuple[str, str]], output_path: Path, concurrency: int) -> Dict[str, int]:
+    """Answer every pending (bank, question) pair and append each result as it completes"""
+    banks_config = DataManager().banks_config.get("banks", {})
+    limiter = RateLimiter(chatbot_config.BATCH_RPM_LIMIT, chatbot_config.BATCH_TPM_LIMIT)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    jobs = [
+        (bank_key, question_id, question)
+        for bank_key in chatbots
+        for question_id, question in questions
+        if (bank_key, question_id) not in answered
+    ]
+    counts = {"total": len(jobs), "done": 0, "failed": 0}
+    skipped = len(chatbots) * len(questions) - len(jobs)
+    print(f"🚀 {len(jobs)} answers to produce ({skipped} already done), concurrency {concurrency}")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'a', encoding='utf-8') as out:
+
+        async def answer(bank_key: str, question_id: str, question: str):
+            bot = chatbots[bank_key]
+            async with semaphore:
+                await limiter.aacquire(estimate_turn_tokens(question))
+                start = time.perf_counter()
+                # Every question is independent: a fresh, empty history each time
+                response = await bot.achat(question, history=bot.new_memory())
+                latency_ms = round((time.perf_counter() - start) * 1000)
+
+            # The chatbot reports failures as answers instead of raising
+            failed = response.startswith("❌")
+            row = {
+                "bank_key": bank_key,
+                "bankfile": banks_config.get(bank_key, {}).get("bankfile", bank_key),
+                "question_id": question_id,
+                "question": question,
+                "answer": "" if failed else response,
+                "latency_ms": latency_ms,
+                "error": response if failed else "",
+                "answered_at": datetime.now().isoformat(),
+            }
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            out.flush()
+
+            counts["done"] += 1
+            counts["failed"] += failed
+            print(f"[{counts['done']}/{counts['total']}] {'❌' if failed else '✅'} {bank_key} · {question_id} ({latency_ms} ms)")
+
+        await asyncio.gather(*(answer(*job) for job in jobs))
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--banks", default="all", help="Comma separated bank keys from banks.yaml, or 'all'")
+    parser.add_argument("--questions", default="config/standard_questions.txt", help="Question pack (.txt or .json)")
+    parser.add_argument("--output", required=True, help="JSONL results file (appended to; enables resume)")
+    parser.add_argument("--csv", help="Also export the results as CSV")
+    parser.add_argument("--concurrency", type=int, default=chatbot_config.BATCH_MAX_CONCURRENCY)
+    parser.add_argument("--no-resume", action="store_true", help="Answer everything again")
+    args = parser.parse_args()
+
+    configured = list(DataManager().banks_config.get("banks", {}))
+    bank_keys = configured if args.banks == "all" else [key.strip() for key in args.banks.split(",")]
+    unknown = [key for key in bank_keys if key not in configured]
+    if unknown:
+        print(f"❌ Unknown banks: {', '.join(unknown)} (configured: {', '.join(configured)})")
+        return 1
+
+    questions = load_questions(args.questions)
+    output_path = Path(args.output)
+    answered = set() if args.no_resume else load_answered(output_path)
+    print(f"📋 {len(questions)} questions × {len(bank_keys)} banks")
+
+    chatbots = prepare_chatbots(bank_keys)
+    if not chatbots:
+        print("❌ No bank could be prepared")
+        return 1
+
+    start = time.perf_counter()
+    counts = asyncio.run(run_batch(chatbots, questions, answered, output_path, args.concurrency))
+    print(
+        f"\n✅ {counts['done'] - counts['failed']} answered, {counts['failed']} failed "
+        f"in {time.perf_counter() - start:.1f}s → {output_path}"
+    )
+    if counts["failed"]:
+        print("↻ Re-run the same command to retry the failed questions")
+
+    if args.csv:
+        export_csv(output_path, args.csv)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
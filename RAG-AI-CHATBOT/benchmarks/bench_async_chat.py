@@ -0,0 +1,79 @@
+"""
+Async Chat Concurrency Benchmark
+Measures SimplePDFChatbot.achat throughput at increasing numbers of concurrent
+sessions on one event loop, against the local fake OpenAI server.
+
+    python benchmarks/bench_async_chat.py --sessions 1,10,50 --turns 3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.common import percentile, setup_offline_chatbot_env, synthetic_transcript
+
+QUESTIONS = [
+    "What was net interest income this quarter?",
+    "How did the CET1 ratio move?",
+    "What did management say about credit card charge-offs?",
+    "How much was added to the allowance for credit losses?",
+    "What drove expenses higher?",
+]
+
+
+async def run_session(bot, session_id: int, turns: int, latencies: List[float]):
+    """One analyst conversation with its own history"""
+    history = bot.new_memory()
+    for turn in range(turns):
+        question = QUESTIONS[(session_id + turn) % len(QUESTIONS)]
+        start = time.perf_counter()
+        await bot.achat(question, history=history)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(bot, sessions: int, turns: int):
+    latencies: List[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(bot, i, turns, latencies) for i in range(sessions)))
+    wall = time.perf_counter() - start
+    return wall, latencies
+
+
+async def run_all(bot, levels: List[int], turns: int):
+    print(f"\n{'sessions':>8} {'turns':>6} {'wall s':>8} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for sessions in levels:
+        wall, latencies = await run_level(bot, sessions, turns)
+        print(
+            f"{sessions:>8} {len(latencies):>6} {wall:>8.2f} {len(latencies) / wall:>8.1f} "
+            f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sessions", default="1,10,50", help="Comma separated concurrency levels")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake API latency in seconds")
+    args = parser.parse_args()
+
+    server = setup_offline_chatbot_env(latency=args.latency)
+    from utils.chat import SimplePDFChatbot
+
+    bot = SimplePDFChatbot()
+    if not bot.process_text(synthetic_transcript()):
+        print("❌ Ingestion failed")
+        return
+
+    levels = [int(x) for x in args.sessions.split(",")]
+    # One event loop for every level, as a long-running service would have
+    asyncio.run(run_all(bot, levels, args.turns))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Embedding Backend Benchmark
+Compares ingestion time and retrieval recall of the local MiniLM backend
+against OpenAI embeddings on the same chunks.
+
+    python benchmarks/bench_embeddings.py --backends local,openai --k 5
+
+The OpenAI backend needs OPENAI_API_KEY; the local backend runs offline.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import chatbot_config
+from benchmarks.common import synthetic_transcript
+
+# Question -> phrase that marks a chunk as relevant
+LABELLED_QUERIES = {
+    "What was net interest income this quarter?": "net interest income",
+    "Where did the CET1 ratio end the quarter?": "cet1 ratio",
+    "How did card charge-offs develop?": "charge-offs",
+    "How much was added to the allowance for credit losses?": "allowance for credit losses",
+    "What drove expenses?": "expenses of",
+    "What happened to deposits?": "deposits were down",
+    "How did investment banking fees do?": "investment banking fees",
+    "How did the net interest margin change?": "net interest margin",
+}
+
+
+def recall_at_k(vectors: np.ndarray, query_vectors: np.ndarray, chunks: List[str], k: int) -> float:
+    """Mean fraction of the top-k chunks that contain the query's labelled phrase"""
+    scores = []
+    for query_vector, phrase in zip(query_vectors, LABELLED_QUERIES.values()):
+        relevant = {i for i, chunk in enumerate(chunks) if phrase in chunk.lower()}
+        if not relevant:
+            continue
+        top_k = np.argsort(-(vectors @ query_vector))[:k]
+        scores.append(len(relevant.intersection(top_k.tolist())) / min(k, len(relevant)))
+    return float(np.mean(scores)) if scores else 0.0
+
+
+def run_backend(backend: str, chunks: List[str], k: int) -> Dict[str, float]:
+    from utils.chat import create_base_embeddings
+
+    embeddings = create_base_embeddings(backend)
+
+    start = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+    ingest_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query_vectors = np.asarray(
+        [embeddings.embed_query(query) for query in LABELLED_QUERIES], dtype=np.float32
+    )
+    query_ms = (time.perf_counter() - start) / len(LABELLED_QUERIES) * 1000
+
+    # Cosine similarity regardless of whether the backend normalizes
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+    return {
+        "ingest_seconds": ingest_seconds,
+        "chunks_per_second": len(chunks) / ingest_seconds,
+        "query_ms": query_ms,
+        "recall": recall_at_k(vectors, query_vectors, chunks, k),
+        "dim": vectors.shape[1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--backends", default="local,openai", help="Comma separated backends")
+    parser.add_argument("--transcript", help="Transcript text file (defaults to a synthetic one)")
+    parser.add_argument("--k", type=int, default=chatbot_config.SIMILARITY_SEARCH_K)
+    args = parser.parse_args()
+
+    text = Path(args.transcript).read_text() if args.transcript else synthetic_transcript(sections=400)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chatbot_config.CHUNK_SIZE, chunk_overlap=chatbot_config.CHUNK_OVERLAP
+    )
+    chunks = splitter.split_text(text)
+    print(f"📄 {len(chunks)} chunks of up to {chatbot_config.CHUNK_SIZE} characters")
+
+    print(f"\n{'backend':>8} {'dim':>5} {'ingest s':>9} {'chunks/s':>9} {'query ms':>9} {f'recall@{args.k}':>9}")
+    for backend in args.backends.split(","):
+        try:
+            result = run_backend(backend, chunks, args.k)
+        except Exception as e:
+            print(f"{backend:>8} ❌ {e}")
+            continue
+        print(
+            f"{backend:>8} {result['dim']:>5} {result['ingest_seconds']:>9.2f} "
+            f"{result['chunks_per_second']:>9.1f} {result['query_ms']:>9.1f} {result['recall']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Retrieval Benchmark
+Measures how chunking, k and the vector database affect ingestion time,
+index size, query latency and recall@k on the fixture transcripts in
+benchmarks/data, using pre-recorded embeddings so runs are offline and
+repeatable.
+
+    python benchmarks/bench_retrieval.py --record                 # once, needs the embedding backend
+    python benchmarks/bench_retrieval.py --output results.json    # offline
+    python benchmarks/bench_retrieval.py --compare baseline.json  # exits 1 on regressions
+
+Recordings are keyed by embedding model and chunk text, so re-record after
+adding transcripts, questions or chunk sizes.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+import chatbot_config
+from benchmarks.common import percentile
+from utils.embedding_cache import CachedEmbeddings
+from utils.index_store import IndexStore
+from utils.shared_index import SharedBankIndex
+
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_RECORDING = DATA_DIR / "embeddings.sqlite"
+
+# Rows are matched on these fields when comparing two runs
+CONFIG_FIELDS = ("vector_db", "chunk_size", "chunk_overlap", "k")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def load_fixtures():
+    """Fixture transcripts by name and the labelled questions"""
+    transcripts = {
+        path.stem: path.read_text(encoding="utf-8")
+        for path in sorted((DATA_DIR / "transcripts").glob("*.txt"))
+    }
+    with open(DATA_DIR / "questions.json", "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    return transcripts, questions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_configuration(embeddings, model_name: str, vector_db: str, chunk_size: int, chunk_overlap: int,
+                      ks: List[int], transcripts: Dict[str, str], questions: List[Dict[str, str]],
+                      repeat: int) -> List[Dict[str, Any]]:
+    """Index the fixtures with one chunking setup and query them at every k"""
+    with tempfile.TemporaryDirectory() as tmp:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len, add_start_index=True
+        )
+        index = SharedBankIndex(
+            embeddings, IndexStore(tmp), splitter, vector_db, chunk_size, chunk_overlap, model_name
+        )
+
+        # Same path as the app: chunking, embedding and a persisted index
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, text in transcripts.items():
+                index.index_document(name, text, persist=True)
+        ingest_seconds = time.perf_counter() - start
+
+        index_bytes = sum(path.stat().st_size for path in Path(tmp).rglob("*") if path.is_file())
+        chunks = sum(index._count_chunks(index.get_partition(name)) for name in transcripts)
+        query_vectors = [embeddings.embed_query(item["question"]) for item in questions]
+
+        rows = []
+        for k in ks:
+            latencies, hits = [], 0
+            for attempt in range(repeat):
+                for item, query_vector in zip(questions, query_vectors):
+                    start = time.perf_counter()
+                    results = index.search(query_vector, k, [item["transcript"]])
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if attempt == 0:
+                        evidence = _normalize(item["evidence"])
+                        hits += any(evidence in _normalize(doc.page_content) for doc, _ in results)
+
+            rows.append({
+                "vector_db": vector_db,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "k": k,
+                "chunks": chunks,
+                "ingest_seconds": round(ingest_seconds, 4),
+                "index_bytes": index_bytes,
+                "p50_ms": round(percentile(latencies, 50), 4),
+                "p95_ms": round(percentile(latencies, 95), 4),
+                "p99_ms": round(percentile(latencies, 99), 4),
+                "recall": round(hits / len(questions), 4),
+            })
+        return rows
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            max_recall_drop: float, max_latency_increase: float) -> int:
+    """Print per-configuration deltas against a baseline run; return the number of regressions"""
+    previous = {tuple(row[field] for field in CONFIG_FIELDS): row for row in baseline}
+    regressions = 0
+
+    print(f"\n{'configuration':>26} {'recall':>14} {'p95 ms':>18}")
+    for row in results:
+        key = tuple(row[field] for field in CONFIG_FIELDS)
+        old = previous.get(key)
+        if old is None:
+            continue
+        recall_delta = row["recall"] - old["recall"]
+        latency_ratio = row["p95_ms"] / old["p95_ms"] if old["p95_ms"] else 1.0
+        regressed = recall_delta < -max_recall_drop or latency_ratio > 1 + max_latency_increase
+        regressions += regressed
+        label = f"{row['vector_db']} {row['chunk_size']}/{row['chunk_overlap']} k={row['k']}"
+        print(
+            f"{label:>26} {old['recall']:.2f}->{row['recall']:.2f} ({recall_delta:+.2f}) "
+            f"{old['p95_ms']:.2f}->{row['p95_ms']:.2f} ({latency_ratio:.2f}x)"
+            f"{'  ❌ regression' if regressed else ''}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--chunk-sizes", type=_int_list, default=[500, 1000, 1500])
+    parser.add_argument("--overlaps", type=_int_list, default=[100, 200])
+    parser.add_argument("--k", type=_int_list, default=[3, 5, 10])
+    parser.add_argument("--vector-dbs", default="faiss,chroma")
+    parser.add_argument("--repeat", type=int, default=5, help="Query passes used for latency percentiles")
+    parser.add_argument("--backend", default=chatbot_config.EMBEDDING_BACKEND)
+    parser.add_argument("--recording", default=str(DEFAULT_RECORDING))
+    parser.add_argument("--record", action="store_true", help="Embed with the real backend and record")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--max-recall-drop", type=float, default=0.02)
+    parser.add_argument("--max-latency-increase", type=float, default=0.5, help="Allowed p95 growth (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    from utils.chat import create_base_embeddings, get_embedding_model_name
+
+    model_name = get_embedding_model_name(args.backend)
+    if args.record:
+        base_embeddings = create_base_embeddings(args.backend)
+        model_name = get_embedding_model_name(args.backend, base_embeddings)
+        embeddings = CachedEmbeddings(base_embeddings, model_name, args.recording, max_entries=10 ** 9)
+    elif not Path(args.recording).exists():
+        print(f"❌ No recorded embeddings at {args.recording}, run with --record first")
+        return 1
+    else:
+        # Replay only: a missing vector is an error, never an API call
+        embeddings = CachedEmbeddings(None, model_name, args.recording, max_entries=10 ** 9)
+
+    transcripts, questions = load_fixtures()
+    print(f"📄 {len(transcripts)} transcripts, {len(questions)} labelled questions, embeddings: {model_name}")
+
+    results = []
+    print(
+        f"\n{'db':>6} {'size':>5} {'overlap':>7} {'k':>3} {'chunks':>6} {'ingest s':>8} "
+        f"{'index KB':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'recall':>6}"
+    )
+    for vector_db in args.vector_dbs.split(","):
+        for chunk_size in args.chunk_sizes:
+            for chunk_overlap in args.overlaps:
+                if chunk_overlap >= chunk_size:
+                    continue
+                try:
+                    rows = run_configuration(
+                        embeddings, model_name, vector_db, chunk_size, chunk_overlap,
+                        args.k, transcripts, questions, args.repeat,
+                    )
+                except LookupError as e:
+                    print(f"❌ {vector_db} {chunk_size}/{chunk_overlap}: {e}; re-record with --record")
+                    continue
+                for row in rows:
+                    print(
+                        f"{vector_db:>6} {chunk_size:>5} {chunk_overlap:>7} {row['k']:>3} {row['chunks']:>6} "
+                        f"{row['ingest_seconds']:>8.3f} {row['index_bytes'] / 1024:>8.0f} {row['p50_ms']:>7.3f} "
+                        f"{row['p95_ms']:>7.3f} {row['p99_ms']:>7.3f} {row['recall']:>6.2f}"
+                    )
+                results.extend(rows)
+
+    report = {
+        "commit": git_commit(),
+        "embedding_model": model_name,
+        "created_at": datetime.now().isoformat(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {baseline.get('commit', 'unknown')}:")
+        regressions = compare(results, baseline["results"], args.max_recall_drop, args.max_latency_increase)
+        if regressions:
+            print(f"\n❌ {regressions} configuration(s) regressed")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
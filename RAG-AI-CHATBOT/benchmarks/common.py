@@ -0,0 +1,112 @@
+"""
+Benchmark Helpers
+Shared setup for benchmarks that drive SimplePDFChatbot offline
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.fake_openai_server import start_server
+
+SPEAKERS = [
+    ("Operator", "operator"),
+    ("Jeremy Barnum, Chief Financial Officer", "management"),
+    ("Jamie Dimon, Chairman and Chief Executive Officer", "management"),
+    ("Ken Usdin, Analyst, Autonomous Research", "analyst"),
+    ("Betsy Graseck, Analyst, Morgan Stanley", "analyst"),
+]
+
+TOPICS = [
+    "net interest income came in at {n} billion, up {p} percent year on year",
+    "the CET1 ratio ended the quarter at {p} percent",
+    "card net charge-offs were {p} percent, in line with guidance",
+    "we added {n} billion to the allowance for credit losses",
+    "expenses of {n} billion were driven by compensation and technology investment",
+    "deposits were down {p} percent sequentially as clients sought yield",
+    "investment banking fees were up {p} percent on a strong M&A pipeline",
+    "the net interest margin expanded by {p} basis points",
+]
+
+
+def synthetic_transcript(sections: int = 120, seed: int = 7) -> str:
+    """Deterministic earnings-call style transcript with page breaks"""
+    rng = random.Random(seed)
+    lines = []
+    for i in range(sections):
+        speaker, _ = SPEAKERS[i % len(SPEAKERS)]
+        # One topic per section keeps topics separable for recall measurements
+        topic = rng.choice(TOPICS)
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            sentence = topic.format(n=rng.randint(1, 40), p=rng.randint(1, 15))
+            sentences.append(sentence[0].upper() + sentence[1:] + ".")
+        lines.append(f"{speaker}\n{' '.join(sentences)}")
+        if i % 6 == 5:
+            lines.append("\f")
+    return "\n\n".join(lines)
+
+
+def synthetic_sections(transcript: str) -> List[Dict[str, str]]:
+    """Speaker sections of a synthetic transcript, as produced by preprocessing"""
+    roles = dict(SPEAKERS)
+    sections = []
+    for block in transcript.split("\n\n"):
+        block = block.strip("\f\n ")
+        if "\n" not in block:
+            continue
+        speaker, speech = block.split("\n", 1)
+        sections.append({"speaker": speaker, "speech": speech, "role": roles.get(speaker, "")})
+    return sections
+
+
+def setup_offline_chatbot_env(**server_kwargs):
+    """
+    Start the fake OpenAI server and point chatbot_config at it
+
+    Index persistence and the embedding cache are disabled so every run
+    measures the full pipeline.
+
+    Returns:
+        The running fake server
+    """
+    server, base_url = start_server(**server_kwargs)
+    os.environ["OPENAI_API_KEY"] = "sk-fake-benchmark"
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    import chatbot_config
+    chatbot_config.OPENAI_API_KEY = "sk-fake-benchmark"
+    chatbot_config.OPENAI_BASE_URL = base_url
+    chatbot_config.PERSIST_INDEX = False
+    chatbot_config.EMBEDDING_CACHE_ENABLED = False
+    return server
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def print_histogram(values: List[float], buckets: List[float], unit: str = "ms", width: int = 40):
+    """Print a text histogram of values over upper bucket bounds (the last bucket is open)"""
+    if not values:
+        print("   (no samples)")
+        return
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        counts[index] += 1
+
+    peak = max(counts)
+    for i, count in enumerate(counts):
+        label = f"<= {buckets[i]:g} {unit}" if i < len(buckets) else f"> {buckets[-1]:g} {unit}"
+        bar = "█" * max(1 if count else 0, round(count / peak * width))
+        print(f"   {label:>14} {count:>6} {bar}")
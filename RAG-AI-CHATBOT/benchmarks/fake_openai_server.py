@@ -0,0 +1,291 @@
+"""
+Fake OpenAI Server
+Local OpenAI-compatible stand-in for chat completions and embeddings
+
+Outputs are deterministic so benchmarks can run offline and be compared
+between commits. Latency can follow a fixed, uniform or lognormal
+distribution, and a share of requests can be rejected with 429s to exercise
+retry paths. Run standalone with:
+
+    python benchmarks/fake_openai_server.py --port 8765 --latency 0.2 --latency-dist lognormal --error-rate 0.05
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+def fake_embedding(item: Any, dim: int) -> List[float]:
+    """Deterministic unit vector derived from the input"""
+    seed = hashlib.sha256(json.dumps(item).encode("utf-8")).digest()
+    rng = random.Random(int.from_bytes(seed[:8], "little"))
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def fake_answer(messages: List[Dict[str, Any]]) -> str:
+    """Deterministic answer built from the last user message"""
+    question = ""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            question = content if isinstance(content, str) else json.dumps(content)
+            break
+    return f"Stand-in answer to: {question[:200]}"
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class ServerBehaviour:
+    """Seeded latency and 429 decisions shared by all request threads"""
+
+    def __init__(self, latency: float = 0.0, latency_dist: str = "fixed", latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, retry_after: float = 1.0, seed: int = 0):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist must be one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency
+        self.latency_dist = latency_dist
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # (endpoint, status) -> number of responses
+        self.counts: Counter = Counter()
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before answering; latency is the median for every distribution"""
+        if self.latency <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_dist == "uniform":
+                return self._rng.uniform(0.5 * self.latency, 1.5 * self.latency)
+            if self.latency_dist == "lognormal":
+                return self.latency * math.exp(self._rng.gauss(0.0, self.latency_sigma))
+        return self.latency
+
+    def should_rate_limit(self) -> bool:
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def count(self, endpoint: str, status: int):
+        with self._lock:
+            self.counts[(endpoint, status)] += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Responses per endpoint and status code"""
+        with self._lock:
+            stats: Dict[str, Dict[str, int]] = {}
+            for (endpoint, status), count in self.counts.items():
+                stats.setdefault(endpoint, {})[str(status)] = count
+            return stats
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Serves /v1/embeddings and /v1/chat/completions"""
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+
+        path = self.path.split("?")[0].rstrip("/")
+        behaviour: ServerBehaviour = self.server.behaviour
+        time.sleep(behaviour.sample_latency())
+
+        if path.endswith("/embeddings"):
+            endpoint = "embeddings"
+        elif path.endswith("/chat/completions"):
+            endpoint = "chat"
+        else:
+            self._send_json(404, {"error": {"message": f"unknown endpoint {path}"}})
+            return
+
+        if behaviour.should_rate_limit():
+            behaviour.count(endpoint, 429)
+            self._send_json(429, {"error": {
+                "message": "Rate limit reached (simulated by the fake server)",
+                "type": "requests",
+                "code": "rate_limit_exceeded",
+            }}, headers={"Retry-After": f"{behaviour.retry_after:g}"})
+            return
+
+        behaviour.count(endpoint, 200)
+        if endpoint == "embeddings":
+            self._handle_embeddings(body)
+        else:
+            self._handle_chat(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle_embeddings(self, body: Dict[str, Any]):
+        inputs = body.get("input", [])
+        # A single string or a single list of token ids is one input
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+
+        dim = self.server.settings["dim"]
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        for i, item in enumerate(inputs):
+            vector = fake_embedding(item, dim)
+            if as_base64:
+                vector = base64.b64encode(struct.pack(f"<{dim}f", *vector)).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+
+        tokens = sum(estimate_tokens(json.dumps(item)) for item in inputs)
+        self._send_json(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    def _handle_chat(self, body: Dict[str, Any]):
+        messages = body.get("messages", [])
+        answer = fake_answer(messages)
+        max_tokens = body.get("max_tokens") or body.get("max_completion_tokens")
+        words = answer.split(" ")
+        if max_tokens:
+            words = words[:max_tokens]
+
+        prompt_tokens = sum(estimate_tokens(json.dumps(m.get("content", ""))) for m in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+        }
+        model = body.get("model", "fake-chat")
+        created = int(time.time())
+
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def send_chunk(delta: Dict[str, Any], finish_reason=None, chunk_usage=None):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            if chunk_usage is not None:
+                chunk["choices"] = []
+                chunk["usage"] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        send_chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(words):
+            time.sleep(self.server.settings["token_delay"])
+            send_chunk({"content": word if i == 0 else " " + word})
+        send_chunk({}, finish_reason="stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            send_chunk({}, chunk_usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 token_delay: float = 0.0, dim: int = 256, latency_dist: str = "fixed",
+                 latency_sigma: float = 0.5, error_rate: float = 0.0, retry_after: float = 1.0,
+                 seed: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the fake server on a background thread
+
+    Args:
+        latency: Median seconds before each response
+        latency_dist: "fixed", "uniform" (0.5x-1.5x) or "lognormal" (heavy tail)
+        latency_sigma: Spread of the lognormal distribution
+        error_rate: Share of requests answered with 429 and a Retry-After header
+        seed: Seed for latency samples and 429 decisions
+
+    Returns:
+        The server and its OpenAI-style base URL; server.behaviour.get_stats()
+        counts responses per endpoint and status
+    """
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.settings = {"token_delay": token_delay, "dim": dim}
+    server.behaviour = ServerBehaviour(latency, latency_dist, latency_sigma, error_rate, retry_after, seed)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Median seconds before each response")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Spread of the lognormal latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429s")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed tokens")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimension")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, base_url = start_server(
+        args.host, args.port, args.latency, args.token_delay, args.dim,
+        args.latency_dist, args.latency_sigma, args.error_rate, args.retry_after, args.seed,
+    )
+    print(f"🧪 Fake OpenAI server listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
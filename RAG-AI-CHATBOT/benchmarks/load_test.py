@@ -0,0 +1,192 @@
+"""
+Load Test
+Drives SimplePDFChatbot ingestion and chat at configurable concurrency
+against the local fake OpenAI server, and reports throughput, latency
+histograms and error rates.
+
+    python benchmarks/load_test.py --documents 8 --ingest-workers 4 --sessions 50 --turns 4 \\
+        --latency 0.3 --latency-dist lognormal --error-rate 0.02 --mode astream
+
+Everything runs offline; the fake server's 429s exercise the retry paths of
+the embedding batcher and the OpenAI client.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from benchmarks.common import percentile, print_histogram, setup_offline_chatbot_env, synthetic_transcript
+from benchmarks.fake_openai_server import LATENCY_DISTRIBUTIONS
+
+QUESTIONS = [
+    "What was net interest income this quarter?",
+    "How did the CET1 ratio move?",
+    "What did management say about credit card charge-offs?",
+    "How much was added to the allowance for credit losses?",
+    "What drove expenses higher?",
+    "What happened to deposits?",
+    "How did investment banking fees do?",
+    "How did the net interest margin change?",
+]
+
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2000, 5000, 10000]
+
+
+def _summarize(latencies: List[float], errors: int, total: int, wall: float) -> Dict[str, Any]:
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "wall_seconds": wall,
+        "throughput": (total - errors) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def run_ingestion(documents: int, workers: int, sections: int) -> Dict[str, Any]:
+    """Index one synthetic transcript per bank partition from a pool of chatbots"""
+    from utils.chat import SimplePDFChatbot
+
+    def ingest(i: int):
+        bot = SimplePDFChatbot()
+        text = synthetic_transcript(sections=sections, seed=i)
+        start = time.perf_counter()
+        ok = bot.process_text(text, bank_key=f"load_test_{i}")
+        return ok, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(ingest, range(documents)))
+    wall = time.perf_counter() - start
+
+    latencies = [latency for ok, latency in results if ok]
+    return {**_summarize(latencies, sum(not ok for ok, _ in results), documents, wall), "latencies": latencies}
+
+
+async def run_chat(bot, sessions: int, turns: int, mode: str) -> Dict[str, Any]:
+    """Concurrent conversations, each with its own history, on one event loop"""
+    latencies: List[float] = []
+    first_tokens: List[float] = []
+    errors = 0
+
+    async def session(session_id: int):
+        nonlocal errors
+        history = bot.new_memory()
+        for turn in range(turns):
+            question = QUESTIONS[(session_id + turn) % len(QUESTIONS)]
+            start = time.perf_counter()
+            if mode == "astream":
+                answer = ""
+                async for token in bot.astream(question, history=history):
+                    if not answer:
+                        first_tokens.append((time.perf_counter() - start) * 1000)
+                    answer += token
+            else:
+                answer = await bot.achat(question, history=history)
+            latencies.append((time.perf_counter() - start) * 1000)
+            # The chatbot reports failures as answers instead of raising
+            errors += answer.startswith("❌")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    wall = time.perf_counter() - start
+    return {
+        **_summarize(latencies, errors, sessions * turns, wall),
+        "latencies": latencies,
+        "ttft_p50_ms": percentile(first_tokens, 50),
+        "ttft_p95_ms": percentile(first_tokens, 95),
+    }
+
+
+def print_phase(name: str, unit: str, result: Dict[str, Any]):
+    print(
+        f"\n{name}: {result['requests']} {unit}, {result['errors']} errors ({result['error_rate']:.1%}), "
+        f"{result['throughput']:.2f} {unit}/s over {result['wall_seconds']:.1f}s"
+    )
+    print(f"   p50 {result['p50_ms']:.0f} ms · p95 {result['p95_ms']:.0f} ms · p99 {result['p99_ms']:.0f} ms")
+    if result.get("ttft_p50_ms"):
+        print(f"   first token p50 {result['ttft_p50_ms']:.0f} ms · p95 {result['ttft_p95_ms']:.0f} ms")
+    print_histogram(result["latencies"], LATENCY_BUCKETS_MS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--documents", type=int, default=4, help="Transcripts to ingest")
+    parser.add_argument("--sections", type=int, default=120, help="Speaker sections per transcript")
+    parser.add_argument("--ingest-workers", type=int, default=2)
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session")
+    parser.add_argument("--mode", choices=["achat", "astream"], default="achat")
+    parser.add_argument("--latency", type=float, default=0.2, help="Median fake API latency in seconds")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of API calls answered with 429")
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the summary as JSON")
+    args = parser.parse_args()
+
+    server = setup_offline_chatbot_env(
+        latency=args.latency, latency_dist=args.latency_dist, latency_sigma=args.latency_sigma,
+        token_delay=args.token_delay, error_rate=args.error_rate, retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    import chatbot_config
+    # Every turn should reach the LLM
+    chatbot_config.ANSWER_CACHE_ENABLED = False
+
+    print(
+        f"🧪 Fake API: {args.latency_dist} latency (median {args.latency * 1000:.0f} ms), "
+        f"{args.error_rate:.0%} simulated 429s"
+    )
+
+    ingestion = run_ingestion(args.documents, args.ingest_workers, args.sections)
+    print_phase(f"Ingestion ({args.ingest_workers} workers)", "documents", ingestion)
+
+    from utils.chat import SimplePDFChatbot
+
+    bot = SimplePDFChatbot()
+    bot.process_text(synthetic_transcript(sections=args.sections, seed=0), bank_key="load_test_0")
+    chat = asyncio.run(run_chat(bot, args.sessions, args.turns, args.mode))
+    print_phase(f"Chat ({args.sessions} sessions, {args.mode})", "turns", chat)
+
+    server_stats = server.behaviour.get_stats()
+    print("\nFake API responses:")
+    for endpoint, statuses in sorted(server_stats.items()):
+        total = sum(statuses.values())
+        print(f"   {endpoint:>10}: {total} requests, {statuses.get('429', 0) / total:.1%} answered with 429")
+
+    turn_stats = bot.get_turn_stats()
+    if turn_stats.get("retrieval_ms"):
+        print(
+            f"\nChatbot telemetry: retrieval p95 {turn_stats['retrieval_ms']['p95']:.0f} ms, "
+            f"LLM p95 {turn_stats.get('llm_ms', {}).get('p95', 0):.0f} ms"
+        )
+
+    if args.output:
+        report = {
+            "settings": vars(args),
+            "ingestion": {k: v for k, v in ingestion.items() if k != "latencies"},
+            "chat": {k: v for k, v in chat.items() if k != "latencies"},
+            "server": server_stats,
+            "telemetry": turn_stats,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Summary written to {args.output}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
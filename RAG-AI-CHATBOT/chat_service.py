@@ -0,0 +1,239 @@
+"""
+Chat Service
+Headless ASGI API over SimplePDFChatbot: document ingestion, chat,
+streaming chat and cross-bank comparison, with sessions kept in a pluggable store
+
+    uvicorn chat_service:app --host 0.0.0.0 --port 8000 --workers 4
+
+Replicas are stateless apart from their in-process indexes: with
+SESSION_STORE = "redis" any replica can serve any session, loading a bank's
+index from data/banks (shared storage) the first time it is asked about it.
+"""
+
+import asyncio
+import threading
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from loguru import logger
+
+import chatbot_config
+from utils.chat import SimplePDFChatbot
+from utils.conversation_memory import ConversationMemory
+from utils.data_manager import DataManager
+from utils.session_store import SessionStore, create_session_store
+
+
+class DocumentRequest(BaseModel):
+    bank_key: str
+    text: str
+    text_sections: Optional[List[Dict[str, Any]]] = None
+
+
+class SessionRequest(BaseModel):
+    bank_key: str
+
+
+class ChatRequest(BaseModel):
+    message: str
+
+
+class CompareRequest(BaseModel):
+    message: str
+    bank_keys: List[str]
+
+
+class ChatService:
+    """One chatbot per bank, shared by every session asking about that bank"""
+
+    def __init__(self, session_store: SessionStore):
+        self.session_store = session_store
+        self.data_manager = DataManager()
+        self._chatbots: Dict[str, SimplePDFChatbot] = {}
+        self._lock = threading.Lock()
+
+    def require_bank(self, bank_key: str):
+        """Reject bank keys missing from config/banks.yaml before they reach any file path"""
+        if bank_key not in self.data_manager.banks_config.get("banks", {}):
+            raise HTTPException(status_code=404, detail=f"Unknown bank: {bank_key}")
+
+    def index_document(self, bank_key: str, text: str,
+                       text_sections: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Index (or re-index) a bank's transcript and make it available to sessions"""
+        self.require_bank(bank_key)
+        bot = SimplePDFChatbot()
+        if not bot.process_text(text, bank_key, text_sections):
+            raise HTTPException(status_code=500, detail=f"Indexing failed for {bank_key}")
+        with self._lock:
+            self._chatbots[bank_key] = bot
+        return {
+            "bank_key": bank_key,
+            "update": bot.shared_index.get_update_stats(bank_key) or {},
+        }
+
+    def get_chatbot(self, bank_key: str) -> SimplePDFChatbot:
+        """Chatbot of a bank, loading its preprocessed transcript on first use"""
+        self.require_bank(bank_key)
+        with self._lock:
+            bot = self._chatbots.get(bank_key)
+        if bot is not None:
+            return bot
+
+        # Another replica may have ingested it; the persisted index makes this cheap
+        document_data = self.data_manager.load_analysis_results(bank_key, "document_data")
+        if not document_data or not document_data.get("text"):
+            raise HTTPException(status_code=404, detail=f"No document indexed for {bank_key}")
+        self.index_document(bank_key, document_data["text"], document_data.get("text_sections"))
+        with self._lock:
+            return self._chatbots[bank_key]
+
+    def loaded_banks(self) -> List[str]:
+        with self._lock:
+            return sorted(self._chatbots)
+
+    def any_chatbot(self) -> Optional[SimplePDFChatbot]:
+        with self._lock:
+            return next(iter(self._chatbots.values()), None)
+
+    def create_session(self, bank_key: str) -> str:
+        session_id = uuid.uuid4().hex
+        self.session_store.put(session_id, {"bank_key": bank_key, "memory": {}})
+        return session_id
+
+    def get_session(self, session_id: str) -> Dict[str, Any]:
+        state = self.session_store.get(session_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired session")
+        return state
+
+    def load_memory(self, bot: SimplePDFChatbot, state: Dict[str, Any]) -> ConversationMemory:
+        memory = bot.new_memory()
+        if state.get("memory"):
+            memory.load_dict(state["memory"])
+        return memory
+
+    def save_memory(self, session_id: str, bank_key: str, memory: ConversationMemory):
+        self.session_store.put(session_id, {"bank_key": bank_key, "memory": memory.to_dict()})
+
+    def save_memory_after_summary(self, session_id: str, bank_key: str, memory: ConversationMemory):
+        """Save again once the background summary is written, so other replicas see it"""
+        if memory.wait_for_summary(timeout=60):
+            self.save_memory(session_id, bank_key, memory)
+
+
+def create_app(session_store: Optional[SessionStore] = None) -> FastAPI:
+    """Build the ASGI app; the session store defaults to the one in chatbot_config"""
+    if session_store is None:
+        session_store = create_session_store(
+            chatbot_config.SESSION_STORE,
+            chatbot_config.SESSION_REDIS_URL,
+            chatbot_config.SESSION_TTL_SECONDS,
+            chatbot_config.SESSION_MAX_SESSIONS
+        )
+    service = ChatService(session_store)
+    app = FastAPI(title="Financial AI Analyzer chat service")
+    app.state.service = service
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "banks": service.loaded_banks()}
+
+    @app.post("/documents")
+    async def index_document(request: DocumentRequest):
+        # Chunking and embedding block, keep them off the event loop
+        return await asyncio.to_thread(
+            service.index_document, request.bank_key, request.text, request.text_sections
+        )
+
+    @app.post("/sessions")
+    async def create_session(request: SessionRequest):
+        await asyncio.to_thread(service.get_chatbot, request.bank_key)
+        return {"session_id": service.create_session(request.bank_key), "bank_key": request.bank_key}
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        state = service.get_session(session_id)
+        memory = ConversationMemory(max_turns=chatbot_config.MAX_STORED_EXCHANGES)
+        if state.get("memory"):
+            memory.load_dict(state["memory"])
+        return {"session_id": session_id, "bank_key": state["bank_key"], "history": memory.display_messages()}
+
+    @app.delete("/sessions/{session_id}")
+    async def delete_session(session_id: str):
+        service.session_store.delete(session_id)
+        return {"deleted": session_id}
+
+    @app.post("/sessions/{session_id}/chat")
+    async def chat(session_id: str, request: ChatRequest, background_tasks: BackgroundTasks):
+        state = service.get_session(session_id)
+        bank_key = state["bank_key"]
+        bot = await asyncio.to_thread(service.get_chatbot, bank_key)
+        memory = service.load_memory(bot, state)
+
+        answer = await bot.achat(request.message, history=memory)
+
+        service.save_memory(session_id, bank_key, memory)
+        background_tasks.add_task(service.save_memory_after_summary, session_id, bank_key, memory)
+        # The chatbot reports failures as answers instead of raising
+        return {"answer": answer, "error": answer.startswith("❌")}
+
+    @app.post("/sessions/{session_id}/stream")
+    async def chat_stream(session_id: str, request: ChatRequest):
+        state = service.get_session(session_id)
+        bank_key = state["bank_key"]
+        bot = await asyncio.to_thread(service.get_chatbot, bank_key)
+        memory = service.load_memory(bot, state)
+
+        async def tokens() -> AsyncIterator[str]:
+            stream = bot.astream(request.message, history=memory)
+            try:
+                async for token in stream:
+                    yield token
+            finally:
+                # Records the (possibly partial) answer if the client disconnected
+                await stream.aclose()
+                service.save_memory(session_id, bank_key, memory)
+                threading.Thread(
+                    target=service.save_memory_after_summary,
+                    args=(session_id, bank_key, memory),
+                    daemon=True
+                ).start()
+
+        return StreamingResponse(tokens(), media_type="text/plain; charset=utf-8")
+
+    @app.post("/sessions/{session_id}/compare")
+    async def compare_stream(session_id: str, request: CompareRequest):
+        state = service.get_session(session_id)
+        bank_key = state["bank_key"]
+        for compared_key in request.bank_keys:
+            service.require_bank(compared_key)
+        bot = await asyncio.to_thread(service.get_chatbot, bank_key)
+        memory = service.load_memory(bot, state)
+
+        def tokens() -> Iterator[str]:
+            stream = bot.compare_stream(request.message, request.bank_keys, history=memory)
+            try:
+                yield from stream
+            finally:
+                stream.close()
+                service.save_memory(session_id, bank_key, memory)
+
+        # A plain iterator is run in Starlette's thread pool, off the event loop
+        return StreamingResponse(tokens(), media_type="text/plain; charset=utf-8")
+
+    @app.get("/stats")
+    async def stats():
+        # Telemetry and the answer cache are process-wide, any chatbot reports them
+        bot = service.any_chatbot()
+        if bot is None:
+            return {"turns": {}, "answer_cache": {}}
+        return {"turns": bot.get_turn_stats(), "answer_cache": bot.get_answer_cache_stats()}
+
+    logger.info(f"Chat service ready ({chatbot_config.SESSION_STORE} session store)")
+    return app
+
+
+app = create_app()
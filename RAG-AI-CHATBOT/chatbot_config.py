@@ -15,6 +15,9 @@ load_dotenv()
 # Your OpenAI API Key (required)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 
+# Optional OpenAI-compatible endpoint (e.g. a local stand-in server for benchmarks)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
 # OpenAI Model to use
 OPENAI_MODEL = "gpt-4o-mini"  # Options: gpt-3.5-turbo, gpt-4, gpt-4-turbo
 TEMPERATURE = 0.0  # 0.0 = focused, 1.0 = creative
@@ -39,6 +42,144 @@ CHUNK_SIZE = 1000        # Size of text chunks for processing
 CHUNK_OVERLAP = 200      # Overlap between chunks
 SIMILARITY_SEARCH_K = 5  # Number of similar documents to retrieve
 
+# Chunking strategy: "speaker" builds chunks from the preprocessed speaker
+# sections (no chunk spans two speakers), "recursive" splits the raw text by page.
+# Transcripts without speaker sections are always split recursively.
+CHUNKING_STRATEGY = "speaker"  # Options: "speaker" or "recursive"
+
+# Near-duplicate filter: chunks whose estimated word-shingle Jaccard similarity
+# with an earlier chunk reaches NEAR_DUPLICATE_THRESHOLD (safe-harbor disclaimers,
+# operator prompts, page headers) are dropped before embedding. MinHash signatures
+# of NEAR_DUPLICATE_NUM_PERM hashes; changing the threshold re-indexes
+NEAR_DUPLICATE_FILTER_ENABLED = True
+NEAR_DUPLICATE_THRESHOLD = 0.85
+NEAR_DUPLICATE_NUM_PERM = 64
+
+# Only search chunks spoken by these roles, e.g. ["management"] (empty = everyone)
+RETRIEVAL_ROLES = []  # Options: "management", "analyst", "operator"
+
+# Context packing: retrieve CONTEXT_FETCH_K candidates, drop those below
+# RELEVANCE_FLOOR (cosine similarity to the question), merge overlapping
+# neighbours and keep the most relevant ones within CONTEXT_TOKEN_BUDGET prompt tokens
+CONTEXT_PACKING_ENABLED = True
+CONTEXT_FETCH_K = 10
+CONTEXT_TOKEN_BUDGET = 1200
+# Tuned for ada, whose similarities rarely fall below 0.6
+RELEVANCE_FLOOR = 0.55
+# Same floor for the local MiniLM backend, whose similarities spread much wider
+LOCAL_RELEVANCE_FLOOR = 0.25
+
+# Metric router: figures of config.yaml's financial_metrics are extracted from
+# tables and sentences at preprocessing; short questions asking for exactly one
+# of them ("What was the CET1 ratio?") are answered from those figures without
+# retrieval or an LLM call. Anything else goes through RAG
+METRIC_ROUTER_ENABLED = True
+
+# Summary tree: at ingestion, summarize consecutive groups of about
+# SUMMARY_SECTION_TOKENS tokens and the whole call from those summaries.
+# Broad questions ("summarize", "key takeaways", ...) are answered from the
+# call summary and the SUMMARY_TOP_SECTIONS closest section summaries
+SUMMARY_TREE_ENABLED = True
+SUMMARY_SECTION_TOKENS = 3000
+SUMMARY_NODE_MAX_TOKENS = 250
+SUMMARY_TOP_SECTIONS = 3
+
+# Embedding backend: "openai" (API) or "local" (sentence-transformers on CPU)
+EMBEDDING_BACKEND = "openai"  # Options: "openai" or "local"
+
+# OpenAI embedding model (changing it invalidates persisted indexes)
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+# =============================================================================
+# LOCAL EMBEDDING CONFIGURATION (EMBEDDING_BACKEND = "local")
+# =============================================================================
+# Same model BERTopic uses in config/config.yaml
+LOCAL_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Chunks encoded per forward pass (batches are sorted by length)
+LOCAL_EMBEDDING_BATCH_SIZE = 64
+
+# CPU threads used for inference, 0 = library default
+LOCAL_EMBEDDING_THREADS = 0
+
+# Run with ONNX Runtime instead of PyTorch (needs sentence-transformers[onnx])
+LOCAL_EMBEDDING_ONNX = False
+
+# Use int8 weights (quantized ONNX file, or dynamic quantization in PyTorch)
+LOCAL_EMBEDDING_QUANTIZE = False
+
+
+# =============================================================================
+# INGESTION EMBEDDING CONFIGURATION
+# =============================================================================
+# Chunks sent to the embeddings API per request
+EMBEDDING_BATCH_SIZE = 64
+
+# Number of embedding requests in flight at the same time
+EMBEDDING_MAX_CONCURRENCY = 4
+
+# API budget shared by all concurrent requests (per minute)
+EMBEDDING_RPM_LIMIT = 3000
+EMBEDDING_TPM_LIMIT = 1000000
+
+# Retries on HTTP 429 before giving up, with adaptive backoff
+EMBEDDING_MAX_RETRIES = 6
+
+
+# =============================================================================
+# EMBEDDING CACHE CONFIGURATION
+# =============================================================================
+# Cache chunk embeddings locally so identical chunks are never embedded twice
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_PATH = "data/cache/embeddings.sqlite"
+
+# Least recently used vectors are evicted above this many entries
+EMBEDDING_CACHE_MAX_ENTRIES = 200000
+
+
+# =============================================================================
+# INDEX PERSISTENCE CONFIGURATION
+# =============================================================================
+# Keep vector indexes on disk so an already indexed transcript is not re-embedded
+PERSIST_INDEX = True
+
+# Indexes are stored under <INDEX_BASE_PATH>/<bank>/index/
+INDEX_BASE_PATH = "data/banks"
+
+# Load every bank's persisted index into the shared index when the process starts
+SHARED_INDEX_PRELOAD = True
+
+# Open persisted FAISS indexes memory-mapped and read-only: worker processes
+# share the OS page cache and an index nobody queries costs no RAM
+INDEX_MMAP = True
+
+# Estimated RAM the open bank indexes of one process may pin (0 = unlimited).
+# Least recently queried banks are closed beyond it and reopened on demand
+INDEX_MEMORY_BUDGET_MB = 0
+
+
+# =============================================================================
+# COMPRESSED INDEX CONFIGURATION (FAISS only)
+# =============================================================================
+# "flat" keeps float32 vectors, "sq8" quantizes them to int8 (4x smaller) and
+# "ivfpq" clusters them into lists of product-quantized codes (sub-linear search)
+FAISS_INDEX_TYPE = "flat"  # Options: "flat", "sq8" or "ivfpq"
+
+# Project vectors to this many dimensions before quantization (0 = no PCA)
+FAISS_PCA_DIM = 0
+
+# IVF lists (capped by corpus size) and lists visited per query
+FAISS_IVF_NLIST = 1024
+FAISS_IVF_NPROBE = 16
+
+# Product quantization: sub-quantizers (must divide the vector dimension) and bits each
+FAISS_PQ_M = 16
+FAISS_PQ_BITS = 8
+
+# Candidates per result re-scored against the exact vectors (0 = no re-scoring)
+FAISS_RESCORE_FACTOR = 4
+
 
 # =============================================================================
 # CHAT HISTORY CONFIGURATION
@@ -47,10 +188,112 @@ SIMILARITY_SEARCH_K = 5  # Number of similar documents to retrieve
 # Set to 0 to disable chat history, higher numbers use more tokens
 MAX_CHAT_HISTORY = 5  # Remember last 5 exchanges (10 messages total)
 
+# Exchanges older than MAX_CHAT_HISTORY are folded into a rolling summary in
+# the background, so the prompt stays the same size in long sessions
+HISTORY_SUMMARY_ENABLED = True
+HISTORY_SUMMARY_MAX_TOKENS = 200
+
+# Hard cap on exchanges kept per conversation (for display; older ones are dropped)
+MAX_STORED_EXCHANGES = 50
+
 # Maximum tokens for responses
 MAX_TOKENS = 1000
 
 
+# =============================================================================
+# ANSWER CACHE CONFIGURATION
+# =============================================================================
+# Reuse answers to near-identical, history-independent questions per document
+ANSWER_CACHE_ENABLED = True
+
+# Minimum cosine similarity between question embeddings to count as a repeat
+ANSWER_CACHE_THRESHOLD = 0.95
+
+# Cached answers expire after this many seconds
+ANSWER_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Least recently used answers are dropped above this many entries
+ANSWER_CACHE_MAX_ENTRIES = 1000
+
+
+# =============================================================================
+# TELEMETRY CONFIGURATION
+# =============================================================================
+# Record retrieval / LLM timings and token counts of every chat turn
+TELEMETRY_ENABLED = True
+
+# Recent turns used for the rolling p50 / p95 figures
+TELEMETRY_WINDOW = 200
+
+# JSON-lines file receiving one record per turn ("" = regular log only)
+TELEMETRY_LOG_PATH = "logs/chat_turns.jsonl"
+
+
+# =============================================================================
+# LATENCY ROUTING CONFIGURATION
+# =============================================================================
+# Pick retrieval depth, model tier and output token cap per question so turns
+# stay within LATENCY_SLO_MS; MAX_TOKENS remains the upper bound of the cap.
+# Off by default: the cap is shrunk to what fits the SLO, so at 8000 ms
+# explanatory answers are cut at about 185 (strong) to 460 (fast) tokens
+LATENCY_ROUTING_ENABLED = False
+LATENCY_SLO_MS = 8000
+
+# OPENAI_MODEL is the fast tier. Explanatory and comparative questions, and
+# questions whose retrieved chunks score alike (top-to-last score spread below
+# ROUTING_SPREAD_THRESHOLD), use STRONG_MODEL when it can still write 100
+# tokens (the smallest cap) within what is left of the SLO
+STRONG_MODEL = "gpt-4o"
+ROUTING_SPREAD_THRESHOLD = 0.07
+
+# Lookups retrieve ROUTING_MIN_K chunks; explanatory, comparative and long questions ROUTING_MAX_K
+ROUTING_MIN_K = 3
+ROUTING_MAX_K = 10
+
+# Starting latency estimates per tier, refined from observed turns
+FAST_MODEL_TTFT_MS = 600
+FAST_MODEL_MS_PER_TOKEN = 15
+STRONG_MODEL_TTFT_MS = 1000
+STRONG_MODEL_MS_PER_TOKEN = 35
+
+# The LLM gets at least this long even when retrieval used up the SLO. Past
+# its deadline the turn is answered with the most relevant passages of the top chunks
+LLM_MIN_DEADLINE_MS = 1500
+
+# JSON-lines file receiving every routing decision with its outcome ("" = regular log only)
+ROUTE_LOG_PATH = "logs/route_decisions.jsonl"
+
+
+# =============================================================================
+# BATCH QUESTION PACK CONFIGURATION
+# =============================================================================
+# Questions answered at the same time by batch_qa.py
+BATCH_MAX_CONCURRENCY = 8
+
+# Chat completion budget shared by the whole batch run
+BATCH_RPM_LIMIT = 500
+BATCH_TPM_LIMIT = 200000
+
+
+# =============================================================================
+# CHAT SERVICE CONFIGURATION
+# =============================================================================
+# URL of a running chat_service.py; the Streamlit app then talks to it over
+# HTTP instead of running the chatbot in its own process. Empty = in-process
+CHAT_SERVICE_URL = os.getenv("CHAT_SERVICE_URL", "")
+
+# Where the service keeps sessions: "memory" (single instance or sticky
+# sessions) or "redis" (shared by every replica behind a load balancer)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+
+# Idle sessions are dropped after this many seconds
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+# Sessions kept by the in-memory store
+SESSION_MAX_SESSIONS = 10000
+
+
 # =============================================================================
 # VALIDATION
 # =============================================================================
@@ -61,12 +304,79 @@ def validate_config():
     if not os.getenv("OPENAI_API_KEY", ""):
         errors.append("❌ OPENAI_API_KEY is required")
 
+    if EMBEDDING_BACKEND not in ["openai", "local"]:
+        errors.append("❌ EMBEDDING_BACKEND must be 'openai' or 'local'")
+
     if VECTOR_DB not in ["faiss", "chroma"]:
         errors.append("❌ VECTOR_DB must be 'faiss' or 'chroma'")
 
+    if FAISS_INDEX_TYPE not in ["flat", "sq8", "ivfpq"]:
+        errors.append("❌ FAISS_INDEX_TYPE must be 'flat', 'sq8' or 'ivfpq'")
+
+    if FAISS_PCA_DIM and FAISS_PCA_DIM % FAISS_PQ_M:
+        errors.append("❌ FAISS_PCA_DIM must be a multiple of FAISS_PQ_M")
+
+    if INDEX_MEMORY_BUDGET_MB < 0:
+        errors.append("❌ INDEX_MEMORY_BUDGET_MB must be >= 0")
+
+    if FAISS_IVF_NPROBE < 1 or FAISS_RESCORE_FACTOR < 0:
+        errors.append("❌ FAISS_IVF_NPROBE must be >= 1 and FAISS_RESCORE_FACTOR >= 0")
+
+    if CHUNKING_STRATEGY not in ["speaker", "recursive"]:
+        errors.append("❌ CHUNKING_STRATEGY must be 'speaker' or 'recursive'")
+
+    if not 0.0 < NEAR_DUPLICATE_THRESHOLD <= 1.0 or NEAR_DUPLICATE_NUM_PERM < 8:
+        errors.append("❌ NEAR_DUPLICATE_THRESHOLD must be in (0, 1] and NEAR_DUPLICATE_NUM_PERM >= 8")
+
+    if any(role not in ["management", "analyst", "operator"] for role in RETRIEVAL_ROLES):
+        errors.append("❌ RETRIEVAL_ROLES may only contain 'management', 'analyst' or 'operator'")
+
     if MAX_CHAT_HISTORY < 0:
         errors.append("❌ MAX_CHAT_HISTORY must be >= 0")
 
+    if MAX_STORED_EXCHANGES < MAX_CHAT_HISTORY:
+        errors.append("❌ MAX_STORED_EXCHANGES must be >= MAX_CHAT_HISTORY")
+
+    if EMBEDDING_BATCH_SIZE < 1 or EMBEDDING_MAX_CONCURRENCY < 1:
+        errors.append("❌ EMBEDDING_BATCH_SIZE and EMBEDDING_MAX_CONCURRENCY must be >= 1")
+
+    if EMBEDDING_RPM_LIMIT < 1 or EMBEDDING_TPM_LIMIT < 1:
+        errors.append("❌ EMBEDDING_RPM_LIMIT and EMBEDDING_TPM_LIMIT must be >= 1")
+
+    if EMBEDDING_CACHE_MAX_ENTRIES < 1:
+        errors.append("❌ EMBEDDING_CACHE_MAX_ENTRIES must be >= 1")
+
+    if not 0.0 < ANSWER_CACHE_THRESHOLD <= 1.0:
+        errors.append("❌ ANSWER_CACHE_THRESHOLD must be in (0, 1]")
+
+    if BATCH_MAX_CONCURRENCY < 1 or BATCH_RPM_LIMIT < 1 or BATCH_TPM_LIMIT < 1:
+        errors.append("❌ BATCH_MAX_CONCURRENCY, BATCH_RPM_LIMIT and BATCH_TPM_LIMIT must be >= 1")
+
+    if SESSION_STORE not in ["memory", "redis"]:
+        errors.append("❌ SESSION_STORE must be 'memory' or 'redis'")
+
+    if ROUTING_MIN_K < 1 or ROUTING_MAX_K < ROUTING_MIN_K:
+        errors.append("❌ ROUTING_MIN_K must be >= 1 and ROUTING_MAX_K >= ROUTING_MIN_K")
+
+    if LATENCY_SLO_MS <= 0 or LLM_MIN_DEADLINE_MS <= 0:
+        errors.append("❌ LATENCY_SLO_MS and LLM_MIN_DEADLINE_MS must be > 0")
+
+    # The strong tier needs room for at least the smallest output cap (100 tokens)
+    if LATENCY_ROUTING_ENABLED and STRONG_MODEL_TTFT_MS + 100 * STRONG_MODEL_MS_PER_TOKEN > LATENCY_SLO_MS:
+        errors.append("❌ LATENCY_SLO_MS is too tight for STRONG_MODEL to ever be chosen")
+
+    if TELEMETRY_WINDOW < 1:
+        errors.append("❌ TELEMETRY_WINDOW must be >= 1")
+
+    if CONTEXT_TOKEN_BUDGET < 100:
+        errors.append("❌ CONTEXT_TOKEN_BUDGET too small (minimum 100)")
+
+    if not 0 <= RELEVANCE_FLOOR < 1 or not 0 <= LOCAL_RELEVANCE_FLOOR < 1:
+        errors.append("❌ RELEVANCE_FLOOR and LOCAL_RELEVANCE_FLOOR must be between 0 and 1")
+
+    if SUMMARY_SECTION_TOKENS < 500 or SUMMARY_TOP_SECTIONS < 1:
+        errors.append("❌ SUMMARY_SECTION_TOKENS must be >= 500 and SUMMARY_TOP_SECTIONS >= 1")
+
     if CHUNK_SIZE < 100:
         errors.append("❌ CHUNK_SIZE too small (minimum 100)")
 
@@ -15,7 +15,7 @@ sys.path.append(str(project_root))
 
 # Import utilities
 from utils.data_manager import DataManager
-from agents.chatbot_agent import initialize_chatbot
+from agents.chatbot_agent import get_session_memory, initialize_chatbot
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -211,7 +211,7 @@ def _perform_bank_selection(new_bank_key: str, data_manager: DataManager):
     try:
         # Clear current session data
         session_keys_to_clear = [
-            'document_data', 'topic_results', 'sentiment_results', 'summary_results', 'chat_history', 'raw_text', 'pdf_processed', 'filepath'
+            'document_data', 'topic_results', 'sentiment_results', 'summary_results', 'chat_history', 'raw_text', 'pdf_processed', 'filepath', 'index_job'
         ]
 
         for key in session_keys_to_clear:
@@ -230,17 +230,14 @@ def _perform_bank_selection(new_bank_key: str, data_manager: DataManager):
             logger.info("history chat ")
             # st.session_state.chatbot, error = initialize_chatbot()
             if "chatbot" in st.session_state and st.session_state.chatbot is not None:
-                st.session_state.chatbot.clear_chat_history()
+                # Only this session's history; the engine is shared with other sessions
+                st.session_state.chatbot.clear_chat_history(get_session_memory())
             
             # if error:
             #     st.error(f"Chatbot failed to initialize: {error}")
             # elif st.session_state.chatbot is None:
             #     st.error("Chatbot object is None for unknown reason")
             # st.session_state.chatbot.process_pdf(st.session_state.filepath)
-        if "messages" in st.session_state:
-            logger.info("messages")
-            st.session_state.messages = []
-
         # Set new bank
         st.session_state.current_bank = new_bank_key
 
@@ -0,0 +1,51 @@
+"""
+Shared test setup: project root on sys.path and the benchmark transcripts as fixtures
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+TRANSCRIPTS = PROJECT_ROOT / "benchmarks" / "data" / "transcripts"
+
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic unit vectors derived from the text, counting how many texts were embedded"""
+
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+        self.embedded = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).normal(size=self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+@pytest.fixture
+def transcript():
+    """Load a benchmark transcript by name, e.g. transcript("harbor_point_2q25")"""
+    def load(name: str) -> str:
+        return (TRANSCRIPTS / f"{name}.txt").read_text(encoding="utf-8")
+    return load
+
+
+@pytest.fixture
+def embeddings():
+    return HashEmbeddings()
@@ -0,0 +1,54 @@
+"""
+Semantic answer cache: follow-up detection and question signatures
+"""
+
+import pytest
+
+from utils.answer_cache import SemanticAnswerCache, is_history_independent, question_signature
+
+
+@pytest.mark.parametrize("message", [
+    "Why?",
+    "Elaborate",
+    "Summarize that",
+    "What does this mean?",
+    "Can you tell me more?",
+    "And what about these numbers?",
+    "What was it?",
+    "How about margins?",
+])
+def test_follow_ups_bypass_the_cache_once_there_is_history(message):
+    assert not is_history_independent(message, has_history=True)
+    assert is_history_independent(message, has_history=False)
+
+
+def test_standalone_questions_use_the_cache_with_history():
+    assert is_history_independent("What was the CET1 ratio at quarter end?", has_history=True)
+
+
+def test_signature_keeps_numbers_periods_and_entities():
+    assert question_signature("What was Q2 NIM?") != question_signature("What was Q3 NIM?")
+    assert question_signature("What did Harbor Point report for 2025?") == ("2025", "harbor", "point")
+    assert question_signature("What was net income?") == ()
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(threshold=0.95)
+
+
+def test_near_identical_questions_share_an_answer(cache):
+    cache.store("doc", [1.0, 0.0], "What was Q2 NIM?", "2.6%", tokens=100)
+    assert cache.lookup("doc", [0.99, 0.01], "What was the Q2 NIM?") == "2.6%"
+    assert cache.saved_tokens == 100
+
+
+def test_questions_about_other_periods_miss(cache):
+    cache.store("doc", [1.0, 0.0], "What was Q2 NIM?", "2.6%", tokens=100)
+    assert cache.lookup("doc", [1.0, 0.0], "What was Q3 NIM?") is None
+
+
+def test_answers_do_not_cross_documents(cache):
+    cache.store("bank_a:gpt", [1.0, 0.0], "What was net income?", "3.4 billion", tokens=100)
+    assert cache.lookup("bank_b:gpt", [1.0, 0.0], "What was net income?") is None
+    assert cache.lookup('bank_a:gpt|{"role": ["management"]}', [1.0, 0.0], "What was net income?") is None
@@ -0,0 +1,90 @@
+"""
+Per-bank chatbots over process-wide resources, against the offline fake OpenAI server
+"""
+
+import time
+
+import pytest
+
+import chatbot_config
+import utils.chat
+import utils.shared_index
+from benchmarks.common import synthetic_transcript
+from benchmarks.fake_openai_server import start_server
+
+
+@pytest.fixture
+def bank_chatbots(tmp_path, monkeypatch):
+    server, base_url = start_server()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-fake-test")
+    for name, value in {
+        "OPENAI_API_KEY": "sk-fake-test",
+        "OPENAI_BASE_URL": base_url,
+        "PERSIST_INDEX": False,
+        "EMBEDDING_CACHE_ENABLED": False,
+        "DEFAULT_PDF_PATH": "",
+    }.items():
+        monkeypatch.setattr(chatbot_config, name, value)
+    # Fresh process-wide singletons, restored afterwards
+    monkeypatch.setattr(utils.chat, "_chat_resources", None)
+    monkeypatch.setattr(utils.shared_index, "_shared_index", None)
+    yield utils.chat.BankChatbots()
+    server.shutdown()
+
+
+def test_each_bank_gets_its_own_chatbot_over_shared_resources(bank_chatbots):
+    assert bank_chatbots.get("bank_a") is None
+    assert bank_chatbots.process_text(synthetic_transcript(20, seed=1), "bank_a")
+    first = bank_chatbots.get("bank_a")
+
+    assert bank_chatbots.process_text(synthetic_transcript(20, seed=2), "bank_b")
+    second = bank_chatbots.get("bank_b")
+
+    # Indexing another bank leaves the first bank's chatbot untouched
+    assert bank_chatbots.get("bank_a") is first
+    assert (first.bank_key, second.bank_key) == ("bank_a", "bank_b")
+    assert first.retriever is not second.retriever and first.rag_chain is not second.rag_chain
+    assert first.llm is second.llm and first.shared_index is second.shared_index
+
+
+def test_reindexing_publishes_a_new_chatbot(bank_chatbots):
+    bank_chatbots.process_text(synthetic_transcript(20, seed=1), "bank_a")
+    before = bank_chatbots.get("bank_a")
+    bank_chatbots.process_text(synthetic_transcript(20, seed=3), "bank_a")
+    after = bank_chatbots.get("bank_a")
+
+    assert after is not before
+    # Sessions still holding the old chatbot keep a consistent one
+    assert before.bank_key == "bank_a" and before.rag_chain is not None
+
+
+def test_answers_come_from_the_banks_chatbot(bank_chatbots):
+    bank_chatbots.process_text(synthetic_transcript(20, seed=1), "bank_a")
+    memory = bank_chatbots.new_memory()
+    answer = "".join(bank_chatbots.get("bank_a").chat_stream("What did the CFO say about credit costs?",
+                                                             history=memory))
+    assert answer and not answer.startswith("❌")
+    assert len(bank_chatbots.get_chat_history(memory)) == 2
+
+
+def test_warmup_indexes_first_and_publishes_once_ready(bank_chatbots):
+    from utils.index_warmup import IndexWarmup
+
+    stages = []
+    text = synthetic_transcript(20, seed=4)
+    original_bind = bank_chatbots.bind
+
+    def bind(*args, **kwargs):
+        # The shared index is warm before any chatbot is built
+        stages.append(bank_chatbots.resources.shared_index.get_index_key("bank_a") is not None)
+        return original_bind(*args, **kwargs)
+
+    bank_chatbots.bind = bind
+    job = IndexWarmup().start(bank_chatbots, text, "bank_a")
+    deadline = time.time() + 60
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.status == "ready"
+    assert stages == [True]
+    assert bank_chatbots.get("bank_a").bank_key == "bank_a"
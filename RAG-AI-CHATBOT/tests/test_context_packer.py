@@ -0,0 +1,50 @@
+"""
+Context packing: relevance floor, neighbour merging and the token budget
+"""
+
+from langchain.schema import Document
+
+from utils.context_packer import ContextPacker
+
+
+def chunk(text: str, start: int, score: float, page: int = 1) -> Document:
+    return Document(page_content=text, metadata={"page": page, "start_index": start, "score": score})
+
+
+def test_overlapping_neighbours_are_merged_once():
+    packer = ContextPacker(token_budget=1000, relevance_floor=0.0)
+    packed = packer.pack([
+        chunk("Net income was 3.4 billion dollars", 0, 0.9),
+        chunk("3.4 billion dollars, up 8 percent", 15, 0.8),
+    ])
+    assert [doc.page_content for doc in packed] == ["Net income was 3.4 billion dollars, up 8 percent"]
+    assert packed[0].metadata["score"] == 0.9
+
+
+def test_stale_offsets_do_not_splice_unrelated_text():
+    packer = ContextPacker(token_budget=1000, relevance_floor=0.0)
+    packed = packer.pack([
+        chunk("Net income was 3.4 billion dollars", 0, 0.9),
+        # Claims to overlap the first chunk, but its text does not
+        chunk("Credit costs were 1.05 billion dollars", 20, 0.8),
+    ])
+    assert sorted(doc.page_content for doc in packed) == [
+        "Credit costs were 1.05 billion dollars",
+        "Net income was 3.4 billion dollars",
+    ]
+
+
+def test_weak_chunks_are_dropped_but_the_best_is_kept():
+    packer = ContextPacker(token_budget=1000, relevance_floor=0.5)
+    packed = packer.pack([chunk("weak one", 0, 0.2), chunk("weaker one", 100, 0.1)])
+    assert [doc.page_content for doc in packed] == ["weak one"]
+
+
+def test_budget_keeps_the_most_relevant_chunks_in_transcript_order():
+    packer = ContextPacker(token_budget=16, relevance_floor=0.0)
+    packed = packer.pack([
+        chunk("alpha " * 5, 0, 0.5),
+        chunk("beta " * 5, 100, 0.9),
+        chunk("gamma " * 5, 200, 0.8),
+    ])
+    assert [doc.page_content.split()[0] for doc in packed] == ["beta", "gamma"]
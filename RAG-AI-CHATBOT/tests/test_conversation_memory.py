@@ -0,0 +1,82 @@
+"""
+Conversation memory: bounded history and background folding into a summary
+"""
+
+import threading
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from utils.conversation_memory import ConversationMemory
+
+
+def joining_summarizer(calls):
+    def summarize(previous, exchanges):
+        calls.append(list(exchanges))
+        return " | ".join(filter(None, [previous] + [user for user, _ in exchanges]))
+    return summarize
+
+
+def test_exchanges_leaving_the_window_are_folded_in_order():
+    calls = []
+    memory = ConversationMemory(prompt_turns=2, max_turns=10, summarizer=joining_summarizer(calls))
+    for number in range(5):
+        memory.add(f"q{number}", f"a{number}")
+        assert memory.wait_for_summary(timeout=5)
+
+    assert memory.summary == "q0 | q1 | q2"
+    messages = memory.prompt_messages()
+    assert isinstance(messages[0], SystemMessage) and "q0 | q1 | q2" in messages[0].content
+    assert [message.content for message in messages[1:]] == ["q3", "a3", "q4", "a4"]
+    assert isinstance(messages[1], HumanMessage) and isinstance(messages[2], AIMessage)
+    # Every exchange is folded exactly once
+    assert [user for call in calls for user, _ in call] == ["q0", "q1", "q2"]
+
+
+def test_display_history_is_capped():
+    memory = ConversationMemory(prompt_turns=2, max_turns=3)
+    for number in range(6):
+        memory.add(f"q{number}", f"a{number}")
+    assert len(memory) == 3
+    assert [message["content"] for message in memory.display_messages()][::2] == ["q3", "q4", "q5"]
+    # Without a summarizer nothing is folded
+    assert memory.summary == ""
+
+
+def test_a_failed_summary_keeps_the_previous_one():
+    def failing(previous, exchanges):
+        raise RuntimeError("model unavailable")
+
+    memory = ConversationMemory(prompt_turns=1, summarizer=failing)
+    memory.summary = "earlier"
+    memory.add("q0", "a0")
+    memory.add("q1", "a1")
+    assert memory.wait_for_summary(timeout=5)
+    assert memory.summary == "earlier"
+
+
+def test_a_summary_finishing_after_clear_is_discarded():
+    started, release = threading.Event(), threading.Event()
+
+    def slow(previous, exchanges):
+        started.set()
+        release.wait(5)
+        return "stale summary"
+
+    memory = ConversationMemory(prompt_turns=1, summarizer=slow)
+    memory.add("q0", "a0")
+    memory.add("q1", "a1")
+    assert started.wait(5)
+    memory.clear()
+    release.set()
+    assert memory.wait_for_summary(timeout=5)
+    assert memory.summary == "" and len(memory) == 0
+
+
+def test_state_round_trips_and_resumes_pending_folds():
+    calls = []
+    state = {"turns": [["q1", "a1"], ["q2", "a2"]], "to_fold": [["q0", "a0"]], "summary": ""}
+    memory = ConversationMemory(prompt_turns=2, summarizer=joining_summarizer(calls))
+    memory.load_dict(state)
+    assert memory.wait_for_summary(timeout=5)
+    assert memory.summary == "q0"
+    assert memory.to_dict() == {"turns": [["q1", "a1"], ["q2", "a2"]], "to_fold": [], "summary": "q0"}
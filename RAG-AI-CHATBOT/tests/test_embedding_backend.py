@@ -0,0 +1,32 @@
+"""
+Embedding names and relevance floors follow the backend actually in use
+"""
+
+import chatbot_config
+from utils.chat import get_embedding_model_name, get_relevance_floor
+from utils.local_embeddings import LocalEmbeddings
+
+
+def loaded(backend: str, quantized: bool) -> LocalEmbeddings:
+    # Stands in for a loaded model without downloading one
+    embeddings = LocalEmbeddings.__new__(LocalEmbeddings)
+    embeddings.backend, embeddings.quantized = backend, quantized
+    return embeddings
+
+
+def test_name_follows_the_loaded_runtime(monkeypatch):
+    monkeypatch.setattr(chatbot_config, "LOCAL_EMBEDDING_ONNX", True)
+    monkeypatch.setattr(chatbot_config, "LOCAL_EMBEDDING_QUANTIZE", True)
+    model = chatbot_config.LOCAL_EMBEDDING_MODEL
+
+    assert get_embedding_model_name("local", loaded("onnx", True)) == f"{model}+onnx+int8"
+    # ONNX Runtime missing: PyTorch with dynamic quantization was loaded instead
+    assert get_embedding_model_name("local", loaded("torch", True)) == f"{model}+int8"
+    # Without a loaded model the configuration is all there is
+    assert get_embedding_model_name("local") == f"{model}+onnx+int8"
+
+
+def test_relevance_floor_depends_on_the_backend():
+    assert get_relevance_floor("openai") == chatbot_config.RELEVANCE_FLOOR
+    assert get_relevance_floor("local") == chatbot_config.LOCAL_RELEVANCE_FLOOR
+    assert get_relevance_floor("local") < get_relevance_floor("openai")
@@ -0,0 +1,52 @@
+"""
+Embedding cache: reuse, counters and size-bounded eviction
+"""
+
+import pytest
+
+from utils.embedding_cache import CachedEmbeddings
+
+
+def test_repeated_chunks_and_queries_are_embedded_once(tmp_path, embeddings):
+    cache = CachedEmbeddings(embeddings, "hash", str(tmp_path / "cache.sqlite"))
+    first = cache.embed_documents(["alpha", "beta", "alpha"])
+    assert embeddings.embedded == 2
+    again = cache.embed_documents(["beta", "alpha"])
+    # Stored as float32
+    assert again[0] == pytest.approx(first[1], abs=1e-6) and again[1] == pytest.approx(first[0], abs=1e-6)
+    assert embeddings.embedded == 2
+
+    cache.embed_query("What was net income?")
+    cache.embed_query("What was net income?")
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"]) == (3, 2)
+    assert (stats["query_hits"], stats["query_misses"]) == (1, 1)
+    assert stats["entries"] == 3
+
+
+def test_eviction_keeps_recently_used_vectors(tmp_path, embeddings):
+    cache = CachedEmbeddings(embeddings, "hash", str(tmp_path / "cache.sqlite"), max_entries=20)
+    cache.embed_documents([f"chunk {number}" for number in range(20)])
+    # Touched after the others, so it outlives them
+    cache.embed_documents(["chunk 0"])
+
+    cache.embed_documents(["one more"])
+    stats = cache.get_stats()
+    assert stats["entries"] < 20
+    assert stats["entries"] == cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    embedded = embeddings.embedded
+    cache.embed_documents(["chunk 0", "one more"])
+    assert embeddings.embedded == embedded
+
+
+def test_the_row_count_survives_reopening(tmp_path, embeddings):
+    path = str(tmp_path / "cache.sqlite")
+    CachedEmbeddings(embeddings, "hash", path).embed_documents(["alpha", "beta"])
+    assert CachedEmbeddings(embeddings, "hash", path).get_stats()["entries"] == 2
+
+
+def test_replay_only_cache_refuses_unseen_texts(tmp_path):
+    cache = CachedEmbeddings(None, "hash", str(tmp_path / "cache.sqlite"))
+    with pytest.raises(LookupError):
+        cache.embed_query("never recorded")
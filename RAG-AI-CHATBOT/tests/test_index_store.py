@@ -0,0 +1,72 @@
+"""
+Content-addressed chunk ids and incremental index updates
+"""
+
+from langchain.schema import Document
+
+from utils.index_store import IndexStore, chunk_id
+
+
+def chunks_of(paragraphs, bank_key="bank_a"):
+    chunks, offset = [], 0
+    for number, text in enumerate(paragraphs):
+        chunks.append(Document(page_content=text, metadata={
+            "bank_key": bank_key, "speaker": "CFO", "page": 1 + number // 2, "start_index": offset,
+        }))
+        offset += len(text) + 1
+    return chunks
+
+
+def test_chunk_id_ignores_position_but_not_speaker():
+    first = Document(page_content="Net income rose.", metadata={"speaker": "CFO", "page": 1, "start_index": 0})
+    moved = Document(page_content="Net income rose.", metadata={"speaker": "CFO", "page": 3, "start_index": 90})
+    other = Document(page_content="Net income rose.", metadata={"speaker": "CEO", "page": 1, "start_index": 0})
+    assert chunk_id(first) == chunk_id(moved)
+    assert chunk_id(first) != chunk_id(other)
+
+
+def update(store, chunks, embeddings, text_hash):
+    config_key = IndexStore.compute_config_key(100, 0, "hash", "faiss")
+    key = IndexStore.compute_key(text_hash, 100, 0, "hash", "faiss")
+    return store.update("bank_a", key, config_key, chunks, embeddings, "faiss", metadata={"text_hash": text_hash})
+
+
+def test_an_edit_embeds_only_new_chunks_and_moves_the_rest(tmp_path, embeddings):
+    store = IndexStore(base_path=str(tmp_path))
+    paragraphs = ["Opening remarks.", "Net income was 3.4 billion dollars.", "Credit costs were stable."]
+    update(store, chunks_of(paragraphs), embeddings, "v1")
+    embedded = embeddings.embedded
+
+    edited = ["Opening remarks.", "A new paragraph was inserted here.", *paragraphs[1:]]
+    vectorstore, stats = update(store, chunks_of(edited), embeddings, "v2")
+
+    assert stats == {"added": 1, "removed": 0, "unchanged": 3, "moved": 2}
+    assert embeddings.embedded - embedded == 1
+
+    # Moved chunks carry their new positions
+    current = {chunk_id(chunk): chunk for chunk in chunks_of(edited)}
+    for doc_id, chunk in current.items():
+        assert vectorstore.docstore.search(doc_id).metadata == chunk.metadata
+
+
+def test_removed_chunks_leave_the_index(tmp_path, embeddings):
+    store = IndexStore(base_path=str(tmp_path))
+    paragraphs = ["Opening remarks.", "Net income was 3.4 billion dollars.", "Credit costs were stable."]
+    update(store, chunks_of(paragraphs), embeddings, "v1")
+
+    vectorstore, stats = update(store, chunks_of(paragraphs[:2]), embeddings, "v2")
+    assert stats["removed"] == 1
+    assert vectorstore.index.ntotal == 2
+
+
+def test_compressed_indexes_are_rebuilt_when_the_chunk_set_changes(tmp_path, embeddings):
+    store = IndexStore(base_path=str(tmp_path), index_options={"index_type": "sq8"})
+    paragraphs = ["Opening remarks.", "Net income was 3.4 billion dollars.", "Credit costs were stable."]
+    update(store, chunks_of(paragraphs), embeddings, "v1")
+    embedded = embeddings.embedded
+
+    # Same transcript, but a different chunk set (e.g. another near-duplicate threshold)
+    vectorstore, stats = update(store, chunks_of(paragraphs[:2]), embeddings, "v1")
+    assert stats["removed"] == 1
+    assert embeddings.embedded - embedded == 2
+    assert vectorstore.index.ntotal == 2
@@ -0,0 +1,87 @@
+"""
+Metric extraction and the direct-answer router
+"""
+
+import pytest
+
+from utils.metric_store import MetricRouter, extract_metrics
+
+
+@pytest.fixture
+def router_for(transcript):
+    def build(name: str) -> MetricRouter:
+        return MetricRouter(extract_metrics(transcript(name)))
+    return build
+
+
+@pytest.mark.parametrize("question", [
+    "What ROTCE target did management give?",
+    "What was EPS a year ago?",
+    "What is the net income consensus?",
+    "What are the net income estimates?",
+    "What was net income last year?",
+    "What was revenue in the prior quarter?",
+    "What was the year-over-year change in EPS?",
+    "What is the minimum CET1 ratio?",
+    "What is the CET1 requirement?",
+])
+def test_questions_about_other_figures_fall_back_to_rag(router_for, question):
+    assert router_for("harbor_point_2q25").answer(question) is None
+
+
+@pytest.mark.parametrize("name, question, expected", [
+    ("harbor_point_1q25", "What was the CET1 ratio?", "**14.2%**"),
+    ("harbor_point_2q25", "What was the CET1 ratio?", "**14.5%**"),
+    ("harbor_point_1q25", "What was net income?", "**$3.1 billion**"),
+    ("harbor_point_2q25", "What was EPS?", "**$2.71**"),
+    ("harbor_point_1q25", "What was earnings per share?", "**$2.45**"),
+    ("harbor_point_2q25", "What was ROTCE?", "**18%**"),
+    ("harbor_point_2q25", "What was revenue?", "**$12.3 billion**"),
+])
+def test_headline_figures_are_answered_directly(router_for, name, question, expected):
+    answer = router_for(name).answer(question)
+    assert answer is not None and expected in answer
+
+
+@pytest.mark.parametrize("question", [
+    "What was the CET1 ratio in the quarter?",
+    "What was full year net income?",
+    "What was revenue in the Markets business?",
+    "What was consumer bank net income?",
+])
+def test_questions_naming_a_period_or_segment_fall_back_to_rag(router_for, question):
+    assert router_for("harbor_point_2q25").answer(question) is None
+
+
+def test_amounts_later_in_the_sentence_are_not_the_metric():
+    store = extract_metrics(
+        "Our CET1 ratio ended the quarter at 14.2 percent, as net income was partly offset by "
+        "capital distributions, including 1.2 billion dollars of share repurchases."
+    )
+    assert "net_income" not in store["metrics"]
+    assert store["metrics"]["cet1_ratio"][0]["value"] == 14.2
+
+
+def test_competing_figures_for_the_bank_fall_back_to_rag():
+    store = extract_metrics(
+        "Net income was 3.4 billion dollars. Full year net income was 12.9 billion dollars."
+    )
+    assert MetricRouter(store).answer("What was net income?") is None
+
+
+def test_related_ratios_are_separate_metrics():
+    store = extract_metrics(
+        "Return on tangible common equity 19.0% 17.5%\n"
+        "Return on equity 16.0% 15.0%\n"
+        "CET1 ratio 15.3% 15.0%\n"
+        "Tier 1 capital ratio 16.1% 16.0%\n"
+        "Tangible book value per share $95.10 $90.00\n"
+        "Book value per share $115.20 $110.00\n"
+    )
+    router = MetricRouter(store)
+    assert "**19%**" in router.answer("What was ROTCE?")
+    assert "**16%**" in router.answer("What was the return on equity?")
+    assert "**15.3%**" in router.answer("What was the CET1 ratio?")
+    assert "**16.1%**" in router.answer("What was the tier 1 capital ratio?")
+    assert "**$95.10**" in router.answer("What was tangible book value per share?")
+    assert "**$115.20**" in router.answer("What was book value per share?")
@@ -0,0 +1,54 @@
+"""
+MinHash near-duplicate filter
+"""
+
+from langchain.schema import Document
+
+from utils.near_duplicates import NearDuplicateFilter, _bands_for
+
+DISCLAIMER = (
+    "This call contains forward-looking statements that are subject to risks and uncertainties. "
+    "Actual results may differ materially from those expressed. Please refer to our filings with "
+    "the SEC for a discussion of the factors that could cause results to differ."
+)
+
+
+def docs(*texts):
+    return [Document(page_content=text, metadata={"order": number}) for number, text in enumerate(texts)]
+
+
+def test_repeated_boilerplate_keeps_only_the_first_copy():
+    near_copy = DISCLAIMER.replace("Please refer", "Kindly refer")
+    kept, stats = NearDuplicateFilter(threshold=0.7).filter(docs(
+        DISCLAIMER,
+        "Net income was 3.4 billion dollars, up 8 percent from a year ago.",
+        near_copy,
+        DISCLAIMER,
+    ))
+    assert [doc.metadata["order"] for doc in kept] == [0, 1]
+    assert stats["removed"] == 2 and stats["removed_tokens"] > 0
+
+
+def test_distinct_chunks_on_the_same_topic_are_kept():
+    kept, stats = NearDuplicateFilter(threshold=0.85).filter(docs(
+        "Net interest income rose 4 percent on higher deposit balances and loan growth in cards.",
+        "Net interest income fell 2 percent as deposit costs rose faster than loan yields this quarter.",
+        "Credit costs were 1.05 billion dollars, driven by card charge-offs normalizing from lows.",
+    ))
+    assert len(kept) == 3 and stats["removed"] == 0
+
+
+def test_signatures_are_deterministic_and_estimate_similarity():
+    first, second = NearDuplicateFilter(seed=3), NearDuplicateFilter(seed=3)
+    assert (first.signature(DISCLAIMER) == second.signature(DISCLAIMER)).all()
+
+    unrelated = "The operator opened the line for questions from analysts covering the bank."
+    assert (first.signature(DISCLAIMER) == first.signature(DISCLAIMER)).mean() == 1.0
+    assert (first.signature(DISCLAIMER) == first.signature(unrelated)).mean() < 0.2
+
+
+def test_bands_detect_below_the_threshold():
+    for threshold in (0.7, 0.85, 0.95):
+        bands, rows = _bands_for(threshold, 64)
+        assert bands * rows == 64
+        assert (1 / bands) ** (1 / rows) <= threshold
@@ -0,0 +1,81 @@
+"""
+Summary tree: content-defined sections and incremental rebuilds
+"""
+
+from types import SimpleNamespace
+
+from langchain.schema import Document
+
+from benchmarks.common import synthetic_transcript
+from utils.summary_tree import SummaryTreeBuilder, _section_title
+from utils.tokens import count_tokens
+
+
+class CountingLLM:
+    """Echoes the length of each prompt, counting the prompts it was asked to answer"""
+
+    def __init__(self):
+        self.prompts = 0
+
+    def invoke(self, messages):
+        self.prompts += 1
+        return SimpleNamespace(content=f"summary of {len(messages[-1].content)} characters")
+
+    def batch(self, conversations, config=None):
+        return [self.invoke(messages) for messages in conversations]
+
+
+def paragraphs(count, offset=0):
+    return [
+        Document(page_content=f"Paragraph {number}: " + "net interest income and credit costs " * 20,
+                 metadata={"bank_key": "bank_a", "speaker": "CFO", "page": 1 + number // 4})
+        for number in range(offset, offset + count)
+    ]
+
+
+def test_section_titles_use_one_based_pages():
+    chunks = [Document(page_content="text", metadata={"page": page}) for page in (2, 3)]
+    assert _section_title(chunks) == "Pages 2-3"
+
+
+def test_an_unchanged_transcript_reuses_every_summary(embeddings):
+    llm = CountingLLM()
+    builder = SummaryTreeBuilder(llm, embeddings, section_tokens=600)
+    chunks = paragraphs(40)
+    tree = builder.build(chunks, "v1")
+    assert len(tree["sections"]) > 3
+
+    llm.prompts = 0
+    again = builder.build(chunks, "v1", previous=tree)
+    assert llm.prompts == 0
+    assert again["document"] == tree["document"]
+
+
+def test_an_edit_regenerates_only_the_sections_around_it(embeddings):
+    llm = CountingLLM()
+    builder = SummaryTreeBuilder(llm, embeddings, section_tokens=600)
+    chunks = paragraphs(40)
+    tree = builder.build(chunks, "v1")
+
+    # A paragraph inserted near the start must not shift every later section
+    edited = chunks[:3] + paragraphs(1, offset=100) + chunks[3:]
+    llm.prompts = 0
+    rebuilt = builder.build(edited, "v2", previous=tree)
+
+    regenerated = llm.prompts - 1  # the overview
+    assert 1 <= regenerated <= 2
+    assert len(rebuilt["sections"]) - regenerated >= len(tree["sections"]) - 2
+    assert [section["first_chunk"] for section in rebuilt["sections"]][0] == 0
+
+
+def test_groups_respect_the_size_cap(embeddings):
+    builder = SummaryTreeBuilder(CountingLLM(), embeddings, section_tokens=600)
+    chunks = [
+        Document(page_content=text, metadata={"bank_key": "bank_a"})
+        for text in synthetic_transcript(200).split("\n\n")
+    ]
+    groups = builder._group(chunks)
+    assert sum(len(group) for group in groups) == len(chunks)
+    for group in groups:
+        tokens = sum(count_tokens(chunk.page_content, builder.model) for chunk in group)
+        assert len(group) == 1 or tokens <= 600
@@ -0,0 +1,178 @@
+"""
+Semantic Answer Cache
+Reuses answers to near-identical questions about the same document
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Words that usually point back to an earlier turn ("what about its margin?", "why?")
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|they|them|their|this|that|these|those|he|she|him|his|her|above|previous|earlier|"
+    r"same|again|instead|why|elaborate|more|what about|how about|and also)\b",
+    re.IGNORECASE,
+)
+
+# Questions shorter than this are usually elliptical once a conversation has started
+MIN_STANDALONE_WORDS = 5
+
+# Words that carry no subject of their own
+_FUNCTION_WORDS = {
+    "what", "whats", "which", "who", "whom", "when", "where", "how", "was", "were", "is", "are", "be",
+    "been", "did", "does", "do", "can", "could", "would", "should", "will", "the", "a", "an", "of",
+    "in", "on", "for", "to", "and", "or", "about", "with", "me", "you", "your", "please", "tell",
+    "give", "say", "said", "mean", "means", "explain", "summarize", "summarise", "detail", "details",
+}
+
+_WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9'&-]*")
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+_PERIOD_PATTERN = re.compile(
+    r"\b(q[1-4]|[1-4]q|h[12]|fy|ytd|(first|second|third|fourth) (quarter|half)|full[- ]year|"
+    r"year[- ]to[- ]date|quarter|annual|january|february|march|april|may|june|july|august|"
+    r"september|october|november|december)\b",
+    re.IGNORECASE,
+)
+
+
+def is_history_independent(message: str, has_history: bool) -> bool:
+    """
+    True when a question can be answered without the conversation so far
+
+    Once there is history, short questions, questions pointing back ("why?",
+    "summarize that") and questions without a subject word of their own are
+    treated as follow-ups and never served from the cache.
+    """
+    if not has_history:
+        return True
+    words = _WORD_PATTERN.findall(message.lower())
+    if len(words) < MIN_STANDALONE_WORDS or FOLLOW_UP_PATTERN.search(message):
+        return False
+    return any(word not in _FUNCTION_WORDS for word in words)
+
+
+def question_signature(message: str) -> Tuple[str, ...]:
+    """
+    Numbers, periods and named entities of a question, which a cached answer must share
+
+    Embeddings of "Q2 NIM" and "Q3 NIM" are nearly identical; their signatures are not.
+    Entities are acronyms and capitalized words other than a sentence's first word.
+    """
+    tokens = set(_NUMBER_PATTERN.findall(message))
+    tokens.update(match.group(0).lower() for match in _PERIOD_PATTERN.finditer(message))
+    for sentence in re.split(r"(?<=[.!?])\s+", message.strip()):
+        for position, word in enumerate(_WORD_PATTERN.findall(sentence)):
+            if (word.isupper() and len(word) > 1) or (position > 0 and word[0].isupper()):
+                tokens.add(word.lower())
+    return tuple(sorted(tokens))
+
+
+class SemanticAnswerCache:
+    """LRU cache of answers keyed by document, question signature and query embedding, with a TTL"""
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: int = 86400, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # entry id -> {"document_key", "signature", "vector", "answer", "tokens", "created_at"}
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _expire(self, now: float):
+        expired = [
+            entry_id for entry_id, entry in self._entries.items()
+            if now - entry["created_at"] > self.ttl_seconds
+        ]
+        for entry_id in expired:
+            del self._entries[entry_id]
+
+    def lookup(self, document_key: str, query_vector: List[float], message: str) -> Optional[str]:
+        """
+        Find a stored answer for a semantically equivalent question
+
+        Only questions with the same numbers, periods and named entities
+        (see question_signature) are compared by embedding.
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        query = self._normalize(query_vector)
+        signature = question_signature(message)
+        with self._lock:
+            self._expire(time.time())
+            candidates = [
+                (entry_id, entry) for entry_id, entry in self._entries.items()
+                if entry["document_key"] == document_key and entry["signature"] == signature
+            ]
+            if candidates:
+                similarities = np.stack([entry["vector"] for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.saved_tokens += entry["tokens"]
+                    logger.info(
+                        f"Answer cache hit (cosine {similarities[best]:.3f}, "
+                        f"{entry['tokens']} tokens saved)"
+                    )
+                    return entry["answer"]
+
+            self.misses += 1
+            return None
+
+    def store(self, document_key: str, query_vector: List[float], message: str, answer: str, tokens: int):
+        """Remember an answer and the tokens a repeat of it would cost"""
+        with self._lock:
+            self._entries[self._next_id] = {
+                "document_key": document_key,
+                "signature": question_signature(message),
+                "vector": self._normalize(query_vector),
+                "answer": answer,
+                "tokens": tokens,
+                "created_at": time.time(),
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return hit rate and tokens saved since the cache was created"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "entries": len(self._entries),
+        }
+
+
+_shared_cache: Optional[SemanticAnswerCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_answer_cache(threshold: float, ttl_seconds: int, max_entries: int) -> SemanticAnswerCache:
+    """Process-wide cache, so analysts in different sessions share answers"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = SemanticAnswerCache(threshold, ttl_seconds, max_entries)
+        return _shared_cache
@@ -0,0 +1,215 @@
+"""
+Batch Embedder
+Concurrent, rate-limit-aware batched embedding for large transcripts
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+from utils.tokens import count_tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True when an API error is an HTTP 429"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return type(error).__name__ == "RateLimitError"
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Read the Retry-After header of a 429 response, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Sliding one-minute window over requests and tokens, shared by all workers"""
+
+    def __init__(self, rpm_limit: int, tpm_limit: int):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        while self._events and now - self._events[0][0] >= 60:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserve budget for one request; returns 0 on success or the time to wait"""
+        # A single request larger than the whole budget would otherwise wait forever
+        tokens = min(tokens, self.tpm_limit)
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            wait = self._paused_until - now
+            if wait > 0:
+                return wait
+            fits_rpm = len(self._events) < self.rpm_limit
+            fits_tpm = self._tokens_in_window + tokens <= self.tpm_limit
+            if fits_rpm and fits_tpm:
+                self._events.append((now, tokens))
+                self._tokens_in_window += tokens
+                return 0.0
+            # Wait for the oldest event to leave the window
+            wait = 60 - (now - self._events[0][0]) if self._events else 0.05
+            return max(wait, 0.01)
+
+    def acquire(self, tokens: int):
+        """Block until one request of the given size fits in the budget"""
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int):
+        """Wait without blocking the event loop until one request fits in the budget"""
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop all workers for a while after the API pushed back"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class BatchEmbedder(Embeddings):
+    """Embeddings wrapper that embeds batches concurrently under an RPM / TPM budget"""
+
+    def __init__(self, embeddings: Embeddings, model_name: str, batch_size: int = 64,
+                 max_concurrency: int = 4, rpm_limit: int = 3000, tpm_limit: int = 1000000,
+                 max_retries: int = 6, progress_callback: Optional[Callable[[int, int], None]] = None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.rate_limiter = RateLimiter(rpm_limit, tpm_limit)
+
+        # Called with (embedded_chunks, total_chunks) as batches complete
+        self.progress_callback = progress_callback
+
+        # Throughput of the last embed_documents call, in chunks per second
+        self.last_throughput = 0.0
+
+        # Shared backoff grows with consecutive 429s and relaxes on success
+        self._backoff = 1.0
+        self._backoff_lock = threading.Lock()
+
+    def _on_success(self):
+        with self._backoff_lock:
+            self._backoff = max(1.0, self._backoff / 2)
+
+    def _on_rate_limited(self, error: Exception, attempt: int):
+        """Pause every worker for the adaptive backoff delay"""
+        with self._backoff_lock:
+            delay = get_retry_after(error) or self._backoff
+            self._backoff = min(self._backoff * 2, 60.0)
+        delay *= 1 + random.random() * 0.25
+        logger.warning(f"Embedding rate limited, backing off {delay:.1f}s (attempt {attempt + 1})")
+        self.rate_limiter.pause(delay)
+
+    def _call_with_backoff(self, func: Callable, tokens: int):
+        """Run one API call under the rate budget, retrying 429s with adaptive backoff"""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(tokens)
+            try:
+                result = func()
+                self._on_success()
+                return result
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self._on_rate_limited(e, attempt)
+
+    async def _acall_with_backoff(self, func: Callable, tokens: int):
+        """Async version of _call_with_backoff for coroutine API calls"""
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.aacquire(tokens)
+            try:
+                result = await func()
+                self._on_success()
+                return result
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                self._on_rate_limited(e, attempt)
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        tokens = sum(count_tokens(text, self.model_name) for text in batch)
+        return self._call_with_backoff(lambda: self.embeddings.embed_documents(batch), tokens)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunks in concurrent batches, preserving input order"""
+        if not texts:
+            return []
+
+        start = time.perf_counter()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = {pool.submit(self._embed_batch, batch): i for i, batch in enumerate(batches)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done += len(batches[i])
+                if self.progress_callback:
+                    self.progress_callback(done, len(texts))
+
+        elapsed = time.perf_counter() - start
+        self.last_throughput = len(texts) / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Embedded {len(texts)} chunks in {len(batches)} batches in {elapsed:.2f}s "
+            f"({self.last_throughput:.1f} chunks/s, concurrency {self.max_concurrency})"
+        )
+        return [vector for batch in results for vector in batch]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query under the same rate budget"""
+        tokens = count_tokens(text, self.model_name)
+        return self._call_with_backoff(lambda: self.embeddings.embed_query(text), tokens)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunks concurrently on the event loop, preserving input order"""
+        if not texts:
+            return []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            tokens = sum(count_tokens(text, self.model_name) for text in batch)
+            async with semaphore:
+                return await self._acall_with_backoff(
+                    lambda: self.embeddings.aembed_documents(batch), tokens
+                )
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return [vector for batch in results for vector in batch]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query without blocking the event loop"""
+        tokens = count_tokens(text, self.model_name)
+        return await self._acall_with_backoff(lambda: self.embeddings.aembed_query(text), tokens)
@@ -3,41 +3,142 @@ Simple PDF Chatbot - Core Logic
 Handles PDF processing, vector storage, and chat with memory
 """
 
-import os
+import json
 import tempfile
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator
 import warnings
 warnings.filterwarnings("ignore")
 
 # LangChain imports
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import HumanMessage, BaseMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 
-# Vector database imports
-from langchain_community.vectorstores import FAISS
-from langchain_community.vectorstores import Chroma
 # Wrap it in a Document object
 from langchain.schema import Document
 
 # Configuration
 import chatbot_config
-import streamlit as st
+from utils.index_store import IndexStore
+from utils.shared_index import DEFAULT_PARTITION, ProgressCallback, SharedIndexRetriever, get_shared_index
+from utils.embedding_cache import CachedEmbeddings
+from utils.near_duplicates import NearDuplicateFilter
+from utils.batch_embedder import BatchEmbedder
+from utils.local_embeddings import LocalEmbeddings
+from utils.answer_cache import get_shared_answer_cache, is_history_independent
+from utils.tokens import count_tokens
+from utils.context_packer import ContextPacker
+from utils.latency_policy import (
+    DeadlineExceeded, RouteDecision, aiterate_with_deadline, extractive_answer, get_latency_policy, iterate_with_deadline
+)
+from utils.metric_store import MetricRouter, load_or_extract_metrics
+from utils.summary_tree import SummaryRetriever, SummaryTreeBuilder, is_broad_question
+from utils.telemetry import TurnTelemetry, get_telemetry_log
+from utils.conversation_memory import ConversationMemory
 from loguru import logger
 
-class SimplePDFChatbot:
-    """Simple PDF chatbot with configurable vector database and memory"""
+def get_embedding_model_name(backend: Optional[str] = None, embeddings: Optional[Embeddings] = None) -> str:
+    """
+    Name identifying the embedding vectors, used in cache and index keys
+
+    Args:
+        backend: "openai" or "local"; defaults to chatbot_config.EMBEDDING_BACKEND
+        embeddings: Loaded local embeddings; their actual runtime is named rather
+            than the configured one, since ONNX falls back to PyTorch when unavailable
+    """
+    backend = (backend or chatbot_config.EMBEDDING_BACKEND).lower()
+    if backend == "local":
+        name = chatbot_config.LOCAL_EMBEDDING_MODEL
+        if isinstance(embeddings, LocalEmbeddings):
+            onnx, quantized = embeddings.backend == "onnx", embeddings.quantized
+        else:
+            onnx, quantized = chatbot_config.LOCAL_EMBEDDING_ONNX, chatbot_config.LOCAL_EMBEDDING_QUANTIZE
+        if onnx:
+            name += "+onnx"
+        if quantized:
+            name += "+int8"
+        return name
+    return chatbot_config.EMBEDDING_MODEL
+
+
+def get_relevance_floor(backend: Optional[str] = None) -> float:
+    """Context packing relevance floor for the embedding backend's similarity scale"""
+    backend = (backend or chatbot_config.EMBEDDING_BACKEND).lower()
+    return chatbot_config.LOCAL_RELEVANCE_FLOOR if backend == "local" else chatbot_config.RELEVANCE_FLOOR
+
+
+def get_faiss_index_options() -> Dict[str, Any]:
+    """FAISS compression settings from chatbot_config"""
+    return {
+        "index_type": chatbot_config.FAISS_INDEX_TYPE,
+        "pca_dim": chatbot_config.FAISS_PCA_DIM,
+        "nlist": chatbot_config.FAISS_IVF_NLIST,
+        "nprobe": chatbot_config.FAISS_IVF_NPROBE,
+        "pq_m": chatbot_config.FAISS_PQ_M,
+        "pq_bits": chatbot_config.FAISS_PQ_BITS,
+        "rescore_factor": chatbot_config.FAISS_RESCORE_FACTOR,
+    }
+
+
+def create_base_embeddings(backend: Optional[str] = None) -> Embeddings:
+    """
+    Create the embedding backend selected in chatbot_config (without the cache)
+
+    Args:
+        backend: "openai" or "local"; defaults to chatbot_config.EMBEDDING_BACKEND
+
+    Returns:
+        LangChain embeddings
+    """
+    backend = (backend or chatbot_config.EMBEDDING_BACKEND).lower()
+    if backend == "local":
+        return LocalEmbeddings(
+            model_name=chatbot_config.LOCAL_EMBEDDING_MODEL,
+            batch_size=chatbot_config.LOCAL_EMBEDDING_BATCH_SIZE,
+            num_threads=chatbot_config.LOCAL_EMBEDDING_THREADS,
+            use_onnx=chatbot_config.LOCAL_EMBEDDING_ONNX,
+            quantize=chatbot_config.LOCAL_EMBEDDING_QUANTIZE
+        )
+
+    # Retries are handled by BatchEmbedder's adaptive backoff
+    return BatchEmbedder(
+        OpenAIEmbeddings(
+            api_key=chatbot_config.OPENAI_API_KEY,
+            base_url=chatbot_config.OPENAI_BASE_URL,
+            model=chatbot_config.EMBEDDING_MODEL,
+            chunk_size=chatbot_config.EMBEDDING_BATCH_SIZE,
+            # Chunks are CHUNK_SIZE characters, far below the model's context
+            # window, so client-side tokenization would be pure overhead
+            check_embedding_ctx_length=False,
+            max_retries=0
+        ),
+        model_name=chatbot_config.EMBEDDING_MODEL,
+        batch_size=chatbot_config.EMBEDDING_BATCH_SIZE,
+        max_concurrency=chatbot_config.EMBEDDING_MAX_CONCURRENCY,
+        rpm_limit=chatbot_config.EMBEDDING_RPM_LIMIT,
+        tpm_limit=chatbot_config.EMBEDDING_TPM_LIMIT,
+        max_retries=chatbot_config.EMBEDDING_MAX_RETRIES
+    )
+
+
+class ChatResources:
+    """
+    Clients, caches and the index shared by every chatbot in the process
+
+    Holds nothing specific to a bank or a conversation: retrievers, chains
+    and the metric router live on each bank's SimplePDFChatbot.
+    """
 
     def __init__(self):
-        
-        st.session_state.chatbot = None
-        st.session_state.messages = []
-    
-        """Initialize the chatbot"""
         # Validate configuration
         errors = chatbot_config.validate_config()
         if errors:
@@ -49,91 +150,377 @@ class SimplePDFChatbot:
         # Initialize components
         self.llm = ChatOpenAI(
             api_key=chatbot_config.OPENAI_API_KEY,
+            base_url=chatbot_config.OPENAI_BASE_URL,
             model=chatbot_config.OPENAI_MODEL,
             temperature=chatbot_config.TEMPERATURE,
-            max_tokens=chatbot_config.MAX_TOKENS
+            max_tokens=chatbot_config.MAX_TOKENS,
+            # Token usage is also reported for streamed answers
+            stream_usage=True
         )
 
-        logger.info("OpenAIEmbeddings")
-        self.embeddings = OpenAIEmbeddings(api_key=chatbot_config.OPENAI_API_KEY)
+        logger.info(f"{chatbot_config.EMBEDDING_BACKEND} embeddings")
+        self.embeddings = create_base_embeddings()
+        self.embedding_model_name = get_embedding_model_name(embeddings=self.embeddings)
+        if chatbot_config.EMBEDDING_CACHE_ENABLED:
+            # Identical chunks are served from the local cache instead of the model
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                model_name=self.embedding_model_name,
+                cache_path=chatbot_config.EMBEDDING_CACHE_PATH,
+                max_entries=chatbot_config.EMBEDDING_CACHE_MAX_ENTRIES
+            )
 
         logger.info("RecursiveCharacterTextSplitter")
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chatbot_config.CHUNK_SIZE,
             chunk_overlap=chatbot_config.CHUNK_OVERLAP,
             length_function=len,
+            # Character offsets let the context packer merge overlapping chunks
+            add_start_index=True,
+        )
+
+        # Persisted indexes, keyed by transcript and chunking settings
+        self.index_store = IndexStore(
+            chatbot_config.INDEX_BASE_PATH, get_faiss_index_options(), mmap=chatbot_config.INDEX_MMAP
+        )
+
+        # One index over every bank, loaded once per process
+        self.shared_index = get_shared_index(
+            self.embeddings,
+            self.index_store,
+            self.text_splitter,
+            chatbot_config.VECTOR_DB,
+            chatbot_config.CHUNK_SIZE,
+            chatbot_config.CHUNK_OVERLAP,
+            self.embedding_model_name,
+            preload=chatbot_config.SHARED_INDEX_PRELOAD,
+            chunking_strategy=chatbot_config.CHUNKING_STRATEGY,
+            memory_budget_mb=chatbot_config.INDEX_MEMORY_BUDGET_MB,
+            near_duplicate_filter=(
+                NearDuplicateFilter(
+                    threshold=chatbot_config.NEAR_DUPLICATE_THRESHOLD,
+                    num_perm=chatbot_config.NEAR_DUPLICATE_NUM_PERM,
+                    model=chatbot_config.EMBEDDING_MODEL
+                ) if chatbot_config.NEAR_DUPLICATE_FILTER_ENABLED else None
+            )
+        )
+        # Answers to repeated questions, shared by every chatbot in the process
+        self.answer_cache = None
+        if chatbot_config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = get_shared_answer_cache(
+                chatbot_config.ANSWER_CACHE_THRESHOLD,
+                chatbot_config.ANSWER_CACHE_TTL_SECONDS,
+                chatbot_config.ANSWER_CACHE_MAX_ENTRIES
+            )
+
+        # Token-budgeted selection of retrieved chunks
+        self.context_packer = None
+        if chatbot_config.CONTEXT_PACKING_ENABLED:
+            self.context_packer = ContextPacker(
+                token_budget=chatbot_config.CONTEXT_TOKEN_BUDGET,
+                relevance_floor=get_relevance_floor(),
+                model=chatbot_config.OPENAI_MODEL
+            )
+
+        # Per-turn timings and token counts, aggregated across the process
+        self.telemetry = None
+        if chatbot_config.TELEMETRY_ENABLED:
+            self.telemetry = get_telemetry_log(
+                chatbot_config.TELEMETRY_WINDOW,
+                chatbot_config.TELEMETRY_LOG_PATH
+            )
+
+        # Separate, cheaper model call for folding old exchanges into a summary
+        self.summary_llm = ChatOpenAI(
+            api_key=chatbot_config.OPENAI_API_KEY,
+            base_url=chatbot_config.OPENAI_BASE_URL,
+            model=chatbot_config.OPENAI_MODEL,
+            temperature=0,
+            max_tokens=chatbot_config.HISTORY_SUMMARY_MAX_TOKENS
         )
 
-        # Chat components (initialized after PDF processing)
-        self.vectorstore = None
+        # Section and call summaries built once per transcript at ingestion
+        self.summary_tree_builder = None
+        if chatbot_config.SUMMARY_TREE_ENABLED:
+            self.summary_tree_builder = SummaryTreeBuilder(
+                ChatOpenAI(
+                    api_key=chatbot_config.OPENAI_API_KEY,
+                    base_url=chatbot_config.OPENAI_BASE_URL,
+                    model=chatbot_config.OPENAI_MODEL,
+                    temperature=0,
+                    max_tokens=chatbot_config.SUMMARY_NODE_MAX_TOKENS
+                ),
+                self.embeddings,
+                section_tokens=chatbot_config.SUMMARY_SECTION_TOKENS,
+                model=chatbot_config.OPENAI_MODEL
+            )
+
+        # Per-turn retrieval depth, model tier and output cap within a latency SLO
+        self.latency_policy = None
+        self.strong_llm = None
+        if chatbot_config.LATENCY_ROUTING_ENABLED:
+            self.latency_policy = get_latency_policy(
+                slo_ms=chatbot_config.LATENCY_SLO_MS,
+                fast_model=chatbot_config.OPENAI_MODEL,
+                strong_model=chatbot_config.STRONG_MODEL,
+                min_k=chatbot_config.ROUTING_MIN_K,
+                max_k=chatbot_config.ROUTING_MAX_K,
+                max_tokens=chatbot_config.MAX_TOKENS,
+                min_llm_ms=chatbot_config.LLM_MIN_DEADLINE_MS,
+                spread_threshold=chatbot_config.ROUTING_SPREAD_THRESHOLD,
+                tier_estimates={
+                    "fast": {"ttft_ms": chatbot_config.FAST_MODEL_TTFT_MS,
+                             "ms_per_token": chatbot_config.FAST_MODEL_MS_PER_TOKEN},
+                    "strong": {"ttft_ms": chatbot_config.STRONG_MODEL_TTFT_MS,
+                               "ms_per_token": chatbot_config.STRONG_MODEL_MS_PER_TOKEN},
+                },
+                log_path=chatbot_config.ROUTE_LOG_PATH
+            )
+            self.strong_llm = ChatOpenAI(
+                api_key=chatbot_config.OPENAI_API_KEY,
+                base_url=chatbot_config.OPENAI_BASE_URL,
+                model=chatbot_config.STRONG_MODEL,
+                temperature=chatbot_config.TEMPERATURE,
+                max_tokens=chatbot_config.MAX_TOKENS,
+                stream_usage=True
+            )
+
+    def new_memory(self) -> ConversationMemory:
+        """Create an empty conversation history, e.g. one per concurrent session"""
+        summarize = chatbot_config.HISTORY_SUMMARY_ENABLED and chatbot_config.MAX_CHAT_HISTORY > 0
+        return ConversationMemory(
+            prompt_turns=chatbot_config.MAX_CHAT_HISTORY,
+            max_turns=chatbot_config.MAX_STORED_EXCHANGES,
+            summarizer=self._summarize_history if summarize else None
+        )
+
+    def _summarize_history(self, previous: str, exchanges: List[Tuple[str, str]]) -> str:
+        """Fold exchanges that left the prompt window into the running summary"""
+        transcript = "\n".join(f"User: {user}\nAssistant: {answer}" for user, answer in exchanges)
+        response = self.summary_llm.invoke([
+            SystemMessage(content=(
+                "You keep a compact running summary of a conversation about an earnings call "
+                "transcript. Merge the new exchanges into the current summary. Keep the figures, "
+                "names and open questions the user cared about; drop pleasantries."
+            )),
+            HumanMessage(content=f"Current summary:\n{previous or '(none)'}\n\nNew exchanges:\n{transcript}"),
+        ])
+        return response.content.strip()
+
+
+_chat_resources: Optional[ChatResources] = None
+_resources_lock = threading.Lock()
+
+
+def get_chat_resources() -> ChatResources:
+    """Return the process-wide chat resources, creating them on first use"""
+    global _chat_resources
+    with _resources_lock:
+        if _chat_resources is None:
+            _chat_resources = ChatResources()
+        return _chat_resources
+
+
+class SimplePDFChatbot:
+    """Simple PDF chatbot for one bank, with configurable vector database and memory"""
+
+    def __init__(self, resources: Optional[ChatResources] = None):
+        """
+        Initialize the chatbot
+
+        Args:
+            resources: Shared clients and index; defaults to the process-wide ones
+        """
+        self.resources = resources or get_chat_resources()
+        self.llm = self.resources.llm
+        self.summary_llm = self.resources.summary_llm
+        self.strong_llm = self.resources.strong_llm
+        self.embedding_model_name = self.resources.embedding_model_name
+        self.embeddings = self.resources.embeddings
+        self.text_splitter = self.resources.text_splitter
+        self.index_store = self.resources.index_store
+        self.shared_index = self.resources.shared_index
+        self.answer_cache = self.resources.answer_cache
+        self.context_packer = self.resources.context_packer
+        self.telemetry = self.resources.telemetry
+        self.summary_tree_builder = self.resources.summary_tree_builder
+        self.latency_policy = self.resources.latency_policy
+
+        self.bank_key = None
+
+        # Chat components (initialized after PDF processing); the vector store
+        # itself stays in the shared index, which may close and reopen it
         self.retriever = None
         self.rag_chain = None
+        # Same prompt over the summary tree instead of raw chunks, for broad questions
+        self.summary_chain = None
+        # Answers exact metric lookups from figures extracted at preprocessing
+        self.metric_router = None
+
+        self.document_key = None
+        self.system_prompt = ""
+
+        # One LLM call over chunks of several banks, for comparative questions
+        self.compare_document_chain = self._create_compare_document_chain()
+
+        # Bounded chat history of the chatbot's own conversation
+        self.memory = self.new_memory()
 
-        # Simple chat history storage
-        self.chat_history: List[BaseMessage] = []
-            
-        if "filepath" in st.session_state:
-            logger.info("filepath in st.session_state:")
-            print(f"📄 Loading default PDF: {st.session_state.get("filepath")}")
-            self.process_pdf(st.session_state.get("filepath"))
+        if chatbot_config.DEFAULT_PDF_PATH:
+            print(f"📄 Loading default PDF: {chatbot_config.DEFAULT_PDF_PATH}")
+            self.process_pdf(chatbot_config.DEFAULT_PDF_PATH)
 
-    def process_pdf(self, pdf_path: str) -> bool:
+    def process_pdf(self, pdf_path: str, bank_key: Optional[str] = None,
+                    text_sections: Optional[List[Dict[str, Any]]] = None,
+                    raw_text: Optional[str] = None) -> bool:
         """
         Process a PDF file and set up the RAG chain
 
         Args:
             pdf_path: Path to the PDF file
+            bank_key: Bank the transcript belongs to, used for index persistence
+            text_sections: Speaker sections from preprocessing, used for chunk metadata
+            raw_text: Text already extracted by preprocessing; read from the PDF when omitted
 
         Returns:
             True if successful, False otherwise
         """
         logger.info("process_pdf in simplepdfchatbot")
+        print(f"📄 Processing PDF: {pdf_path}")
+
+        if raw_text is None:
+            try:
+                pages = PyPDFLoader(pdf_path).load()
+            except Exception as e:
+                print(f"❌ Error processing PDF: {e}")
+                return False
+            print(f"✅ Loaded {len(pages)} pages")
+            raw_text = "\n".join(page.page_content for page in pages)
+
+        if not raw_text:
+            print("❌ Error processing PDF: no text could be extracted")
+            return False
+
+        return self.process_text(raw_text, bank_key, text_sections)
+
+    def process_text(self, raw_text: str, bank_key: Optional[str] = None,
+                     text_sections: Optional[List[Dict[str, Any]]] = None,
+                     progress: Optional[ProgressCallback] = None) -> bool:
+        """
+        Index an already extracted transcript and set up the RAG chain
+
+        Args:
+            raw_text: Transcript text
+            bank_key: Bank the transcript belongs to, used for index persistence
+            text_sections: Speaker sections from preprocessing, used for chunk metadata
+            progress: Optional callback receiving (stage, done, total) while indexing
+
+        Returns:
+            True if successful, False otherwise
+        """
         try:
-            print(f"📄 Processing PDF: {pdf_path}")
-
-            # # Load PDF
-            # loader = PyPDFLoader(pdf_path)
-            # documents = loader.load()
-            # print(f"✅ Loaded {len(documents)} pages")
-            logger.info("reading raw text")
-            
-            documents = [Document(page_content=st.session_state.raw_text)]
-            # Split into chunks
-            chunks = self.text_splitter.split_documents(documents)
-            print(f"✂️ Created {len(chunks)} chunks")
-
-            # Create vector store
-            if chatbot_config.VECTOR_DB.lower() == "chroma":
-                # Use ChromaDB
-                self.vectorstore = Chroma.from_documents(
-                    chunks, 
-                    self.embeddings
+            self.bank_key = bank_key or DEFAULT_PARTITION
+            persist = chatbot_config.PERSIST_INDEX and bool(bank_key)
+
+            # The shared index reuses this bank's index when the transcript is unchanged
+            index_key = self.shared_index.index_document(
+                self.bank_key, raw_text, text_sections, persist=persist, progress=progress
+            )
+
+            update_stats = self.shared_index.get_update_stats(self.bank_key)
+            if update_stats:
+                logger.info(
+                    f"Index for {self.bank_key}: {update_stats['added']} chunks added, "
+                    f"{update_stats['removed']} removed, {update_stats['unchanged']} unchanged, "
+                    f"{update_stats['duplicates']} near-duplicates skipped "
+                    f"(~{update_stats['duplicate_tokens']:,} embedding tokens)"
                 )
-                print("✅ Created ChromaDB vector store")
-            else:
-                # Use FAISS (default)
-                self.vectorstore = FAISS.from_documents(
-                    chunks, 
-                    self.embeddings
+
+            if isinstance(self.embeddings, CachedEmbeddings):
+                stats = self.embeddings.get_stats()
+                logger.info(
+                    f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                    f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)"
                 )
-                print("✅ Created FAISS vector store")
 
-            # Create retriever
-            self.retriever = self.vectorstore.as_retriever(
-                search_kwargs={"k": chatbot_config.SIMILARITY_SEARCH_K}
+            # Answers depend on the indexed document and the model producing them
+            self.document_key = f"{index_key}:{chatbot_config.OPENAI_MODEL}"
+
+            # Create retriever, scanning only this bank's vectors; with packing
+            # enabled it fetches extra candidates for the packer to choose from
+            self.retriever = SharedIndexRetriever(
+                index=self.shared_index,
+                bank_keys=[self.bank_key],
+                k=(chatbot_config.CONTEXT_FETCH_K if chatbot_config.CONTEXT_PACKING_ENABLED
+                   else chatbot_config.SIMILARITY_SEARCH_K),
+                metadata_filter=self._role_filter(chatbot_config.RETRIEVAL_ROLES)
             )
 
             # Create RAG chain
             self._setup_rag_chain()
+            self._load_metrics(raw_text, bank_key, text_sections)
+            self._build_summaries(raw_text, text_sections, persist, progress)
 
             print("🎉 PDF processed successfully! Ready to chat.")
-            st.session_state.pdf_processed  = True 
             return True
 
         except Exception as e:
             print(f"❌ Error processing PDF: {e}")
             return False
 
+    def _load_metrics(self, raw_text: str, bank_key: Optional[str],
+                      text_sections: Optional[List[Dict[str, Any]]]):
+        """Set up the metric router; without it every question goes through RAG"""
+        self.metric_router = None
+        if not chatbot_config.METRIC_ROUTER_ENABLED:
+            return
+        try:
+            data_manager = self.shared_index.data_manager
+            store = load_or_extract_metrics(
+                data_manager, bank_key, raw_text, text_sections, persist=chatbot_config.PERSIST_INDEX
+            )
+            self.metric_router = MetricRouter(store, data_manager.config.get("financial_metrics"))
+            print(f"📐 {len(store['metrics'])} metrics available for direct answers")
+        except Exception as e:
+            logger.warning(f"Could not load extracted metrics for {self.bank_key}: {e}")
+
+    def _metric_answer(self, message: str, turn: TurnTelemetry) -> Optional[str]:
+        """Answer an exact metric lookup from the metric store, or None to use RAG"""
+        if self.metric_router is None:
+            return None
+        answer = self.metric_router.answer(message)
+        if answer is not None:
+            turn.route = "metric"
+        return answer
+
+    def _build_summaries(self, raw_text: str, text_sections: Optional[List[Dict[str, Any]]],
+                         persist: bool, progress: Optional[ProgressCallback] = None):
+        """Build or load the summary tree; without one, broad questions use chunk retrieval"""
+        if self.summary_tree_builder is None:
+            return
+        try:
+            tree = self.shared_index.ensure_summaries(
+                self.bank_key, raw_text, self.summary_tree_builder, text_sections,
+                persist=persist, progress=progress
+            )
+            print(f"🌳 Summary tree ready ({len(tree['sections'])} sections)")
+        except Exception as e:
+            logger.warning(f"Could not build summary tree for {self.bank_key}: {e}")
+
+    @staticmethod
+    def _role_filter(roles: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        return {"role": list(roles)} if roles else None
+
+    def set_speaker_roles(self, roles: Optional[List[str]] = None):
+        """
+        Restrict retrieval to chunks spoken by the given roles
+
+        Args:
+            roles: e.g. ["management"]; None or empty searches every speaker
+        """
+        if self.retriever is not None:
+            self.retriever.metadata_filter = self._role_filter(roles)
+
     def _setup_rag_chain(self):
         """Set up the RAG chain with chat history"""
         logger.info("set up rag chian")
@@ -145,6 +532,7 @@ class SimplePDFChatbot:
             "Keep your answers concise and relevant.\n\n"
             "Context: {context}"
         )
+        self.system_prompt = system_prompt
 
         if chatbot_config.MAX_CHAT_HISTORY > 0:
             # Include chat history in prompt
@@ -161,28 +549,273 @@ class SimplePDFChatbot:
             ])
 
         # Create document chain
-        document_chain = create_stuff_documents_chain(self.llm, prompt)
+        self.rag_prompt = prompt
+        self.document_chain = create_stuff_documents_chain(self.llm, prompt)
 
         # Create retrieval chain
-        self.rag_chain = create_retrieval_chain(self.retriever, document_chain)
+        retrieval = self.retriever
+        if self.context_packer is not None:
+            retrieval = (
+                RunnableLambda(lambda chain_input: chain_input["input"])
+                | self.retriever
+                | RunnableLambda(self.context_packer.pack)
+            )
+        self.rag_chain = create_retrieval_chain(retrieval, self.document_chain)
+
+        if self.summary_tree_builder is not None:
+            summary_retriever = SummaryRetriever(
+                index=self.shared_index,
+                bank_keys=[self.bank_key],
+                k=chatbot_config.SUMMARY_TOP_SECTIONS
+            )
+            self.summary_chain = create_retrieval_chain(
+                RunnableLambda(lambda chain_input: chain_input["input"]) | summary_retriever,
+                self.document_chain
+            )
 
         print("✅ RAG chain created with chat history support")
 
-    def _get_recent_history(self) -> List[BaseMessage]:
-        """Get recent chat history based on chatbot_config"""
+    def _chain_for(self, message: str):
+        """Summary chain for broad questions when the bank has a summary tree, RAG chain otherwise"""
+        if (self.summary_chain is not None and is_broad_question(message)
+                and self.shared_index.get_summaries(self.bank_key) is not None):
+            return self.summary_chain
+        return self.rag_chain
+
+    def _plan_route(self, message: str, turn: TurnTelemetry) -> Optional[RouteDecision]:
+        """Latency routing decision for a RAG turn, or None when the turn is not routed"""
+        if self.latency_policy is None or self._chain_for(message) is not self.rag_chain:
+            return None
+        decision = self.latency_policy.plan(message)
+        turn.route_decision = decision
+        return decision
+
+    def _routed_chain(self, decision: RouteDecision):
+        """RAG chain with the decision's retrieval depth, model tier and output cap"""
+        retriever = SharedIndexRetriever(
+            index=self.shared_index,
+            bank_keys=[self.bank_key],
+            k=decision.k,
+            metadata_filter=self.retriever.metadata_filter
+        )
+        # The tier and output cap are chosen once the chunks and their scores are known
+        retrieval = (
+            RunnableLambda(lambda chain_input: chain_input["input"])
+            | retriever
+            | RunnableLambda(partial(self.latency_policy.refine, decision))
+        )
+        if self.context_packer is not None:
+            retrieval = retrieval | RunnableLambda(self.context_packer.pack)
+
+        def document_chain(chain_input: Dict[str, Any]):
+            llm = self.strong_llm if decision.tier == "strong" else self.llm
+            return create_stuff_documents_chain(llm.bind(max_tokens=decision.max_tokens), self.rag_prompt)
+
+        return create_retrieval_chain(retrieval, RunnableLambda(document_chain))
+
+    def _fallback_chunk(self, decision: RouteDecision, message: str, turn: TurnTelemetry) -> Dict[str, Any]:
+        """Extractive answer for a turn whose LLM missed its deadline"""
+        decision.fallback = True
+        turn.route = "extractive"
+        logger.warning(
+            f"LLM missed its deadline ({decision.slo_ms:.0f} ms SLO, {decision.tier} tier), "
+            f"answering from the top chunks"
+        )
+        return {
+            "context": decision.context,
+            "answer": extractive_answer(message, decision.context),
+            "fallback": True,
+        }
+
+    def _routed_stream(self, decision: RouteDecision, chain_input: Dict[str, Any], turn: TurnTelemetry,
+                       first_token_only: bool = True) -> Iterator[Dict[str, Any]]:
+        chain = self._routed_chain(decision)
+        try:
+            yield from iterate_with_deadline(
+                chain.stream(chain_input, config={"callbacks": [turn]}), decision, first_token_only
+            )
+        except DeadlineExceeded:
+            yield self._fallback_chunk(decision, chain_input["input"], turn)
+
+    async def _arouted_stream(self, decision: RouteDecision, chain_input: Dict[str, Any], turn: TurnTelemetry,
+                              first_token_only: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        chain = self._routed_chain(decision)
+        try:
+            async for chunk in aiterate_with_deadline(
+                chain.astream(chain_input, config={"callbacks": [turn]}), decision, first_token_only
+            ):
+                yield chunk
+        except DeadlineExceeded:
+            yield self._fallback_chunk(decision, chain_input["input"], turn)
+
+    @staticmethod
+    def _add_chunk(response: Dict[str, Any], chunk: Dict[str, Any]):
+        """Accumulate a streamed chain chunk; a fallback replaces any partial answer"""
+        response["context"] = chunk.get("context", response["context"])
+        if chunk.get("fallback"):
+            response["answer"] = chunk["answer"]
+        elif chunk.get("answer"):
+            response["answer"] += chunk["answer"]
+
+    def _run_chain(self, message: str, chain_input: Dict[str, Any], turn: TurnTelemetry) -> Dict[str, Any]:
+        """Answer a turn with the RAG or summary chain, latency-routed when enabled"""
+        decision = self._plan_route(message, turn)
+        if decision is None:
+            return self._chain_for(message).invoke(chain_input, config={"callbacks": [turn]})
+
+        response = {"context": [], "answer": ""}
+        for chunk in self._routed_stream(decision, chain_input, turn, first_token_only=False):
+            self._add_chunk(response, chunk)
+        return response
+
+    async def _arun_chain(self, message: str, chain_input: Dict[str, Any], turn: TurnTelemetry) -> Dict[str, Any]:
+        decision = self._plan_route(message, turn)
+        if decision is None:
+            return await self._chain_for(message).ainvoke(chain_input, config={"callbacks": [turn]})
+
+        response = {"context": [], "answer": ""}
+        async for chunk in self._arouted_stream(decision, chain_input, turn, first_token_only=False):
+            self._add_chunk(response, chunk)
+        return response
+
+    def _stream_chain(self, message: str, chain_input: Dict[str, Any],
+                      turn: TurnTelemetry) -> Iterator[Dict[str, Any]]:
+        decision = self._plan_route(message, turn)
+        if decision is None:
+            return self._chain_for(message).stream(chain_input, config={"callbacks": [turn]})
+        return self._routed_stream(decision, chain_input, turn)
+
+    def _astream_chain(self, message: str, chain_input: Dict[str, Any],
+                       turn: TurnTelemetry) -> AsyncIterator[Dict[str, Any]]:
+        decision = self._plan_route(message, turn)
+        if decision is None:
+            return self._chain_for(message).astream(chain_input, config={"callbacks": [turn]})
+        return self._arouted_stream(decision, chain_input, turn)
+
+    def _create_compare_document_chain(self):
+        """Document chain for comparative questions; every passage is labelled with its bank"""
+        system_prompt = (
+            "You are a helpful AI assistant comparing what several banks said on their earnings calls. "
+            "Each piece of context starts with the transcript it comes from in square brackets. "
+            "Answer for each bank, then point out the main differences. If the context does not "
+            "cover a bank, say so for that bank instead of guessing. Keep your answer concise.\n\n"
+            "Context: {context}"
+        )
+        messages = [("system", system_prompt)]
+        if chatbot_config.MAX_CHAT_HISTORY > 0:
+            messages.append(MessagesPlaceholder("chat_history"))
+        messages.append(("human", "{input}"))
+
+        return create_stuff_documents_chain(
+            self.llm,
+            ChatPromptTemplate.from_messages(messages),
+            document_prompt=PromptTemplate.from_template("[{bankfile}] {page_content}"),
+        )
+
+    def prepare_banks(self, bank_keys: List[str]) -> List[str]:
+        """
+        Make sure the given banks are indexed, loading them in parallel from their saved preprocessing
+
+        Returns:
+            The banks that are ready to be searched
+        """
+        def ensure(bank_key: str) -> bool:
+            try:
+                return self.shared_index.ensure_bank(bank_key, persist=chatbot_config.PERSIST_INDEX)
+            except Exception as e:
+                print(f"❌ Could not load {bank_key}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=max(1, len(bank_keys))) as pool:
+            ready = list(pool.map(ensure, bank_keys))
+        return [bank_key for bank_key, ok in zip(bank_keys, ready) if ok]
+
+    def _compare_chain(self, bank_keys: List[str]):
+        """RAG chain retrieving from every bank at once, packed under one context budget"""
+        fetch_k = (chatbot_config.CONTEXT_FETCH_K if chatbot_config.CONTEXT_PACKING_ENABLED
+                   else chatbot_config.SIMILARITY_SEARCH_K)
+        retriever = SharedIndexRetriever(
+            index=self.shared_index,
+            bank_keys=bank_keys,
+            k=fetch_k,
+            metadata_filter=(self.retriever.metadata_filter if self.retriever is not None
+                             else self._role_filter(chatbot_config.RETRIEVAL_ROLES)),
+            # Each bank's own best chunks, so no bank is crowded out of the comparison
+            per_bank=True
+        )
+        retrieval = RunnableLambda(lambda chain_input: chain_input["input"]) | retriever
+        if self.context_packer is not None:
+            retrieval = retrieval | RunnableLambda(partial(self.context_packer.pack, balance_by="bank_key"))
+        return create_retrieval_chain(retrieval, self.compare_document_chain)
+
+    def compare_stream(self, message: str, bank_keys: List[str],
+                       history: Optional[ConversationMemory] = None) -> Iterator[str]:
+        """
+        Answer a question across several banks and stream the response
+
+        The banks' indexes are searched in parallel and the answer takes a
+        single LLM call, so a comparison costs about as much as a normal turn.
+
+        Args:
+            message: User message
+            bank_keys: Banks to compare
+            history: Conversation history owned by the caller (see achat)
+
+        Yields:
+            Pieces of the bot response as they are generated
+        """
+        ready = self.prepare_banks(bank_keys)
+        if len(ready) < 2:
+            yield "❌ A comparison needs at least two banks with processed transcripts."
+            return
+
+        answer_parts = []
+        failed = False
+        turn = TurnTelemetry("compare", ",".join(ready))
+        try:
+            chain = self._compare_chain(ready)
+            chain_input = self._build_chain_input(message, history)
+            for chunk in chain.stream(chain_input, config={"callbacks": [turn]}):
+                token = chunk.get("answer")
+                if token:
+                    answer_parts.append(token)
+                    yield token
+
+        except Exception as e:
+            failed = True
+            error_msg = f"❌ Error generating response: {e}"
+            print(error_msg)
+            yield error_msg
+
+        finally:
+            self._finish_turn(turn, error=failed)
+            if not failed and answer_parts:
+                self._update_history(message, "".join(answer_parts), history)
+
+    def compare(self, message: str, bank_keys: List[str],
+                history: Optional[ConversationMemory] = None) -> str:
+        """Answer a question across several banks (see compare_stream)"""
+        return "".join(self.compare_stream(message, bank_keys, history))
+
+    def new_memory(self) -> ConversationMemory:
+        """Create an empty conversation history, e.g. one per concurrent session"""
+        return self.resources.new_memory()
+
+    def _get_recent_history(self, history: Optional[ConversationMemory] = None) -> List[BaseMessage]:
+        """Get the summary and recent exchanges that go into the prompt"""
         if chatbot_config.MAX_CHAT_HISTORY <= 0:
             return []
 
-        # Get last N exchanges (N*2 messages since each exchange = human + ai)
-        max_messages = chatbot_config.MAX_CHAT_HISTORY * 2
-        return self.chat_history[-max_messages:] if len(self.chat_history) > max_messages else self.chat_history
+        history = self.memory if history is None else history
+        return history.prompt_messages()
 
-    def chat(self, message: str) -> str:
+    def chat(self, message: str, history: Optional[ConversationMemory] = None) -> str:
         """
         Send a message to the chatbot and get response
 
         Args:
             message: User message
+            history: Conversation history owned by the caller (see achat)
 
         Returns:
             Bot response
@@ -190,51 +823,390 @@ class SimplePDFChatbot:
         if not self.rag_chain:
             return "❌ Please upload and process a PDF file first."
 
+        turn = self._start_turn("chat")
         try:
-            # Prepare input
-            chain_input = {
-                "input": message
-            }
+            # Exact metric lookups are answered from the extracted figures
+            direct = self._metric_answer(message, turn)
+            if direct is not None:
+                self._update_history(message, direct, history)
+                self._finish_turn(turn)
+                return direct
 
-            # Add chat history if enabled
-            if chatbot_config.MAX_CHAT_HISTORY > 0:
-                chain_input["chat_history"] = self._get_recent_history()
+            # Repeated history-independent questions skip retrieval and the LLM
+            query_vector = self._query_vector(message, history)
+            cached = self._lookup_answer(query_vector, message)
+            if cached is not None:
+                turn.cached = True
+                self._update_history(message, cached, history)
+                self._finish_turn(turn)
+                return cached
+
+            chain_input = self._build_chain_input(message, history)
 
             # Get response from RAG chain
-            response = self.rag_chain.invoke(chain_input)
+            response = self._run_chain(message, chain_input, turn)
             answer = response["answer"]
 
-            # Update chat history
-            if chatbot_config.MAX_CHAT_HISTORY > 0:
-                self.chat_history.append(HumanMessage(content=message))
-                self.chat_history.append(AIMessage(content=answer))
+            if turn.route != "extractive":
+                self._store_answer(query_vector, message, response.get("context", []), answer)
+            self._update_history(message, answer, history)
+            self._finish_turn(turn)
+            return answer
+
+        except Exception as e:
+            self._finish_turn(turn, error=True)
+            error_msg = f"❌ Error generating response: {e}"
+            print(error_msg)
+            return error_msg
+
+    def chat_stream(self, message: str, history: Optional[ConversationMemory] = None) -> Iterator[str]:
+        """
+        Send a message to the chatbot and stream the response
+
+        Chat history is updated once the stream finishes, or with the partial
+        answer if the consumer stops iterating early.
+
+        Args:
+            message: User message
+            history: Conversation history owned by the caller (see achat)
+
+        Yields:
+            Pieces of the bot response as they are generated
+        """
+        if not self.rag_chain:
+            yield "❌ Please upload and process a PDF file first."
+            return
+
+        answer_parts = []
+        context = []
+        failed = False
+        turn = self._start_turn("stream")
+        try:
+            direct = self._metric_answer(message, turn)
+            if direct is not None:
+                answer_parts.append(direct)
+                yield direct
+                return
+
+            query_vector = self._query_vector(message, history)
+            cached = self._lookup_answer(query_vector, message)
+            if cached is not None:
+                turn.cached = True
+                answer_parts.append(cached)
+                yield cached
+                return
+
+            chain_input = self._build_chain_input(message, history)
+            for chunk in self._stream_chain(message, chain_input, turn):
+                context = chunk.get("context", context)
+                token = chunk.get("answer")
+                if token:
+                    answer_parts.append(token)
+                    yield token
+            if turn.route != "extractive":
+                self._store_answer(query_vector, message, context, "".join(answer_parts))
+
+        except Exception as e:
+            failed = True
+            error_msg = f"❌ Error generating response: {e}"
+            print(error_msg)
+            yield error_msg
+
+        finally:
+            self._finish_turn(turn, error=failed)
+            if not failed and answer_parts:
+                self._update_history(message, "".join(answer_parts), history)
+
+    async def achat(self, message: str, history: Optional[ConversationMemory] = None) -> str:
+        """
+        Async version of chat, for serving many conversations on one event loop
+
+        Args:
+            message: User message
+            history: Conversation history owned by the caller; defaults to the
+                chatbot's own history. Pass one new_memory() per conversation
+                to run several conversations concurrently.
+
+        Returns:
+            Bot response
+        """
+        if not self.rag_chain:
+            return "❌ Please upload and process a PDF file first."
+
+        turn = self._start_turn("achat")
+        try:
+            direct = self._metric_answer(message, turn)
+            if direct is not None:
+                self._update_history(message, direct, history)
+                self._finish_turn(turn)
+                return direct
+
+            query_vector = await self._aquery_vector(message, history)
+            cached = self._lookup_answer(query_vector, message)
+            if cached is not None:
+                turn.cached = True
+                self._update_history(message, cached, history)
+                self._finish_turn(turn)
+                return cached
+
+            chain_input = self._build_chain_input(message, history)
+
+            # Retrieval and generation both run without blocking the loop
+            response = await self._arun_chain(message, chain_input, turn)
+            answer = response["answer"]
 
+            if turn.route != "extractive":
+                self._store_answer(query_vector, message, response.get("context", []), answer)
+            self._update_history(message, answer, history)
+            self._finish_turn(turn)
             return answer
 
         except Exception as e:
+            self._finish_turn(turn, error=True)
             error_msg = f"❌ Error generating response: {e}"
             print(error_msg)
             return error_msg
 
-    def clear_chat_history(self):
-        """Clear the chat history"""
-        self.chat_history = []
+    async def astream(self, message: str, history: Optional[ConversationMemory] = None) -> AsyncIterator[str]:
+        """
+        Async version of chat_stream
+
+        Args:
+            message: User message
+            history: Conversation history owned by the caller (see achat)
+
+        Yields:
+            Pieces of the bot response as they are generated
+        """
+        if not self.rag_chain:
+            yield "❌ Please upload and process a PDF file first."
+            return
+
+        answer_parts = []
+        context = []
+        failed = False
+        turn = self._start_turn("astream")
+        try:
+            direct = self._metric_answer(message, turn)
+            if direct is not None:
+                answer_parts.append(direct)
+                yield direct
+                return
+
+            query_vector = await self._aquery_vector(message, history)
+            cached = self._lookup_answer(query_vector, message)
+            if cached is not None:
+                turn.cached = True
+                answer_parts.append(cached)
+                yield cached
+                return
+
+            chain_input = self._build_chain_input(message, history)
+            async for chunk in self._astream_chain(message, chain_input, turn):
+                context = chunk.get("context", context)
+                token = chunk.get("answer")
+                if token:
+                    answer_parts.append(token)
+                    yield token
+            if turn.route != "extractive":
+                self._store_answer(query_vector, message, context, "".join(answer_parts))
+
+        except Exception as e:
+            failed = True
+            error_msg = f"❌ Error generating response: {e}"
+            print(error_msg)
+            yield error_msg
+
+        finally:
+            self._finish_turn(turn, error=failed)
+            if not failed and answer_parts:
+                self._update_history(message, "".join(answer_parts), history)
+
+    def _start_turn(self, mode: str) -> TurnTelemetry:
+        return TurnTelemetry(mode, self.bank_key)
+
+    def _finish_turn(self, turn: TurnTelemetry, error: bool = False):
+        metrics = turn.finish(error=error)
+        if self.telemetry is not None:
+            self.telemetry.record(metrics)
+        if turn.route_decision is not None and self.latency_policy is not None:
+            self.latency_policy.record(turn.route_decision, metrics)
+
+    def get_turn_stats(self) -> Dict[str, Any]:
+        """Return rolling p50 / p95 latency and token figures of recent turns"""
+        return self.telemetry.get_summary() if self.telemetry else {}
+
+    def _answer_cache_applies(self, message: str, history: Optional[ConversationMemory] = None) -> bool:
+        """The answer cache only serves turns that do not depend on earlier ones"""
+        return (
+            self.answer_cache is not None
+            and self.document_key is not None
+            and is_history_independent(message, bool(self._get_recent_history(history)))
+        )
+
+    def _query_vector(self, message: str, history: Optional[ConversationMemory] = None) -> Optional[List[float]]:
+        """Embed the question for the answer cache, or None when the cache does not apply"""
+        if not self._answer_cache_applies(message, history):
+            return None
+        return self.embeddings.embed_query(message)
+
+    async def _aquery_vector(self, message: str, history: Optional[ConversationMemory] = None) -> Optional[List[float]]:
+        """Async version of _query_vector"""
+        if not self._answer_cache_applies(message, history):
+            return None
+        return await self.embeddings.aembed_query(message)
+
+    def _answer_cache_key(self) -> str:
+        """Document key plus the active speaker filter, so filtered and unfiltered answers never mix"""
+        metadata_filter = self.retriever.metadata_filter if self.retriever is not None else None
+        if not metadata_filter:
+            return self.document_key
+        return f"{self.document_key}|{json.dumps(metadata_filter, sort_keys=True, default=str)}"
+
+    def _lookup_answer(self, query_vector: Optional[List[float]], message: str) -> Optional[str]:
+        if query_vector is None:
+            return None
+        return self.answer_cache.lookup(self._answer_cache_key(), query_vector, message)
+
+    def _store_answer(self, query_vector: Optional[List[float]], message: str,
+                      context: List[Document], answer: str):
+        """Cache a completed answer with the tokens a repeat of this turn would cost"""
+        if query_vector is None or not answer:
+            return
+        prompt = self.system_prompt + "".join(doc.page_content for doc in context) + message
+        tokens = (count_tokens(prompt, chatbot_config.OPENAI_MODEL)
+                  + count_tokens(answer, chatbot_config.OPENAI_MODEL))
+        self.answer_cache.store(self._answer_cache_key(), query_vector, message, answer, tokens)
+
+    def get_answer_cache_stats(self) -> Dict[str, float]:
+        """Return hit rate and saved tokens of the semantic answer cache"""
+        return self.answer_cache.get_stats() if self.answer_cache else {}
+
+    def _build_chain_input(self, message: str, history: Optional[ConversationMemory] = None) -> Dict[str, Any]:
+        """Prepare the RAG chain input for a user message"""
+        chain_input = {
+            "input": message
+        }
+
+        # Add chat history if enabled
+        if chatbot_config.MAX_CHAT_HISTORY > 0:
+            chain_input["chat_history"] = self._get_recent_history(history)
+
+        return chain_input
+
+    def _update_history(self, message: str, answer: str, history: Optional[ConversationMemory] = None):
+        """Record a completed exchange in the chat history"""
+        history = self.memory if history is None else history
+        history.add(message, answer)
+
+    def clear_chat_history(self, history: Optional[ConversationMemory] = None):
+        """Clear a conversation's history, the chatbot's own by default"""
+        history = self.memory if history is None else history
+        history.clear()
         print("✅ Chat history cleared")
 
-    def get_chat_history(self) -> List[Dict[str, str]]:
+    def get_chat_history(self, history: Optional[ConversationMemory] = None) -> List[Dict[str, str]]:
         """
         Get chat history in a simple format
 
+        Args:
+            history: Conversation history owned by the caller; the chatbot's own by default
+
         Returns:
             List of message dictionaries
         """
-        messages = []
-        for msg in self.chat_history:
-            if isinstance(msg, HumanMessage):
-                messages.append({"role": "user", "content": msg.content})
-            elif isinstance(msg, AIMessage):
-                messages.append({"role": "assistant", "content": msg.content})
-        return messages
+        history = self.memory if history is None else history
+        return history.display_messages()
+
+
+class BankChatbots:
+    """
+    One chatbot per bank over the process-wide resources, for in-process front ends
+
+    A bank's chatbot is indexed before it is published, so a session asking
+    about that bank never sees a half set up retriever or chain, and no
+    session's chatbot is re-pointed at another bank.
+    """
+
+    def __init__(self, resources: Optional[ChatResources] = None):
+        self.resources = resources or get_chat_resources()
+        self._chatbots: Dict[str, SimplePDFChatbot] = {}
+        self._lock = threading.Lock()
+
+    def get(self, bank_key: Optional[str]) -> Optional[SimplePDFChatbot]:
+        """Chatbot of a bank, or None until its transcript is indexed"""
+        with self._lock:
+            return self._chatbots.get(bank_key or DEFAULT_PARTITION)
+
+    def warm_up(self, raw_text: str, bank_key: Optional[str] = None,
+                text_sections: Optional[List[Dict[str, Any]]] = None,
+                progress: Optional[ProgressCallback] = None) -> str:
+        """
+        Index a bank's transcript and summary tree in the shared index, touching no chatbot
+
+        This is the slow part (chunking, embedding, summarizing); it runs under
+        the shared index's per-bank lock, so sessions warming up the same bank
+        wait for one another instead of indexing it twice.
+
+        Returns:
+            The index key of the transcript
+        """
+        persist = chatbot_config.PERSIST_INDEX and bool(bank_key)
+        partition = bank_key or DEFAULT_PARTITION
+        shared_index = self.resources.shared_index
+        index_key = shared_index.index_document(
+            partition, raw_text, text_sections, persist=persist, progress=progress
+        )
+        if self.resources.summary_tree_builder is not None:
+            shared_index.ensure_summaries(
+                partition, raw_text, self.resources.summary_tree_builder, text_sections,
+                persist=persist, progress=progress
+            )
+        return index_key
+
+    def bind(self, raw_text: str, bank_key: Optional[str] = None,
+             text_sections: Optional[List[Dict[str, Any]]] = None) -> bool:
+        """
+        Build a bank's chatbot over its warmed-up index and publish it
+
+        Returns:
+            True if successful, False otherwise (the bank's previous chatbot stays published)
+        """
+        bot = SimplePDFChatbot(self.resources)
+        if not bot.process_text(raw_text, bank_key, text_sections):
+            return False
+        with self._lock:
+            self._chatbots[bot.bank_key] = bot
+        return True
+
+    def process_text(self, raw_text: str, bank_key: Optional[str] = None,
+                     text_sections: Optional[List[Dict[str, Any]]] = None,
+                     progress: Optional[ProgressCallback] = None) -> bool:
+        """Warm up a bank's index, then bind and publish its chatbot; True if successful"""
+        self.warm_up(raw_text, bank_key, text_sections, progress)
+        return self.bind(raw_text, bank_key, text_sections)
+
+    def new_memory(self) -> ConversationMemory:
+        """Create an empty conversation history; histories are not tied to a bank"""
+        return self.resources.new_memory()
+
+    def clear_chat_history(self, history: ConversationMemory):
+        history.clear()
+        print("✅ Chat history cleared")
+
+    def get_chat_history(self, history: ConversationMemory) -> List[Dict[str, str]]:
+        return history.display_messages()
+
+    def get_turn_stats(self) -> Dict[str, Any]:
+        """Rolling latency and token figures of every bank's turns"""
+        telemetry = self.resources.telemetry
+        return telemetry.get_summary() if telemetry else {}
+
+    def get_answer_cache_stats(self) -> Dict[str, float]:
+        """Hit rate and saved tokens of the answer cache shared by every bank"""
+        answer_cache = self.resources.answer_cache
+        return answer_cache.get_stats() if answer_cache else {}
+
 
 def save_uploaded_file(uploaded_file) -> str:
 
@@ -0,0 +1,169 @@
+"""
+Chat Service Client
+HTTP client for chat_service.py with the same interface as SimplePDFChatbot,
+so the Streamlit app can run as a thin front end
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+from loguru import logger
+
+
+class ChatServiceClient:
+    """
+    One conversation with a remote chat service
+
+    The conversation history lives in the service session, so the history
+    arguments of the SimplePDFChatbot interface are accepted and ignored.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.http = requests.Session()
+        self.bank_key: Optional[str] = None
+        self.session_id: Optional[str] = None
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def _ensure_session(self) -> Optional[str]:
+        """Open a session for the current bank if there is none (e.g. after it expired)"""
+        if self.session_id is None and self.bank_key is not None:
+            response = self.http.post(self._url("/sessions"), json={"bank_key": self.bank_key},
+                                      timeout=self.timeout)
+            response.raise_for_status()
+            self.session_id = response.json()["session_id"]
+        return self.session_id
+
+    def process_text(self, raw_text: str, bank_key: Optional[str] = None,
+                     text_sections: Optional[List[Dict[str, Any]]] = None,
+                     progress: Optional[Callable[[str, int, int], None]] = None) -> bool:
+        """
+        Index a transcript on the service and open a session for it
+
+        Args:
+            raw_text: Transcript text
+            bank_key: Bank the transcript belongs to
+            text_sections: Speaker sections from preprocessing, used for chunk metadata
+            progress: Optional callback; the service only reports that indexing started
+
+        Returns:
+            True if successful, False otherwise
+        """
+        bank_key = bank_key or "default"
+        if progress is not None:
+            progress("indexing", 0, 0)
+        try:
+            # Indexing a long transcript can take minutes, no read timeout
+            response = self.http.post(
+                self._url("/documents"),
+                json={"bank_key": bank_key, "text": raw_text, "text_sections": text_sections},
+                timeout=None
+            )
+            response.raise_for_status()
+            self.bank_key = bank_key
+            self.session_id = None
+            self._ensure_session()
+            print("🎉 PDF processed successfully! Ready to chat.")
+            return True
+        except requests.RequestException as e:
+            print(f"❌ Error processing PDF: {e}")
+            return False
+
+    def new_memory(self) -> None:
+        """The service keeps the history; there is nothing to hold locally"""
+        return None
+
+    def chat(self, message: str, history: Any = None) -> str:
+        """Send a message and return the full response"""
+        if self.bank_key is None:
+            return "❌ Please upload and process a PDF file first."
+        try:
+            response = self._post_message("chat", message)
+            return response.json()["answer"]
+        except requests.RequestException as e:
+            return f"❌ Error generating response: {e}"
+
+    def chat_stream(self, message: str, history: Any = None) -> Iterator[str]:
+        """Send a message and yield the response as it is generated"""
+        if self.bank_key is None:
+            yield "❌ Please upload and process a PDF file first."
+            return
+        yield from self._stream("stream", message)
+
+    def compare_stream(self, message: str, bank_keys: List[str], history: Any = None) -> Iterator[str]:
+        """Ask a question across several banks and yield the response as it is generated"""
+        if self.bank_key is None:
+            yield "❌ Please upload and process a PDF file first."
+            return
+        yield from self._stream("compare", message, bank_keys=bank_keys)
+
+    def _stream(self, endpoint: str, message: str, **fields: Any) -> Iterator[str]:
+        try:
+            response = self._post_message(endpoint, message, stream=True, **fields)
+        except requests.RequestException as e:
+            yield f"❌ Error generating response: {e}"
+            return
+
+        try:
+            for token in response.iter_content(chunk_size=None, decode_unicode=True):
+                if token:
+                    yield token
+        except requests.RequestException as e:
+            yield f"❌ Error generating response: {e}"
+        finally:
+            # Closing early tells the service the client went away
+            response.close()
+
+    def _post_message(self, endpoint: str, message: str, stream: bool = False,
+                      **fields: Any) -> requests.Response:
+        """Post a message to the session, reopening it once if the service forgot it"""
+        for attempt in range(2):
+            response = self.http.post(
+                self._url(f"/sessions/{self._ensure_session()}/{endpoint}"),
+                json={"message": message, **fields}, timeout=self.timeout, stream=stream
+            )
+            if response.status_code == 404 and attempt == 0:
+                logger.info("Chat session expired, opening a new one")
+                response.close()
+                self.session_id = None
+                continue
+            response.raise_for_status()
+            return response
+
+    def get_chat_history(self, history: Any = None) -> List[Dict[str, str]]:
+        if self.session_id is None:
+            return []
+        try:
+            response = self.http.get(self._url(f"/sessions/{self.session_id}"), timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()["history"]
+        except requests.RequestException as e:
+            logger.warning(f"Could not load chat history: {e}")
+            return []
+
+    def clear_chat_history(self, history: Any = None):
+        """Drop the session; the next message opens a fresh one"""
+        if self.session_id is not None:
+            try:
+                self.http.delete(self._url(f"/sessions/{self.session_id}"), timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.warning(f"Could not delete chat session: {e}")
+            self.session_id = None
+        print("✅ Chat history cleared")
+
+    def _get_stats(self) -> Dict[str, Any]:
+        try:
+            response = self.http.get(self._url("/stats"), timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException:
+            return {}
+
+    def get_turn_stats(self) -> Dict[str, Any]:
+        return self._get_stats().get("turns", {})
+
+    def get_answer_cache_stats(self) -> Dict[str, float]:
+        return self._get_stats().get("answer_cache", {})
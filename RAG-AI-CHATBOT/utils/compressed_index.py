@@ -0,0 +1,246 @@
+"""
+Compressed FAISS Index
+Scalar int8 / IVF-PQ indexes with optional PCA and exact re-scoring of the
+top candidates against float32 vectors kept memory-mapped on disk
+"""
+
+import pickle
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+from langchain_core.embeddings import Embeddings
+from langchain.schema import Document
+from loguru import logger
+
+INDEX_TYPES = ("flat", "sq8", "ivfpq")
+
+# Vectors used to train the coarse and product quantizers
+MAX_TRAINING_VECTORS = 100_000
+
+
+def index_spec(index_type: str = "flat", pca_dim: int = 0, nlist: int = 1024,
+               pq_m: int = 16, pq_bits: int = 8, **_) -> str:
+    """FAISS index factory string for a compression setting"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type: {index_type}")
+    if index_type == "flat":
+        return "Flat"
+    prefix = f"PCA{pca_dim}," if pca_dim else ""
+    if index_type == "sq8":
+        return f"{prefix}SQ8"
+    return f"{prefix}IVF{nlist},PQ{pq_m}x{pq_bits}"
+
+
+def set_nprobe(index, nprobe: int):
+    """Set how many IVF lists a search visits; a no-op for indexes without lists"""
+    faiss = dependable_faiss_import()
+    try:
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", nprobe)
+    except Exception:
+        pass
+
+
+def build_index(vectors: np.ndarray, index_type: str = "sq8", pca_dim: int = 0,
+                nlist: int = 1024, nprobe: int = 16, pq_m: int = 16, pq_bits: int = 8, **_):
+    """
+    Train and fill a compressed index
+
+    The number of IVF lists shrinks with small corpora, and product
+    quantization falls back to int8 when there are too few vectors to train it.
+
+    Args:
+        vectors: float32 matrix of chunk embeddings
+
+    Returns:
+        The populated faiss index
+    """
+    faiss = dependable_faiss_import()
+    count, dim = vectors.shape
+    if index_type == "ivfpq":
+        if count < 2 ** pq_bits:
+            logger.warning(f"{count} vectors are too few to train PQ{pq_m}x{pq_bits}, using SQ8")
+            index_type = "sq8"
+        else:
+            # FAISS wants roughly 39 training points per list
+            nlist = max(1, min(nlist, count // 39))
+            if (pca_dim or dim) % pq_m:
+                raise ValueError(f"PQ sub-quantizers ({pq_m}) must divide the dimension ({pca_dim or dim})")
+
+    spec = index_spec(index_type, pca_dim, nlist, pq_m, pq_bits)
+    index = faiss.index_factory(dim, spec, faiss.METRIC_L2)
+
+    if not index.is_trained:
+        sample = vectors
+        if count > MAX_TRAINING_VECTORS:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(count, MAX_TRAINING_VECTORS, replace=False)]
+        index.train(sample)
+    index.add(vectors)
+    set_nprobe(index, nprobe)
+
+    logger.info(f"Built compressed FAISS index {spec} over {count} vectors")
+    return index
+
+
+def search_candidates(index, query: np.ndarray, k: int, rescore_vectors: Optional[np.ndarray] = None,
+                      rescore_factor: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Search a compressed index, optionally re-scoring candidates exactly
+
+    Args:
+        index: faiss index whose positions line up with rescore_vectors rows
+        query: float32 query vector
+        k: Number of results
+        rescore_vectors: Original vectors (usually a read-only memmap)
+        rescore_factor: Candidates fetched per result for re-scoring; 0 disables it
+
+    Returns:
+        (squared L2 distances, index positions), nearest first
+    """
+    query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+    rescore = rescore_vectors is not None and rescore_factor > 0
+    fetch = min(index.ntotal, k * rescore_factor if rescore else k)
+    if fetch <= 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    distances, positions = index.search(query, fetch)
+    valid = positions[0] >= 0
+    distances, positions = distances[0][valid], positions[0][valid]
+    if not rescore:
+        return distances[:k], positions[:k]
+
+    # Only the candidate rows are read from the memmap
+    order = np.argsort(positions)
+    rows = np.asarray(rescore_vectors[positions[order]], dtype=np.float32)
+    exact = np.empty(len(positions), dtype=np.float32)
+    exact[order] = ((rows - query) ** 2).sum(axis=1)
+
+    best = np.argsort(exact)[:k]
+    return exact[best], positions[best]
+
+
+class CompressedFAISS(FAISS):
+    """LangChain FAISS store over a compressed index with exact re-scoring"""
+
+    def __init__(self, *args, rescore_vectors: Optional[np.ndarray] = None,
+                 rescore_factor: int = 4, nprobe: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rescore_vectors = rescore_vectors
+        self.rescore_factor = rescore_factor
+        if nprobe:
+            set_nprobe(self.index, nprobe)
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Dict[str, Any]] = None,
+                                               fetch_k: int = 20, **kwargs) -> List[Tuple[Document, float]]:
+        # A metadata filter is applied after the search, so fetch extra candidates for it
+        fetch = k if filter is None else max(fetch_k, k)
+        distances, positions = search_candidates(
+            self.index, np.asarray(embedding), fetch, self.rescore_vectors, self.rescore_factor
+        )
+
+        filter_func = self._create_filter_func(filter) if filter is not None else None
+        results = []
+        for distance, position in zip(distances, positions):
+            doc = self.docstore.search(self.index_to_docstore_id[int(position)])
+            if not isinstance(doc, Document):
+                continue
+            if filter_func is not None and not filter_func(doc.metadata):
+                continue
+            results.append((doc, float(distance)))
+            if len(results) == k:
+                break
+        return results
+
+    def save_local(self, folder_path: str, index_name: str = "index") -> None:
+        super().save_local(folder_path, index_name)
+        if self.rescore_vectors is not None:
+            path = Path(folder_path) / f"{index_name}.rescore.npy"
+            np.save(path, np.asarray(self.rescore_vectors, dtype=np.float32))
+            # From here on the float vectors live on disk, not in RAM
+            self.rescore_vectors = np.load(path, mmap_mode="r")
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Embeddings, index_name: str = "index",
+                   mmap: bool = False, **kwargs) -> "CompressedFAISS":
+        store = load_faiss_store(folder_path, embeddings, index_name, mmap=mmap, store_class=cls, **kwargs)
+        path = Path(folder_path) / f"{index_name}.rescore.npy"
+        if path.exists():
+            store.rescore_vectors = np.load(path, mmap_mode="r")
+        return store
+
+
+def read_faiss_index(path: str, mmap: bool = False):
+    """
+    Read a FAISS index file, memory-mapped and read-only when asked
+
+    A memory-mapped index is paged in from the OS page cache on demand, so
+    processes serving the same index share its pages and an index nobody
+    queries costs no RAM. Index types the installed FAISS cannot map are
+    read into memory instead.
+    """
+    faiss = dependable_faiss_import()
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            logger.warning(f"Could not memory-map {path}, reading it into memory: {e}")
+    return faiss.read_index(path)
+
+
+def load_faiss_store(folder_path: str, embeddings: Embeddings, index_name: str = "index",
+                     mmap: bool = False, store_class=FAISS, **kwargs) -> FAISS:
+    """
+    Load a store written by FAISS.save_local, optionally memory-mapping its index
+
+    Memory-mapped stores are read-only: adding or deleting vectors fails.
+    The docstore (chunk texts and metadata) is always loaded into memory.
+    """
+    path = Path(folder_path)
+    index = read_faiss_index(str(path / f"{index_name}.faiss"), mmap)
+    # Written by this application's own save_local, never by third parties
+    with open(path / f"{index_name}.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    store = store_class(embeddings, index, docstore, index_to_docstore_id, **kwargs)
+    store.mmapped = mmap
+    return store
+
+
+def is_compressed(index_options: Optional[Dict[str, Any]]) -> bool:
+    return bool(index_options) and index_options.get("index_type", "flat") != "flat"
+
+
+def create_faiss_store(chunks: List[Document], embeddings: Embeddings, ids: Optional[List[str]] = None,
+                       index_options: Optional[Dict[str, Any]] = None) -> FAISS:
+    """
+    Build a FAISS store from chunks, flat or compressed depending on the options
+
+    Args:
+        index_options: index_type, pca_dim, nlist, nprobe, pq_m, pq_bits, rescore_factor
+
+    Returns:
+        A FAISS store (a CompressedFAISS one for compressed index types)
+    """
+    if not is_compressed(index_options):
+        return FAISS.from_documents(chunks, embeddings, ids=ids)
+
+    ids = ids or [str(uuid.uuid4()) for _ in chunks]
+    vectors = np.asarray(
+        embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32
+    )
+    index = build_index(vectors, **index_options)
+    rescore_factor = index_options.get("rescore_factor", 0)
+
+    return CompressedFAISS(
+        embeddings,
+        index,
+        InMemoryDocstore(dict(zip(ids, chunks))),
+        dict(enumerate(ids)),
+        rescore_vectors=vectors if rescore_factor > 0 else None,
+        rescore_factor=rescore_factor,
+    )
@@ -0,0 +1,130 @@
+"""
+Context Packer
+Fits retrieved chunks into a token budget before they reach the RAG prompt
+"""
+
+from typing import Dict, List, Optional
+
+from langchain.schema import Document
+from loguru import logger
+
+from utils.tokens import count_tokens
+
+
+class ContextPacker:
+    """Drops weak chunks, merges overlapping neighbours and fills a token budget"""
+
+    def __init__(self, token_budget: int = 1200, relevance_floor: float = 0.55,
+                 model: str = "gpt-4o-mini"):
+        self.token_budget = token_budget
+        self.relevance_floor = relevance_floor
+        self.model = model
+
+    @staticmethod
+    def _position(doc: Document):
+        metadata = doc.metadata
+        # Speaker-section chunks have a section instead of a page; offsets are relative to either
+        return (
+            metadata.get("bank_key", ""), metadata.get("page", 0),
+            metadata.get("section", 0), metadata.get("start_index", 0),
+        )
+
+    def _merge_neighbours(self, docs: List[Document]) -> List[Document]:
+        """
+        Merge chunks of the same page or section whose character ranges overlap
+
+        Offsets are only trusted when the overlapping text really is the same
+        in both chunks; otherwise the chunks are kept apart.
+        """
+        merged: List[Document] = []
+        for doc in sorted(docs, key=self._position):
+            start = doc.metadata.get("start_index")
+            if merged and start is not None:
+                previous = merged[-1]
+                same_page = self._position(previous)[:3] == self._position(doc)[:3]
+                previous_end = previous.metadata["start_index"] + len(previous.page_content)
+                overlap = previous_end - start
+                if same_page and 0 < overlap <= len(doc.page_content) and \
+                        previous.page_content[-overlap:] == doc.page_content[:overlap]:
+                    # Append only the part of the chunk the previous one does not cover
+                    tail = doc.page_content[overlap:]
+                    merged[-1] = Document(
+                        page_content=previous.page_content + tail,
+                        metadata={
+                            **previous.metadata,
+                            "score": max(previous.metadata.get("score", 0.0), doc.metadata.get("score", 0.0)),
+                        },
+                    )
+                    continue
+            merged.append(doc)
+        return merged
+
+    @staticmethod
+    def _score(doc: Document) -> float:
+        return doc.metadata.get("score", 1.0)
+
+    def _interleave(self, docs: List[Document], balance_by: str) -> List[Document]:
+        """Order chunks by their rank within their group, so every group gets a share of the budget"""
+        groups: Dict[str, List[Document]] = {}
+        for doc in sorted(docs, key=self._score, reverse=True):
+            groups.setdefault(doc.metadata.get(balance_by, ""), []).append(doc)
+        ranked_groups = sorted(groups.values(), key=lambda group: self._score(group[0]), reverse=True)
+        return [
+            group[rank]
+            for rank in range(max(len(group) for group in ranked_groups))
+            for group in ranked_groups if rank < len(group)
+        ]
+
+    def pack(self, docs: List[Document], balance_by: Optional[str] = None) -> List[Document]:
+        """
+        Select the context for one turn
+
+        Args:
+            docs: Retrieved chunks with a relevance "score" in their metadata
+            balance_by: Metadata field (e.g. "bank_key") whose values should share
+                the budget evenly instead of the best-scoring value taking it all
+
+        Returns:
+            Chunks within the token budget, in transcript order
+        """
+        if not docs:
+            return []
+
+        tokens_before = sum(count_tokens(doc.page_content, self.model) for doc in docs)
+        by_relevance = sorted(docs, key=self._score, reverse=True)
+
+        # Identical text (e.g. boilerplate repeated across transcripts) is sent once
+        seen, unique = set(), []
+        for doc in by_relevance:
+            if doc.page_content not in seen:
+                seen.add(doc.page_content)
+                unique.append(doc)
+
+        # Always keep the best chunk (of each group) so the model sees something to ground on
+        best = {doc.metadata.get(balance_by, "") if balance_by else "": doc for doc in reversed(unique)}
+        kept = [
+            doc for doc in unique
+            if self._score(doc) >= self.relevance_floor or any(doc is top for top in best.values())
+        ]
+        candidates = self._merge_neighbours(kept)
+
+        ranked = sorted(candidates, key=self._score, reverse=True)
+        if balance_by:
+            ranked = self._interleave(ranked, balance_by)
+        selected, used = [], 0
+        for doc in ranked:
+            tokens = count_tokens(doc.page_content, self.model)
+            if used + tokens <= self.token_budget:
+                selected.append(doc)
+                used += tokens
+
+        if not selected:
+            # Even the best chunk is over budget: keep it rather than send no context
+            selected = [ranked[0]]
+            used = count_tokens(ranked[0].page_content, self.model)
+
+        logger.info(
+            f"Context packing: {len(docs)} chunks / {tokens_before} tokens -> "
+            f"{len(selected)} chunks / {used} tokens (budget {self.token_budget})"
+        )
+        return sorted(selected, key=self._position)
@@ -0,0 +1,156 @@
+"""
+Conversation Memory
+Bounded chat history: the last exchanges verbatim, older ones folded into a
+rolling summary by a background worker
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from loguru import logger
+
+# (previous summary, exchanges to fold) -> new summary
+Summarizer = Callable[[str, List[Tuple[str, str]]], str]
+
+# Summaries are written off the request path, shared by every conversation
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+
+
+class ConversationMemory:
+    """
+    One conversation's history with a hard cap on what it keeps
+
+    The last prompt_turns exchanges are sent to the model verbatim. Exchanges
+    that leave that window are folded into a rolling summary in the
+    background, and at most max_turns exchanges are kept for display, so
+    both memory and prompt size stay constant however long the session runs.
+    """
+
+    def __init__(self, prompt_turns: int = 5, max_turns: int = 50,
+                 summarizer: Optional[Summarizer] = None):
+        self.prompt_turns = prompt_turns
+        self.max_turns = max(max_turns, prompt_turns)
+        self.summarizer = summarizer
+
+        self._turns: deque = deque(maxlen=self.max_turns)
+        # Exchanges that left the prompt window and are not in the summary yet
+        self._to_fold: deque = deque(maxlen=self.max_turns)
+        # Exchanges being summarized right now
+        self._in_flight: List[Tuple[str, str]] = []
+        self.summary = ""
+        self._folding = False
+        # Set while no summary is being written
+        self._idle = threading.Event()
+        self._idle.set()
+        # Bumped by clear() so a summary finishing afterwards is discarded
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._turns)
+
+    def add(self, user: str, assistant: str):
+        """Record a completed exchange and schedule folding of the one leaving the prompt window"""
+        with self._lock:
+            self._turns.append((user, assistant))
+            if self.summarizer is not None and len(self._turns) > self.prompt_turns:
+                self._to_fold.append(self._turns[-self.prompt_turns - 1])
+        self._schedule_fold()
+
+    def _schedule_fold(self):
+        with self._lock:
+            start = self.summarizer is not None and bool(self._to_fold) and not self._folding
+            if start:
+                self._folding = True
+                self._idle.clear()
+        if start:
+            _summary_executor.submit(self._fold)
+
+    def _fold(self):
+        """Fold pending exchanges into the summary until none are left"""
+        while True:
+            with self._lock:
+                if not self._to_fold:
+                    self._folding = False
+                    self._idle.set()
+                    return
+                pending = list(self._to_fold)
+                self._to_fold.clear()
+                self._in_flight = pending
+                previous = self.summary
+                generation = self._generation
+            try:
+                summary = self.summarizer(previous, pending)
+            except Exception as e:
+                # Keep the old summary; these exchanges are simply not summarized
+                logger.warning(f"Conversation summary failed: {e}")
+                with self._lock:
+                    self._in_flight = []
+                continue
+            with self._lock:
+                self._in_flight = []
+                if generation == self._generation:
+                    self.summary = summary
+
+    def prompt_messages(self) -> List[BaseMessage]:
+        """Summary of older exchanges (if any) followed by the recent ones"""
+        with self._lock:
+            if self.prompt_turns <= 0:
+                return []
+            recent = list(self._turns)[-self.prompt_turns:]
+            summary = self.summary
+
+        messages: List[BaseMessage] = []
+        if summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+        for user, assistant in recent:
+            messages.append(HumanMessage(content=user))
+            messages.append(AIMessage(content=assistant))
+        return messages
+
+    def display_messages(self) -> List[Dict[str, str]]:
+        """Kept exchanges as role / content dictionaries for the UI"""
+        with self._lock:
+            turns = list(self._turns)
+        messages = []
+        for user, assistant in turns:
+            messages.append({"role": "user", "content": user})
+            messages.append({"role": "assistant", "content": assistant})
+        return messages
+
+    def wait_for_summary(self, timeout: Optional[float] = None) -> bool:
+        """Block until no summary is being written; False if the timeout expired first"""
+        return self._idle.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable state, for keeping conversations in an external session store"""
+        with self._lock:
+            return {
+                "turns": [list(turn) for turn in self._turns],
+                "to_fold": [list(turn) for turn in self._in_flight + list(self._to_fold)],
+                "summary": self.summary,
+            }
+
+    def load_dict(self, state: Dict[str, Any]):
+        """Restore state saved by to_dict, resuming any summary that was still pending"""
+        with self._lock:
+            self._turns.clear()
+            self._turns.extend(tuple(turn) for turn in state.get("turns", []))
+            self._to_fold.clear()
+            self._to_fold.extend(tuple(turn) for turn in state.get("to_fold", []))
+            self._in_flight = []
+            self.summary = state.get("summary", "")
+            self._generation += 1
+        self._schedule_fold()
+
+    def clear(self):
+        with self._lock:
+            self._turns.clear()
+            self._to_fold.clear()
+            self._in_flight = []
+            self.summary = ""
+            self._generation += 1
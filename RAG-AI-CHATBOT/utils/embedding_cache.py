@@ -0,0 +1,231 @@
+"""
+Embedding Cache
+SQLite-backed, size-bounded LRU cache in front of any LangChain embeddings
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+# LRU timestamps of cache hits are written in batches of this many keys
+TOUCH_BATCH_SIZE = 256
+
+# Share of max_entries evicted beyond the overflow, so eviction runs once per batch of inserts
+EVICTION_HEADROOM = 0.05
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends chunks it has never seen to the model
+
+    Without an underlying model the cache only replays recorded vectors and
+    raises LookupError for anything it has not seen, which keeps benchmarks
+    on pre-recorded embeddings honest.
+    """
+
+    def __init__(self, embeddings: Optional[Embeddings], model_name: str,
+                 cache_path: str = "data/cache/embeddings.sqlite", max_entries: int = 200000):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+
+        # Hit / miss counters since the cache was opened, for chunks (ingestion) and for queries
+        self.hits = 0
+        self.misses = 0
+        self.query_hits = 0
+        self.query_misses = 0
+
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+        # Row count kept in memory so inserts do not scan the table
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        # key -> last hit time, not yet written to SQLite
+        self._touched: Dict[str, float] = {}
+
+    def _key(self, text: str, kind: str) -> str:
+        """Cache key built from the model name, the embedding kind and the text hash"""
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _encode(vector: List[float]) -> bytes:
+        return array('f', vector).tobytes()
+
+    @staticmethod
+    def _decode(blob: bytes) -> List[float]:
+        vector = array('f')
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors; their LRU timestamps are refreshed in batches"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = self._decode(blob)
+
+            if found:
+                now = time.time()
+                self._touched.update((key, now) for key in found)
+                if len(self._touched) >= TOUCH_BATCH_SIZE:
+                    self._flush_touched()
+                    self._conn.commit()
+        return found
+
+    def _flush_touched(self):
+        """Write pending LRU timestamps; the caller holds the lock and commits"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _put_many(self, items: Dict[str, List[float]]):
+        """Store new vectors and evict the least recently used ones over the cap"""
+        now = time.time()
+        with self._lock:
+            # Another caller may have stored the same text meanwhile; its row is kept
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(key, self.model_name, self._encode(vector), now) for key, vector in items.items()]
+            ).rowcount
+            self._count += max(inserted, 0)
+
+            overflow = self._count - self.max_entries
+            if overflow > 0:
+                # Timestamps must be current before picking what to evict
+                self._flush_touched()
+                evict = overflow + int(self.max_entries * EVICTION_HEADROOM)
+                evicted = self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (evict,)
+                ).rowcount
+                self._count -= evicted
+                logger.info(f"Embedding cache evicted {evicted} entries")
+            self._conn.commit()
+
+    def _count_lookups(self, kind: str, hits: int, misses: int):
+        with self._lock:
+            if kind == "query":
+                self.query_hits += hits
+                self.query_misses += misses
+            else:
+                self.hits += hits
+                self.misses += misses
+
+    def _require_model(self, missing: int):
+        if self.embeddings is None:
+            raise LookupError(f"{missing} texts have no recorded {self.model_name} embedding")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunks, reusing cached vectors for byte-identical texts"""
+        keys = [self._key(text, "doc") for text in texts]
+        cached = self._get_many(list(set(keys)))
+
+        # Deduplicate misses so repeated boilerplate is embedded once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        self._count_lookups("doc", len(texts) - len(missing), len(missing))
+
+        if missing:
+            self._require_model(len(missing))
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self._put_many(new_items)
+            cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the cached vector for repeated questions"""
+        key = self._key(text, "query")
+        cached = self._get_many([key])
+        if key in cached:
+            self._count_lookups("query", 1, 0)
+            return cached[key]
+
+        self._count_lookups("query", 0, 1)
+        self._require_model(1)
+        vector = self.embeddings.embed_query(text)
+        self._put_many({key: vector})
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async version of embed_documents; SQLite work runs off the event loop"""
+        keys = [self._key(text, "doc") for text in texts]
+        cached = await asyncio.to_thread(self._get_many, list(set(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        self._count_lookups("doc", len(texts) - len(missing), len(missing))
+
+        if missing:
+            self._require_model(len(missing))
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            await asyncio.to_thread(self._put_many, new_items)
+            cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async version of embed_query; SQLite work runs off the event loop"""
+        key = self._key(text, "query")
+        cached = await asyncio.to_thread(self._get_many, [key])
+        if key in cached:
+            self._count_lookups("query", 1, 0)
+            return cached[key]
+
+        self._count_lookups("query", 0, 1)
+        self._require_model(1)
+        vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self._put_many, {key: vector})
+        return vector
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return hit / miss counters of chunks and of queries, and the current cache size"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            query_hits, query_misses = self.query_hits, self.query_misses
+            entries = self._count
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "query_hits": query_hits,
+            "query_misses": query_misses,
+            "query_hit_rate": query_hits / (query_hits + query_misses) if query_hits + query_misses else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
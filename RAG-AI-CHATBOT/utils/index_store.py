@@ -0,0 +1,406 @@
+"""
+Persistent Vector Index Store
+Content-addressed FAISS / Chroma indexes stored under data/banks/<bank>/index/,
+updated in place chunk by chunk when a bank's transcript changes
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain.schema import Document
+from loguru import logger
+
+from utils.compressed_index import CompressedFAISS, create_faiss_store, index_spec, is_compressed, load_faiss_store
+
+MANIFEST_FILE = "manifest.json"
+# Summary tree of the current transcript, see utils/summary_tree.py
+SUMMARIES_FILE = "summaries.json"
+
+# Bumped whenever chunk layout or metadata changes, invalidating older indexes
+INDEX_SCHEMA_VERSION = 4
+
+
+def hash_text(text: str) -> str:
+    """Return the sha256 hex digest of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Metadata that identifies a chunk; positional fields (page, section, start_index)
+# are left out so text that merely moved keeps its id and is not re-embedded
+CHUNK_ID_FIELDS = ("source", "bankfile", "bank_key", "speaker", "role")
+
+
+def chunk_id(chunk: Document) -> str:
+    """Stable id of a chunk, derived from its text and identifying metadata"""
+    metadata = {field: chunk.metadata[field] for field in CHUNK_ID_FIELDS if field in chunk.metadata}
+    payload = json.dumps(
+        {"text": chunk.page_content, "metadata": metadata}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class IndexStore:
+    """Persist one vector index per bank, keyed by everything that shapes its contents"""
+
+    def __init__(self, base_path: str = "data/banks", index_options: Optional[Dict[str, Any]] = None,
+                 mmap: bool = False):
+        self.base_path = Path(base_path)
+        # FAISS compression settings, see utils/compressed_index.py
+        self.index_options = index_options or {}
+        # Open FAISS indexes memory-mapped and read-only for serving
+        self.mmap = mmap
+
+    @property
+    def index_spec(self) -> str:
+        return index_spec(**self.index_options)
+
+    def get_index_dir(self, bank_key: str) -> Path:
+        """Folder holding all persisted indexes of a bank"""
+        return self.base_path / bank_key / "index"
+
+    @staticmethod
+    def compute_key(text_hash: str, chunk_size: int, chunk_overlap: int, embedding_model: str,
+                    vector_db: str, index_spec: str = "Flat", chunking: str = "recursive",
+                    dedup_threshold: float = 0.0) -> str:
+        """
+        Build the content address of an index
+
+        Any change of the transcript, the chunking strategy or settings, the embedding
+        model, the vector database or its compression, or the near-duplicate threshold
+        produces a different key, which makes the previously persisted index stale.
+        """
+        fields = {
+            "text_hash": text_hash,
+            "chunking": chunking,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "embedding_model": embedding_model,
+            "vector_db": vector_db.lower(),
+            "index_spec": index_spec,
+            "schema_version": INDEX_SCHEMA_VERSION,
+        }
+        if dedup_threshold:
+            # Only present when filtering, so unfiltered indexes keep their keys
+            fields["dedup_threshold"] = dedup_threshold
+        payload = json.dumps(fields, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def compute_config_key(chunk_size: int, chunk_overlap: int, embedding_model: str,
+                           vector_db: str, index_spec: str = "Flat", chunking: str = "recursive") -> str:
+        """
+        Build the folder name of an index from everything but the transcript
+
+        Indexes sharing this key hold comparable chunks and vectors, so a
+        changed transcript can be applied to them as a diff.
+        """
+        payload = json.dumps({
+            "chunking": chunking,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "embedding_model": embedding_model,
+            "vector_db": vector_db.lower(),
+            "index_spec": index_spec,
+            "schema_version": INDEX_SCHEMA_VERSION,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def load_manifest(self, bank_key: str) -> Optional[Dict[str, Any]]:
+        """Load the manifest describing the current index of a bank"""
+        manifest_path = self.get_index_dir(bank_key) / MANIFEST_FILE
+        try:
+            if manifest_path.exists():
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read index manifest for {bank_key}: {e}")
+        return None
+
+    def _write_manifest(self, bank_key: str, manifest: Dict[str, Any]):
+        with open(self.get_index_dir(bank_key) / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+    def _invalidate_manifest(self, bank_key: str):
+        """Drop the manifest so an index that is being modified is never loaded"""
+        (self.get_index_dir(bank_key) / MANIFEST_FILE).unlink(missing_ok=True)
+
+    def load(self, bank_key: str, key: str, embeddings: Embeddings, vector_db: str):
+        """
+        Load the persisted index of a bank if it matches the given key
+
+        Returns:
+            The vector store, or None when nothing valid is persisted
+        """
+        manifest = self.load_manifest(bank_key)
+        if not manifest or manifest.get("key") != key or not manifest.get("config_key"):
+            return None
+        return self._open(bank_key, manifest["config_key"], embeddings, vector_db, mmap=self.mmap)
+
+    def _open(self, bank_key: str, config_key: str, embeddings: Embeddings, vector_db: str,
+              mmap: bool = False):
+        """
+        Open the index folder of a bank, or return None when it is missing or unreadable
+
+        Args:
+            mmap: Memory-map FAISS indexes read-only; stores that will be modified must not be
+        """
+        index_path = self.get_index_dir(bank_key) / config_key
+        if not index_path.exists():
+            return None
+
+        try:
+            if vector_db.lower() == "chroma":
+                return Chroma(
+                    collection_name=f"{bank_key}_{config_key}",
+                    persist_directory=str(index_path),
+                    embedding_function=embeddings,
+                )
+            if is_compressed(self.index_options):
+                return CompressedFAISS.load_local(
+                    str(index_path),
+                    embeddings,
+                    mmap=mmap,
+                    rescore_factor=self.index_options.get("rescore_factor", 0),
+                    nprobe=self.index_options.get("nprobe"),
+                )
+            return load_faiss_store(str(index_path), embeddings, mmap=mmap)
+        except Exception as e:
+            logger.warning(f"Could not load persisted index for {bank_key}: {e}")
+            return None
+
+    def file_sizes(self, bank_key: str, config_key: str) -> Dict[str, int]:
+        """Bytes on disk of a persisted FAISS index ("index") and its docstore ("docstore")"""
+        index_path = self.get_index_dir(bank_key) / config_key
+        sizes = {}
+        for name, file_name in (("index", "index.faiss"), ("docstore", "index.pkl")):
+            path = index_path / file_name
+            if path.exists():
+                sizes[name] = path.stat().st_size
+        return sizes
+
+    def load_summaries(self, bank_key: str, key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Load a bank's persisted summary tree; given a key, only if it was built from that index"""
+        path = self.get_index_dir(bank_key) / SUMMARIES_FILE
+        try:
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    tree = json.load(f)
+                if key is None or tree.get("key") == key:
+                    return tree
+        except Exception as e:
+            logger.warning(f"Could not read summary tree for {bank_key}: {e}")
+        return None
+
+    def save_summaries(self, bank_key: str, tree: Dict[str, Any]):
+        """Persist a bank's summary tree next to its index manifest"""
+        index_dir = self.get_index_dir(bank_key)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        staging = index_dir / (SUMMARIES_FILE + ".saving")
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(tree, f)
+        os.replace(staging, index_dir / SUMMARIES_FILE)
+
+    def load_current(self, bank_key: str, embeddings: Embeddings, vector_db: str,
+                     expected: Dict[str, Any]) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        Load whatever index a bank's manifest points to, without its transcript
+
+        Args:
+            expected: Manifest fields that must match the current configuration
+
+        Returns:
+            (vector store, manifest), or None when nothing compatible is persisted
+        """
+        manifest = self.load_manifest(bank_key)
+        if not manifest:
+            return None
+        if any(manifest.get(field) != value for field, value in expected.items()):
+            logger.info(f"Persisted index for {bank_key} was built with other settings, ignoring it")
+            return None
+
+        store = self.load(bank_key, manifest["key"], embeddings, vector_db)
+        return (store, manifest) if store is not None else None
+
+    def build(self, bank_key: str, key: str, config_key: str, chunks: List[Document],
+              embeddings: Embeddings, vector_db: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Build an index from chunks, persist it and drop stale indexes of the bank
+
+        Returns:
+            The freshly built vector store
+        """
+        index_dir = self.get_index_dir(bank_key)
+        index_path = index_dir / config_key
+        index_dir.mkdir(parents=True, exist_ok=True)
+        self._invalidate_manifest(bank_key)
+        if index_path.exists():
+            shutil.rmtree(index_path, ignore_errors=True)
+        index_path.mkdir(parents=True, exist_ok=True)
+
+        chunks, ids = self._with_ids(chunks)
+        if vector_db.lower() == "chroma":
+            vectorstore = Chroma.from_documents(
+                chunks,
+                embeddings,
+                ids=ids,
+                collection_name=f"{bank_key}_{config_key}",
+                persist_directory=str(index_path),
+            )
+        else:
+            vectorstore = create_faiss_store(chunks, embeddings, ids, self.index_options)
+            vectorstore.save_local(str(index_path))
+
+        # The manifest is written last so a half-written index is never loaded
+        self._write_manifest(bank_key, self._manifest(key, config_key, vector_db, ids, metadata))
+        self._remove_stale(bank_key, config_key)
+        logger.info(f"Persisted {vector_db} index for {bank_key} ({len(chunks)} chunks)")
+        return vectorstore
+
+    def update(self, bank_key: str, key: str, config_key: str, chunks: List[Document],
+               embeddings: Embeddings, vector_db: str,
+               metadata: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, int]]:
+        """
+        Bring a bank's persisted index in line with a new set of chunks
+
+        Only chunks whose id is not in the index yet are embedded and inserted,
+        and chunks that are no longer part of the transcript are deleted. Falls
+        back to a full build when no index with the same settings exists, and
+        for compressed indexes, whose quantizers and re-scoring vectors are
+        built over the whole corpus at once.
+
+        Unchanged chunks keep their vectors, but their positional metadata
+        (page, section, start_index) is rewritten, since text inserted or
+        removed earlier in the transcript moves them.
+
+        Returns:
+            (vector store, {"added", "removed", "unchanged", "moved"} chunk counts)
+        """
+        manifest = self.load_manifest(bank_key)
+        store = None
+        if manifest and manifest.get("config_key") == config_key and "chunk_ids" in manifest:
+            store = self._open(bank_key, config_key, embeddings, vector_db)
+
+        if store is None:
+            store = self.build(bank_key, key, config_key, chunks, embeddings, vector_db, metadata)
+            return store, {"added": len(chunks), "removed": 0, "unchanged": 0, "moved": 0}
+
+        chunks, ids = self._with_ids(chunks)
+        previous_ids, current_ids = set(manifest["chunk_ids"]), set(ids)
+        removed = [chunk_id for chunk_id in manifest["chunk_ids"] if chunk_id not in current_ids]
+        added = [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in previous_ids]
+
+        # Any change to the chunk set, whether from the transcript or from settings
+        # outside the config key such as the near-duplicate threshold, retrains a
+        # compressed index
+        if (added or removed) and vector_db.lower() == "faiss" and is_compressed(self.index_options):
+            store = self.build(bank_key, key, config_key, chunks, embeddings, vector_db, metadata)
+            stats = {"added": len(added), "removed": len(removed), "unchanged": len(ids) - len(added), "moved": 0}
+            return store, stats
+        moved = self._refresh_metadata(
+            store, [(chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id in previous_ids]
+        )
+        stats = {
+            "added": len(added),
+            "removed": len(removed),
+            "unchanged": len(ids) - len(added),
+            "moved": moved,
+        }
+
+        if added or removed or moved:
+            self._invalidate_manifest(bank_key)
+            if removed:
+                store.delete(removed)
+            if added:
+                store.add_documents([chunk for _, chunk in added], ids=[chunk_id for chunk_id, _ in added])
+            if isinstance(store, FAISS):
+                self._replace_faiss_files(store, self.get_index_dir(bank_key) / config_key)
+
+        self._write_manifest(bank_key, self._manifest(key, config_key, vector_db, ids, metadata))
+        logger.info(
+            f"Updated {vector_db} index for {bank_key}: {stats['added']} added, "
+            f"{stats['removed']} removed, {stats['unchanged']} unchanged ({stats['moved']} moved)"
+        )
+        return store, stats
+
+    @staticmethod
+    def _refresh_metadata(store, unchanged: List[Tuple[str, Document]]) -> int:
+        """
+        Rewrite the stored metadata of unchanged chunks that moved; returns how many did
+
+        Chunk ids leave positions out, so a moved chunk keeps its vector but
+        would otherwise keep its old page and offsets.
+        """
+        if isinstance(store, FAISS):
+            moved = 0
+            for chunk_id, chunk in unchanged:
+                stored = store.docstore.search(chunk_id)
+                if isinstance(stored, Document) and stored.metadata != chunk.metadata:
+                    stored.metadata = dict(chunk.metadata)
+                    moved += 1
+            return moved
+
+        if not unchanged:
+            return 0
+        stored = store.get(ids=[chunk_id for chunk_id, _ in unchanged], include=["metadatas"])
+        current = dict(unchanged)
+        changed = [
+            (chunk_id, current[chunk_id].metadata)
+            for chunk_id, metadata in zip(stored["ids"], stored["metadatas"])
+            if chunk_id in current and metadata != current[chunk_id].metadata
+        ]
+        if changed:
+            store._collection.update(
+                ids=[chunk_id for chunk_id, _ in changed], metadatas=[metadata for _, metadata in changed]
+            )
+        return len(changed)
+
+    @staticmethod
+    def _replace_faiss_files(store: FAISS, index_path: Path):
+        """
+        Save a FAISS store over an existing one by renaming fresh files into place
+
+        Processes that memory-mapped the old files keep reading them intact;
+        rewriting the files in place would corrupt their mappings.
+        """
+        staging = index_path.with_name(index_path.name + ".saving")
+        shutil.rmtree(staging, ignore_errors=True)
+        store.save_local(str(staging))
+        for path in staging.iterdir():
+            os.replace(path, index_path / path.name)
+        staging.rmdir()
+
+    @staticmethod
+    def _with_ids(chunks: List[Document]) -> Tuple[List[Document], List[str]]:
+        """Pair chunks with their ids, dropping exact duplicates"""
+        unique: Dict[str, Document] = {}
+        for chunk in chunks:
+            unique.setdefault(chunk_id(chunk), chunk)
+        return list(unique.values()), list(unique)
+
+    @staticmethod
+    def _manifest(key: str, config_key: str, vector_db: str, ids: List[str],
+                  metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            **(metadata or {}),
+            "key": key,
+            "config_key": config_key,
+            "vector_db": vector_db.lower(),
+            "num_chunks": len(ids),
+            "chunk_ids": ids,
+            "created_at": datetime.now().isoformat(),
+        }
+
+    def _remove_stale(self, bank_key: str, current_key: str):
+        """Delete every index folder of a bank except the current one"""
+        for path in self.get_index_dir(bank_key).iterdir():
+            if path.is_dir() and path.name != current_key:
+                logger.info(f"Removing stale index {path}")
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,169 @@
+"""
+Index Warm-up
+Indexes a processed transcript on a background worker, so the app stays
+interactive and can show progress while chunks are embedded
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+# Share of the progress bar reached when each stage starts; embedding fills the rest
+_STAGE_PROGRESS = {
+    "queued": 0.0,
+    "loading": 0.05,
+    "chunking": 0.1,
+    "indexing": 0.1,
+    "embedding": 0.15,
+    "summarizing": 0.95,
+    "binding": 0.98,
+}
+
+_STAGE_MESSAGES = {
+    "queued": "Waiting for the indexing worker",
+    "loading": "Loading the saved index",
+    "chunking": "Splitting the transcript into chunks",
+    "indexing": "Indexing on the chat service",
+    "embedding": "Embedding chunks",
+    "summarizing": "Summarizing sections for overview questions",
+    "binding": "Setting up the chat",
+}
+
+
+class IndexJob:
+    """Status of one transcript being indexed"""
+
+    def __init__(self, bank_key: str, text_hash: str):
+        self.bank_key = bank_key
+        self.text_hash = text_hash
+        self.status = "queued"  # queued, running, ready or failed
+        self.stage = "queued"
+        self.progress = 0.0
+        self.message = _STAGE_MESSAGES["queued"]
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("ready", "failed")
+
+    def update(self, stage: str, done: int = 0, total: int = 0):
+        """Progress callback handed to the chatbot"""
+        with self._lock:
+            self.status = "running"
+            self.stage = stage
+            start = _STAGE_PROGRESS.get(stage, self.progress)
+            message = _STAGE_MESSAGES.get(stage, stage)
+            if stage == "embedding" and total:
+                # Embedding is by far the longest stage
+                start += (0.95 - start) * done / total
+                message = f"{message} ({done:,}/{total:,})"
+            elif stage == "summarizing" and total:
+                message = f"{message} ({done}/{total})"
+            self.progress = max(self.progress, start)
+            self.message = message
+
+    def finish(self, error: Optional[str] = None):
+        with self._lock:
+            self.finished_at = time.time()
+            self.status = "failed" if error else "ready"
+            self.error = error
+            self.progress = self.progress if error else 1.0
+            self.message = error or "Ready to chat"
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "bank_key": self.bank_key,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress,
+                "message": self.message,
+                "error": self.error,
+                "elapsed_seconds": self.elapsed(),
+            }
+
+
+class IndexWarmup:
+    """Background indexing worker shared by every session in the process"""
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="index-warmup")
+        # bank_key -> latest job
+        self._jobs: Dict[str, IndexJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, chatbot, raw_text: str, bank_key: str,
+              text_sections: Optional[List[Dict[str, Any]]] = None) -> IndexJob:
+        """
+        Start indexing a transcript unless the same one is already queued or running
+
+        In process, the job warms up the bank's partition of the shared index
+        and only then binds and publishes the bank's chatbot; sessions pick it
+        up once the job is ready, so no chatbot in use is ever modified.
+
+        Args:
+            chatbot: BankChatbots, or the session's own ChatServiceClient, to index with
+            raw_text: Transcript text
+            bank_key: Bank the transcript belongs to
+            text_sections: Speaker sections from preprocessing
+
+        Returns:
+            The job, whose status and progress can be polled
+        """
+        text_hash = hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+        with self._lock:
+            job = self._jobs.get(bank_key)
+            if job is not None and job.text_hash == text_hash and not job.done:
+                return job
+            job = IndexJob(bank_key, text_hash)
+            self._jobs[bank_key] = job
+
+        self._executor.submit(self._run, job, chatbot, raw_text, bank_key, text_sections)
+        return job
+
+    def _run(self, job: IndexJob, chatbot, raw_text: str, bank_key: str,
+             text_sections: Optional[List[Dict[str, Any]]]):
+        job.started_at = time.time()
+        job.update("loading")
+        try:
+            if hasattr(chatbot, "warm_up"):
+                chatbot.warm_up(raw_text, bank_key, text_sections, progress=job.update)
+                job.update("binding")
+                ok = chatbot.bind(raw_text, bank_key, text_sections)
+            else:
+                # The chat service indexes on its side and reports when done
+                ok = chatbot.process_text(raw_text, bank_key, text_sections, progress=job.update)
+        except Exception as e:
+            ok = False
+            logger.error(f"Background indexing of {bank_key} failed: {e}")
+        job.finish(None if ok else f"❌ Indexing failed for {bank_key}")
+        logger.info(f"Background indexing of {bank_key}: {job.status} after {job.elapsed():.1f}s")
+
+    def get(self, bank_key: str) -> Optional[IndexJob]:
+        with self._lock:
+            return self._jobs.get(bank_key)
+
+
+_index_warmup: Optional[IndexWarmup] = None
+_warmup_lock = threading.Lock()
+
+
+def get_index_warmup() -> IndexWarmup:
+    """Return the process-wide warm-up worker"""
+    global _index_warmup
+    with _warmup_lock:
+        if _index_warmup is None:
+            _index_warmup = IndexWarmup()
+        return _index_warmup
@@ -0,0 +1,388 @@
+"""
+Latency Policy
+Per-turn choice of retrieval depth, model tier and output token cap within a
+latency SLO, with an extractive answer from the top chunks when the LLM misses
+its deadline. Every decision is logged with its outcome for tuning
+"""
+
+import asyncio
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain.schema import Document
+from loguru import logger
+
+# Checked in order; the first match is the question type
+QUESTION_TYPES = (
+    ("comparative", re.compile(
+        r"\b(compare[sd]?|comparison|versus|vs\.?|difference|differ|relative to|better|worse)\b", re.IGNORECASE
+    )),
+    ("explanatory", re.compile(
+        r"\b(why|how(?! (much|many))|explain|driv(e|en|er|ers|ing)|drove|reasons?|impact|affect(ed)?|outlook|strategy)\b",
+        re.IGNORECASE,
+    )),
+    ("lookup", re.compile(
+        r"\b(what (is|was|were|are)|how (much|many)|which|when|who|did .+ (report|say))\b", re.IGNORECASE
+    )),
+)
+
+# Questions longer than this many words get the deepest retrieval
+LONG_QUESTION_WORDS = 25
+
+# Output token cap by question type, before fitting it into the SLO
+TYPE_MAX_TOKENS = {"lookup": 200, "general": 400, "explanatory": 1000, "comparative": 1000}
+
+# Smallest output cap worth asking for
+MIN_MAX_TOKENS = 100
+
+# Weight of a new observation in the per-tier latency estimates
+_EWMA_ALPHA = 0.2
+
+_WORDS = re.compile(r"[a-z0-9]{4,}")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+# Runs the chain while the caller waits on the deadline
+_deadline_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-deadline")
+
+_END = object()
+
+
+class DeadlineExceeded(Exception):
+    """The LLM did not answer before the turn's deadline"""
+
+
+class RouteDecision:
+    """Retrieval depth, model tier and output cap chosen for one turn"""
+
+    def __init__(self, question_type: str, words: int, k: int, max_tokens: int, slo_ms: float):
+        self.question_type = question_type
+        self.words = words
+        self.k = k
+        self.max_tokens = max_tokens
+        self.tier = "fast"
+        self.model = ""
+        self.slo_ms = slo_ms
+        self.score_top: Optional[float] = None
+        self.score_spread: Optional[float] = None
+        self.estimated_llm_ms: Optional[float] = None
+        self.fallback = False
+
+        # Chunks retrieved for the turn, also the source of the extractive fallback
+        self.context: List[Document] = []
+        self.started = time.perf_counter()
+        self.retrieval_ms: Optional[float] = None
+        self.deadline_at: Optional[float] = None
+        self.retrieved = threading.Event()
+
+    def remaining_s(self) -> float:
+        """Seconds left for the LLM, once retrieval is done"""
+        return max(0.0, self.deadline_at - time.perf_counter())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "question_type": self.question_type,
+            "words": self.words,
+            "k": self.k,
+            "tier": self.tier,
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "slo_ms": self.slo_ms,
+            "score_top": self.score_top,
+            "score_spread": self.score_spread,
+            "estimated_llm_ms": self.estimated_llm_ms,
+            "decision_retrieval_ms": self.retrieval_ms,
+            "fallback": self.fallback,
+        }
+
+
+class LatencyPolicy:
+    """
+    Classifies questions and picks per-turn settings that fit the latency SLO
+
+    Before retrieval, the question's length and type set the retrieval depth
+    and output cap. After retrieval, the spread of chunk scores decides
+    whether the strong model is worth its latency: a flat spread means the
+    answer has to be pieced together from several chunks. The output cap is
+    then shrunk until the tier's estimated LLM time fits what is left of the
+    SLO. Estimates start from the configured values and follow observed turns.
+
+    The strong tier is taken when it can still write MIN_MAX_TOKENS tokens in
+    time, so both tiers are reachable with the default estimates and an 8 s SLO:
+    a lookup after 500 ms of retrieval stays on the fast tier with its 200-token
+    cap, while an explanatory question goes to the strong tier with its cap
+    shrunk to (7500 - 1000) / 35 = 185 tokens. Answers are cut at the shrunk
+    cap, so long explanations need a looser SLO.
+    """
+
+    def __init__(self, slo_ms: float, fast_model: str, strong_model: str, min_k: int, max_k: int,
+                 max_tokens: int, min_llm_ms: float = 1500, spread_threshold: float = 0.1,
+                 tier_estimates: Optional[Dict[str, Dict[str, float]]] = None, log_path: str = ""):
+        self.slo_ms = slo_ms
+        self.models = {"fast": fast_model, "strong": strong_model}
+        self.min_k = min_k
+        self.max_k = max_k
+        self.max_tokens = max_tokens
+        # The LLM always gets this long, even when retrieval used up the SLO
+        self.min_llm_ms = min_llm_ms
+        self.spread_threshold = spread_threshold
+        # tier -> {"ttft_ms", "ms_per_token"}
+        self.estimates = {
+            tier: dict(values) for tier, values in (tier_estimates or {
+                "fast": {"ttft_ms": 600.0, "ms_per_token": 15.0},
+                "strong": {"ttft_ms": 1000.0, "ms_per_token": 35.0},
+            }).items()
+        }
+        self._lock = threading.Lock()
+
+        if log_path:
+            Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+            logger.add(
+                log_path,
+                format="{message}",
+                filter=lambda record: record["extra"].get("route_decision", False),
+                rotation="50 MB",
+            )
+
+    def classify(self, message: str) -> str:
+        """Question type: comparative, explanatory, lookup or general"""
+        for question_type, pattern in QUESTION_TYPES:
+            if pattern.search(message):
+                return question_type
+        return "general"
+
+    def plan(self, message: str) -> RouteDecision:
+        """Retrieval depth and output cap from the question alone"""
+        question_type = self.classify(message)
+        words = len(message.split())
+        if question_type in ("explanatory", "comparative") or words > LONG_QUESTION_WORDS:
+            k = self.max_k
+        elif question_type == "lookup":
+            k = self.min_k
+        else:
+            k = (self.min_k + self.max_k) // 2
+        max_tokens = min(self.max_tokens, TYPE_MAX_TOKENS[question_type])
+
+        decision = RouteDecision(question_type, words, k, max_tokens, self.slo_ms)
+        decision.model = self.models["fast"]
+        return decision
+
+    def fitting_tokens(self, tier: str, budget_ms: float) -> int:
+        """Largest output cap whose estimated LLM time on a tier fits the budget"""
+        with self._lock:
+            estimate = dict(self.estimates[tier])
+        return int((budget_ms - estimate["ttft_ms"]) / estimate["ms_per_token"])
+
+    def estimate_ms(self, tier: str, max_tokens: int) -> float:
+        with self._lock:
+            estimate = self.estimates[tier]
+            return estimate["ttft_ms"] + estimate["ms_per_token"] * max_tokens
+
+    def refine(self, decision: RouteDecision, docs: List[Document]) -> List[Document]:
+        """Pick the model tier and output cap from the retrieved chunks; runs inside the chain"""
+        now = time.perf_counter()
+        elapsed_ms = (now - decision.started) * 1000
+        decision.retrieval_ms = round(elapsed_ms, 2)
+        decision.context = docs
+        budget_ms = max(self.min_llm_ms, self.slo_ms - elapsed_ms)
+
+        scores = [doc.metadata["score"] for doc in docs if doc.metadata.get("score") is not None]
+        if scores:
+            decision.score_top = round(scores[0], 4)
+            decision.score_spread = round(scores[0] - scores[-1], 4)
+
+        needs_synthesis = decision.question_type in ("explanatory", "comparative")
+        flat_scores = decision.score_spread is not None and decision.score_spread < self.spread_threshold
+        if (needs_synthesis or (flat_scores and decision.question_type == "general")) and \
+                self.models["strong"] != self.models["fast"] and \
+                self.fitting_tokens("strong", budget_ms) >= MIN_MAX_TOKENS:
+            decision.tier = "strong"
+        decision.model = self.models[decision.tier]
+
+        # Shrink the output cap until the chosen tier fits what is left of the SLO
+        fitting = self.fitting_tokens(decision.tier, budget_ms)
+        decision.max_tokens = max(MIN_MAX_TOKENS, min(decision.max_tokens, fitting))
+        decision.estimated_llm_ms = round(self.estimate_ms(decision.tier, decision.max_tokens), 2)
+
+        decision.deadline_at = now + budget_ms / 1000
+        decision.retrieved.set()
+        return docs
+
+    def record(self, decision: RouteDecision, metrics: Dict[str, Any]):
+        """Log a decision with the turn's outcome and update the tier's latency estimates"""
+        logger.bind(route_decision=True).info(json.dumps({
+            "event": "route_decision",
+            "turn_id": metrics.get("turn_id"),
+            "timestamp": metrics.get("timestamp"),
+            "bank_key": metrics.get("bank_key"),
+            **decision.to_dict(),
+            "total_ms": metrics.get("total_ms"),
+            "llm_ms": metrics.get("llm_ms"),
+            "ttft_ms": metrics.get("ttft_ms"),
+            "completion_tokens": metrics.get("completion_tokens"),
+            "error": metrics.get("error"),
+        }))
+
+        ttft_ms, llm_ms, tokens = metrics.get("ttft_ms"), metrics.get("llm_ms"), metrics.get("completion_tokens")
+        if decision.fallback or metrics.get("error") or not (ttft_ms and llm_ms and tokens):
+            return
+        with self._lock:
+            estimate = self.estimates[decision.tier]
+            estimate["ttft_ms"] += _EWMA_ALPHA * (ttft_ms - estimate["ttft_ms"])
+            per_token = max(0.0, llm_ms - ttft_ms) / tokens
+            estimate["ms_per_token"] += _EWMA_ALPHA * (per_token - estimate["ms_per_token"])
+
+    def get_estimates(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {tier: dict(values) for tier, values in self.estimates.items()}
+
+
+_latency_policy: Optional[LatencyPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_latency_policy(**kwargs: Any) -> LatencyPolicy:
+    """Return the process-wide policy, so every chatbot learns from the same observed turns"""
+    global _latency_policy
+    with _policy_lock:
+        if _latency_policy is None:
+            _latency_policy = LatencyPolicy(**kwargs)
+        return _latency_policy
+
+
+def extractive_answer(message: str, docs: List[Document], max_sentences: int = 3) -> str:
+    """
+    Answer from the retrieved chunks alone: the sentences of the top chunks sharing most words with the question
+
+    Used when the LLM misses its deadline, so the user still gets the relevant passages.
+    """
+    if not docs:
+        return "⏱️ The answer took too long and no relevant passages were found. Please try again."
+
+    query_words = set(_WORDS.findall(message.lower()))
+    candidates = []
+    for rank, doc in enumerate(docs[:3]):
+        for position, sentence in enumerate(_SENTENCES.split(" ".join(doc.page_content.split()))):
+            overlap = len(query_words & set(_WORDS.findall(sentence.lower())))
+            if overlap and len(sentence) > 20:
+                candidates.append((overlap, -rank, -position, rank, position, sentence, doc))
+    if not candidates:
+        top = docs[0]
+        candidates = [(0, 0, 0, 0, 0, " ".join(top.page_content.split())[:400], top)]
+
+    # Best matches, shown in the order they appear in the transcript
+    chosen = sorted(candidates, reverse=True)[:max_sentences]
+    chosen.sort(key=lambda candidate: (candidate[3], candidate[4]))
+    passages = []
+    for *_, sentence, doc in chosen:
+        speaker = doc.metadata.get("speaker")
+        passages.append(f"> {sentence}" + (f" — {speaker}" if speaker else ""))
+    return (
+        "⏱️ A full answer is taking longer than expected, so here are the most relevant "
+        "passages from the transcript:\n\n" + "\n\n".join(passages)
+    )
+
+
+def iterate_with_deadline(chunks: Iterator[Dict[str, Any]], decision: RouteDecision,
+                          first_token_only: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Relay a chain's stream, raising DeadlineExceeded when the LLM misses the turn's deadline
+
+    The chain runs on a worker thread. The deadline is known once retrieval
+    finished; until then the relay only waits.
+
+    Args:
+        chunks: Stream of the routed RAG chain
+        first_token_only: The deadline only applies to the first answer token
+            (streaming); otherwise to the whole answer
+    """
+    items: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    break
+                items.put(chunk)
+            items.put(_END)
+        except Exception as e:
+            items.put(e)
+        finally:
+            # Closing the stream closes the HTTP response of an abandoned answer
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    _deadline_executor.submit(produce)
+    answering = False
+    try:
+        while True:
+            if answering and first_token_only:
+                timeout = None
+            elif decision.retrieved.is_set():
+                timeout = decision.remaining_s()
+            else:
+                timeout = 0.05
+            try:
+                item = items.get(timeout=timeout)
+            except queue.Empty:
+                if decision.retrieved.is_set():
+                    raise DeadlineExceeded()
+                continue
+
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            if item.get("answer"):
+                answering = True
+            yield item
+    finally:
+        stop.set()
+
+
+async def aiterate_with_deadline(chunks: AsyncIterator[Dict[str, Any]], decision: RouteDecision,
+                                 first_token_only: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """Async version of iterate_with_deadline; an abandoned answer is cancelled"""
+    items: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for chunk in chunks:
+                await items.put(chunk)
+            await items.put(_END)
+        except Exception as e:
+            await items.put(e)
+
+    task = asyncio.ensure_future(produce())
+    answering = False
+    try:
+        while True:
+            if answering and first_token_only:
+                timeout = None
+            elif decision.retrieved.is_set():
+                timeout = decision.remaining_s()
+            else:
+                timeout = 0.05
+            try:
+                item = await asyncio.wait_for(items.get(), timeout)
+            except asyncio.TimeoutError:
+                if decision.retrieved.is_set():
+                    raise DeadlineExceeded()
+                continue
+
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            if item.get("answer"):
+                answering = True
+            yield item
+    finally:
+        task.cancel()
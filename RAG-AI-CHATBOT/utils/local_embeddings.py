@@ -0,0 +1,79 @@
+"""
+Local Embeddings
+Offline sentence-transformers backend (MiniLM by default) for the chatbot
+"""
+
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+
+
+class LocalEmbeddings(Embeddings):
+    """CPU sentence-transformers embeddings with length-sorted batching"""
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 batch_size: int = 64, num_threads: int = 0, use_onnx: bool = False,
+                 quantize: bool = False, onnx_file: str = "onnx/model_qint8_avx512_vnni.onnx"):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = None
+        # What was actually loaded, which may differ from what was asked for
+        self.backend = "torch"
+        self.quantized = False
+
+        if use_onnx:
+            # Needs sentence-transformers[onnx]; quantized weights ship with the MiniLM repo
+            try:
+                model_kwargs = {"file_name": onnx_file} if quantize else {}
+                self.model = SentenceTransformer(
+                    model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs
+                )
+                self.backend, self.quantized = "onnx", quantize
+                logger.info(f"Loaded {model_name} with ONNX Runtime{' (int8)' if quantize else ''}")
+            except Exception as e:
+                logger.warning(f"ONNX backend unavailable, falling back to PyTorch: {e}")
+
+        if self.model is None:
+            self.model = SentenceTransformer(model_name, device="cpu")
+            if quantize:
+                # Dynamic int8 quantization of the linear layers
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                self.quantized = True
+                logger.info(f"Loaded {model_name} with dynamic int8 quantization")
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode in batches of similar length so padding stays small"""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors: List[List[float]] = [[] for _ in texts]
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            embeddings = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            for i, vector in zip(batch, embeddings):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunks locally"""
+        if not texts:
+            return []
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query locally"""
+        return self._encode([text])[0]
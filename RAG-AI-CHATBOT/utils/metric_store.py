@@ -0,0 +1,306 @@
+"""
+Financial Metric Store
+Figures for the metrics in config/config.yaml (financial_metrics), extracted from
+a transcript's tables and sentences at preprocessing time, and a router that
+answers exact metric questions from them without retrieval or an LLM call
+"""
+
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Bumped whenever aliases or fact fields change, so saved stores are extracted again
+METRIC_STORE_VERSION = 3
+
+# Ways a metric is named on an earnings call; keys match config.yaml's financial_metrics.
+# Related ratios (ROTCE and ROE, CET1 and Tier 1, TBVPS and BVPS) are separate metrics
+METRIC_ALIASES = {
+    "revenue": ["total net revenues?", "net revenues?", "total revenues?",
+                "(?<!interest )(?<!noninterest )(?<!non-interest )(?<!fee )revenues?", "top line"],
+    "net_income": ["net income", "net earnings", "net profit", "profit after tax"],
+    "return_on_equity": ["return on common equity", "return on equity", "roe"],
+    "return_on_tangible_common_equity": ["return on tangible common equity", "rotce"],
+    "return_on_assets": ["return on average assets", "return on assets", "roa"],
+    "earnings_per_share": ["diluted earnings per share", "earnings per share", "diluted eps", "eps"],
+    "book_value": ["(?<!tangible )book value per share", "(?<!tangible )book value", "bvps"],
+    "tangible_book_value_per_share": ["tangible book value per share", "tangible book value", "tbvps"],
+    "loan_loss_provision": ["provision for credit losses", "credit loss provisions?",
+                            "loan loss provisions?", "provisions? for loan losses"],
+    "tier_1_capital_ratio": ["(?<!equity )tier 1 capital ratio", "(?<!equity )tier 1 ratio"],
+    "cet1_ratio": ["common equity tier 1 (capital )?ratio", "common equity tier 1", "cet1 ratio", "cet1"],
+    "net_interest_margin": ["net interest margin", "nim"],
+    "efficiency_ratio": ["efficiency ratio", "overhead ratio", "cost[- ]to[- ]income ratio"],
+}
+
+# A figure: optional currency, number, optional unit, optional currency spoken after it
+# ("3.4 billion dollars", as calls are transcribed)
+_VALUE_PATTERN = re.compile(
+    r"(?P<currency>[$€£])?\s?(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s?"
+    r"(?P<unit>%|percent\b|basis points\b|bps\b|billion\b|million\b|bn\b|mm\b|b\b|m\b)?"
+    r"(?:\s?(?P<currency_word>dollars?|usd|euros?|pounds?)\b)?",
+    re.IGNORECASE,
+)
+
+# What may stand between a metric's name and its figure ("of", "was", "ended the quarter at").
+# Anything else means the figure belongs to another clause, e.g. "net income was partly
+# offset by ... 1.2 billion dollars of share repurchases", or is a change ("up 30 basis points")
+_LINK_PATTERN = re.compile(
+    r"(?:\s|[,:(=-]|\b(?:was|were|is|are|of|at|to|in|the|a|an|came|come|totaled|totalled|reached|"
+    r"stood|ended|finished|quarter|period|reported|record|approximately|about|roughly|nearly|around|"
+    r"almost|just|over|under|(?:rose|fell|increased|decreased|improved|declined|grew) to)\b)*",
+    re.IGNORECASE,
+)
+
+# Figures further than this many characters after the metric's name are not attributed to it
+_MAX_DISTANCE = 80
+
+_UNITS = {
+    "%": "%", "percent": "%", "basis points": "bps", "bps": "bps",
+    "billion": "billion", "bn": "billion", "b": "billion",
+    "million": "million", "mm": "million", "m": "million",
+}
+
+_CURRENCIES = {"dollar": "$", "dollars": "$", "usd": "$", "euro": "€", "euros": "€", "pound": "£", "pounds": "£"}
+
+# Questions that need explanation, several figures, or a figure other than the one
+# reported for the period (targets, consensus, prior periods, regulatory minimums),
+# which only the RAG chain can answer
+_NOT_A_LOOKUP_PATTERN = re.compile(
+    r"\b(why|how did|how does|how has|explain|driv(e|en|er|ers|ing)|compare|compared|versus|vs\.?|"
+    r"trend|change|changed|outlook|guidance|expect|forecast|impact|affect|reason|commentary|"
+    r"analysts?|risk|next (quarter|year)|targets?|consensus|estimates?|a year ago|"
+    r"(prior|last|previous) (quarter|year)|year[- ]over[- ]year|yoy|minimum|requirements?|required)\b",
+    re.IGNORECASE,
+)
+
+# A business line or basis narrower than the whole bank as reported. A question naming
+# one is left to the RAG chain, and a figure quoted with one is not the bank's figure
+_SEGMENT_PATTERN = re.compile(
+    r"\b((consumer|commercial|investment|corporate|private|retail|wholesale|global) bank(ing)?|"
+    r"\w+ (business|businesses|segment|segments|division|unit)|markets|wealth|asset management|"
+    r"cards?|mortgages?|adjusted|underlying|excluding|ex-\w+|managed basis)\b",
+    re.IGNORECASE,
+)
+
+# A reporting period. Only checked in questions: sentences quoting the period's own
+# figure name it too ("ended the quarter at 14.2 percent")
+_PERIOD_PATTERN = re.compile(
+    r"\b((in|for|this|last|prior|the) (quarter|year)|quarterly|q[1-4]|full[- ]year|fy\s?\d*|"
+    r"year[- ]to[- ]date|ytd|annual(ized)?|(first|second) half|h[12]|(19|20)\d{2})\b",
+    re.IGNORECASE,
+)
+
+# Lookups are short and ask for a figure
+_LOOKUP_PATTERN = re.compile(r"\b(what|what's|whats|tell me|give me|how much|how high|level|value|figure|report(ed)?)\b",
+                             re.IGNORECASE)
+_MAX_LOOKUP_WORDS = 16
+
+
+# Names whose abbreviation reads better than the spelled-out key
+_DISPLAY_NAMES = {
+    "return_on_tangible_common_equity": "Return on tangible common equity (ROTCE)",
+    "cet1_ratio": "CET1 ratio",
+}
+
+
+def _alias_pattern(aliases: List[str]) -> re.Pattern:
+    return re.compile(r"\b(" + "|".join(aliases) + r")\b", re.IGNORECASE)
+
+
+_METRIC_PATTERNS = {metric: _alias_pattern(aliases) for metric, aliases in METRIC_ALIASES.items()}
+
+_WORD_PATTERN = re.compile(r"[A-Za-z]{2,}")
+
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z$])")
+
+
+def _bound_value(text: str) -> Optional[Dict[str, Any]]:
+    """
+    The figure a text right after a metric's name states as that metric
+
+    None when the first figure is not linked to the name by _LINK_PATTERN
+    alone, i.e. it is a change or belongs to another clause.
+    """
+    for match in _VALUE_PATTERN.finditer(text):
+        if match.start() > _MAX_DISTANCE:
+            return None
+        number = match.group("number")
+        currency = match.group("currency") or _CURRENCIES.get((match.group("currency_word") or "").lower(), "")
+        # Bare years and small integers are rarely the metric itself
+        if not match.group("unit") and not currency and "." not in number:
+            continue
+        if not _LINK_PATTERN.fullmatch(text[:match.start()]):
+            return None
+        return {
+            "value": float(number.replace(",", "")),
+            "unit": _UNITS.get((match.group("unit") or "").lower(), ""),
+            "currency": currency,
+            "raw": match.group(0).strip(),
+        }
+    return None
+
+
+def _speaker_at(text_sections: List[Dict[str, Any]], sentence: str) -> str:
+    probe = sentence[:60]
+    for section in text_sections:
+        if probe and probe in (section.get("speech") or ""):
+            return section.get("speaker", "")
+    return ""
+
+
+def extract_metrics(raw_text: str, text_sections: Optional[List[Dict[str, Any]]] = None,
+                    metrics: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Extract the figures of the tracked metrics from a transcript
+
+    Table rows (a metric name followed by several figures on one line) are
+    read first, then sentences. A figure is taken only when it is stated as
+    the metric right after its name ("net income of 3.4 billion dollars", "CET1
+    ratio ended the quarter at 14.5 percent"), not changes such as "up 12 basis
+    points" or amounts of something else later in the sentence.
+
+    Args:
+        raw_text: Transcript text, pages separated by form feeds
+        text_sections: Speaker sections from preprocessing, for attribution
+        metrics: Metric keys to extract; every known metric when None
+
+    Returns:
+        {"metrics": {metric: [fact, ...]}, "extracted_at"}; each fact holds
+        value, unit, currency, raw, source ("table" or "text"), page, speaker and context
+    """
+    text_sections = text_sections or []
+    patterns = {metric: _METRIC_PATTERNS[metric] for metric in (metrics or METRIC_ALIASES)
+                if metric in _METRIC_PATTERNS}
+    facts: Dict[str, List[Dict[str, Any]]] = {metric: [] for metric in patterns}
+
+    for page_number, page in enumerate(raw_text.split("\f"), start=1):
+        # Tables: one line per row, the label followed by figures per period
+        for line in page.splitlines():
+            line = line.strip()
+            if len(_VALUE_PATTERN.findall(line)) < 2:
+                continue
+            for metric, pattern in patterns.items():
+                match = pattern.match(line)
+                # Only figures after the label; a sentence on one line is read as prose below
+                if match and not _WORD_PATTERN.search(_VALUE_PATTERN.sub("", line[match.end():])):
+                    value = _bound_value(line[match.end():])
+                    if value:
+                        facts[metric].append({**value, "source": "table", "page": page_number,
+                                              "speaker": "", "context": line})
+
+        # Sentences
+        prose = " ".join(page.split())
+        for sentence in _SENTENCE_PATTERN.split(prose):
+            for metric, pattern in patterns.items():
+                for match in pattern.finditer(sentence):
+                    value = _bound_value(sentence[match.end():])
+                    if value:
+                        facts[metric].append({**value, "source": "text", "page": page_number,
+                                              "speaker": _speaker_at(text_sections, sentence),
+                                              "context": sentence[:300]})
+                        break
+
+    return {
+        "metrics": {metric: found for metric, found in facts.items() if found},
+        "extracted_at": datetime.now().isoformat(),
+    }
+
+
+def load_or_extract_metrics(data_manager, bank_key: Optional[str], raw_text: str,
+                            text_sections: Optional[List[Dict[str, Any]]] = None,
+                            persist: bool = True) -> Dict[str, Any]:
+    """
+    Return a bank's saved metric store, extracting it again when the transcript changed
+
+    Args:
+        data_manager: DataManager holding the bank's analysis results ("metrics")
+        bank_key: Bank the transcript belongs to; nothing is saved without one
+        persist: Save a freshly extracted store
+
+    Returns:
+        The metric store (see extract_metrics) with the transcript's text_hash
+    """
+    text_hash = hashlib.sha256(raw_text.encode("utf-8")).hexdigest()
+    if bank_key:
+        store = data_manager.load_analysis_results(bank_key, "metrics")
+        if store and store.get("text_hash") == text_hash and store.get("version") == METRIC_STORE_VERSION:
+            return store
+
+    store = extract_metrics(raw_text, text_sections, data_manager.config.get("financial_metrics"))
+    store["text_hash"] = text_hash
+    store["version"] = METRIC_STORE_VERSION
+    if bank_key and persist:
+        data_manager.save_analysis_results(bank_key, "metrics", store)
+    return store
+
+
+def _format_value(fact: Dict[str, Any]) -> str:
+    value = f"{fact['value']:,.2f}"
+    # Per-share amounts keep their cents ("$95.10"); otherwise "3.40" -> "3.4", "100.00" -> "100"
+    if fact["unit"] or not fact["currency"]:
+        value = value.rstrip("0").rstrip(".")
+    unit = fact["unit"]
+    if unit == "%":
+        return f"{value}%"
+    text = f"{fact['currency']}{value}"
+    return f"{text} {unit}" if unit else text
+
+
+class MetricRouter:
+    """Answers exact metric questions from a bank's extracted metrics"""
+
+    def __init__(self, store: Dict[str, Any], metrics: Optional[List[str]] = None):
+        self.facts = store.get("metrics", {})
+        self.patterns = {metric: _METRIC_PATTERNS[metric] for metric in (metrics or METRIC_ALIASES)
+                         if metric in _METRIC_PATTERNS}
+
+    def match_metric(self, message: str) -> Optional[str]:
+        """The single metric an exact lookup question asks for, or None"""
+        if len(message.split()) > _MAX_LOOKUP_WORDS or _NOT_A_LOOKUP_PATTERN.search(message):
+            return None
+        if not _LOOKUP_PATTERN.search(message) or _SEGMENT_PATTERN.search(message) or \
+                _PERIOD_PATTERN.search(message):
+            return None
+        matched = [metric for metric, pattern in self.patterns.items() if pattern.search(message)]
+        return matched[0] if len(matched) == 1 else None
+
+    def best_fact(self, metric: str) -> Optional[Dict[str, Any]]:
+        """
+        The figure to answer with: table rows first, then management's words, then the first mention
+
+        Returns:
+            The fact, or None when the transcript only quotes the metric for a
+            segment or basis, or quotes several different values for the bank
+        """
+        facts = [fact for fact in self.facts.get(metric) or []
+                 if not _SEGMENT_PATTERN.search(fact["context"])]
+        if not facts:
+            return None
+        if len({(round(fact["value"], 4), fact["unit"], fact["currency"]) for fact in facts}) > 1:
+            return None
+        ranked = sorted(
+            enumerate(facts),
+            key=lambda item: (item[1]["source"] != "table", not item[1].get("speaker"), item[0]),
+        )
+        return ranked[0][1]
+
+    def answer(self, message: str) -> Optional[str]:
+        """
+        Answer a metric lookup directly
+
+        Returns:
+            The answer, or None when the question is not an exact lookup, names
+            a segment or period, or the transcript has no single figure for the
+            bank as a whole (the caller falls back to RAG)
+        """
+        metric = self.match_metric(message)
+        if metric is None:
+            return None
+        fact = self.best_fact(metric)
+        if fact is None:
+            return None
+
+        name = _DISPLAY_NAMES.get(metric) or metric.replace("_", " ").capitalize()
+        source = f"page {fact['page']}" + (f", {fact['speaker']}" if fact.get("speaker") else "")
+        return f"{name}: **{_format_value(fact)}**\n\n> {fact['context']}\n\n_Source: {source}_"
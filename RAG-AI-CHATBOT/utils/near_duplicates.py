@@ -0,0 +1,107 @@
+"""
+Near-Duplicate Chunk Filter
+Drops chunks that repeat an earlier one almost word for word (safe-harbor
+disclaimers, operator prompts, page headers) before they are embedded, using
+MinHash signatures and locality-sensitive hashing
+"""
+
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from utils.tokens import count_tokens
+
+# Largest 31-bit prime; (a * h + b) stays below 2**63 for 32-bit hashes
+_PRIME = (1 << 31) - 1
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int) -> List[int]:
+    """Hashes of the overlapping word n-grams of a text"""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [zlib.crc32(" ".join(words).encode("utf-8"))]
+    return list({
+        zlib.crc32(" ".join(words[start:start + size]).encode("utf-8"))
+        for start in range(len(words) - size + 1)
+    })
+
+
+def _bands_for(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    LSH bands and rows per band whose detection threshold sits just below the similarity threshold
+
+    Two signatures share a band with high probability once their similarity
+    exceeds about (1 / bands) ** (1 / rows); below the threshold keeps recall high,
+    the exact signature comparison then rejects false candidates.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateFilter:
+    """Keeps the first of every group of chunks whose estimated Jaccard similarity reaches the threshold"""
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, shingle_size: int = 5,
+                 seed: int = 1, model: str = "text-embedding-ada-002"):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Embedding model, for counting the tokens that are no longer embedded
+        self.model = model
+        self.bands, self.rows = _bands_for(threshold, num_perm)
+
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of a text's word shingles"""
+        hashes = np.array(_shingles(text, self.shingle_size), dtype=np.uint64) % _PRIME
+        permuted = (hashes[:, None] * self._a + self._b) % _PRIME
+        return permuted.min(axis=0)
+
+    def filter(self, chunks: List[Document]) -> Tuple[List[Document], Dict[str, int]]:
+        """
+        Drop near-duplicate chunks, keeping the earliest copy
+
+        Args:
+            chunks: Chunks in transcript order
+
+        Returns:
+            (kept chunks, {"removed": chunk count, "removed_tokens": embedding tokens saved})
+        """
+        kept: List[Document] = []
+        signatures: List[np.ndarray] = []
+        # (band, band hash) -> positions in kept
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        removed, removed_tokens = 0, 0
+
+        for chunk in chunks:
+            signature = self.signature(chunk.page_content)
+            band_keys = [
+                (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)
+            ]
+            candidates = {position for key in band_keys for position in buckets.get(key, ())}
+            if any(np.mean(signatures[position] == signature) >= self.threshold for position in candidates):
+                removed += 1
+                removed_tokens += count_tokens(chunk.page_content, self.model)
+                continue
+
+            for key in band_keys:
+                buckets.setdefault(key, []).append(len(kept))
+            kept.append(chunk)
+            signatures.append(signature)
+
+        return kept, {"removed": removed, "removed_tokens": removed_tokens}
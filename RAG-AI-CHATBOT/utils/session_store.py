@@ -0,0 +1,106 @@
+"""
+Chat Session Store
+Per-conversation state of the chat service (bank, history), kept in process
+memory or in Redis so several service replicas can share it
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+class SessionStore:
+    """Key-value store of session state dictionaries"""
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put(self, session_id: str, state: Dict[str, Any]):
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Sessions in this process only, evicted least recently used first
+
+    Suitable for a single service instance, or several behind a load
+    balancer with sticky sessions.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 24 * 60 * 60):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # session id -> (last write time, state)
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            written_at, state = entry
+            if time.time() - written_at > self.ttl_seconds:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return state
+
+    def put(self, session_id: str, state: Dict[str, Any]):
+        with self._lock:
+            self._sessions[session_id] = (time.time(), state)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis as JSON, expiring ttl_seconds after their last write"""
+
+    def __init__(self, url: str, ttl_seconds: float = 24 * 60 * 60, prefix: str = "chat_session:"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("SESSION_STORE = 'redis' requires the redis package: pip install redis")
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = int(ttl_seconds)
+        self.prefix = prefix
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + session_id)
+        return json.loads(raw) if raw else None
+
+    def put(self, session_id: str, state: Dict[str, Any]):
+        self.client.set(self.prefix + session_id, json.dumps(state), ex=self.ttl_seconds)
+
+    def delete(self, session_id: str):
+        self.client.delete(self.prefix + session_id)
+
+
+def create_session_store(backend: str = "memory", redis_url: str = "",
+                         ttl_seconds: float = 24 * 60 * 60, max_sessions: int = 10000) -> SessionStore:
+    """
+    Create the session store selected in the configuration
+
+    Args:
+        backend: "memory" or "redis"
+        redis_url: Redis connection URL, for the redis backend
+        ttl_seconds: Idle time after which a session is dropped
+        max_sessions: Sessions kept by the memory backend
+    """
+    if backend == "redis":
+        logger.info(f"Chat sessions stored in Redis ({redis_url})")
+        return RedisSessionStore(redis_url, ttl_seconds)
+    return InMemorySessionStore(max_sessions, ttl_seconds)
@@ -0,0 +1,684 @@
+"""
+Shared Bank Index
+One process-wide vector index over every bank in config/banks.yaml, partitioned
+by bank so that a bank's query only scans that bank's vectors
+"""
+
+import asyncio
+import json
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores import Chroma
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain.schema import Document
+from loguru import logger
+
+from utils.compressed_index import create_faiss_store
+from utils.data_manager import DataManager
+from utils.index_store import INDEX_SCHEMA_VERSION, IndexStore, hash_text
+from utils.near_duplicates import NearDuplicateFilter
+from utils.speaker_chunker import SpeakerSectionChunker, speaker_role
+
+# Partition used for transcripts that do not belong to a configured bank
+DEFAULT_PARTITION = "default"
+
+# (stage, done, total) -> None; stages are "loading", "chunking", "embedding" and "summarizing"
+ProgressCallback = Callable[[str, int, int], None]
+
+# Partitions of a multi-bank query are searched concurrently; FAISS releases the GIL
+_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="index-search")
+
+
+def _relevance_fn(store) -> Callable[[float], float]:
+    """
+    Distance -> relevance conversion of a store, as cosine similarity for L2 stores
+
+    FAISS and Chroma return squared L2 distances, which LangChain maps to
+    1 - d / sqrt(2). The embeddings are unit length, so cosine similarity is
+    1 - d / 2; scores are reported on that scale so RELEVANCE_FLOOR means the
+    same thing for every store and for the summary retriever.
+    """
+    relevance_fn = store._select_relevance_score_fn()
+    if relevance_fn is store._euclidean_relevance_score_fn:
+        return lambda distance: 1.0 - distance / 2.0
+    return relevance_fn
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def assign_speakers(chunks: List[Document], text_sections: List[Dict[str, Any]]):
+    """Tag each chunk with the speaker of the preprocessed section it comes from"""
+    offsets, speakers, parts = [], [], []
+    position = 0
+    for section in text_sections:
+        speech = _normalize(section.get("speech", ""))
+        offsets.append(position)
+        speakers.append(section.get("speaker", ""))
+        parts.append(speech)
+        position += len(speech) + 1
+    corpus = " ".join(parts)
+
+    cursor = 0
+    for chunk in chunks:
+        text = _normalize(chunk.page_content)
+        found = -1
+        # The chunk may open with a speaker line that is not part of any speech
+        for start in (0, len(text) // 3, 2 * len(text) // 3):
+            probe = text[start:start + 60]
+            if len(probe) < 20:
+                continue
+            found = corpus.find(probe, cursor)
+            if found < 0:
+                found = corpus.find(probe)
+            if found >= 0:
+                break
+
+        if found >= 0:
+            cursor = found
+            chunk.metadata["speaker"] = speakers[bisect_right(offsets, found) - 1]
+        else:
+            chunk.metadata.setdefault("speaker", "")
+
+
+class _ProgressEmbeddings(Embeddings):
+    """Embeds documents in slices and reports after each one, for indexing progress"""
+
+    # Several embedding batches per slice, so BatchEmbedder still runs them concurrently
+    slice_size = 512
+
+    def __init__(self, embeddings: Embeddings, progress: ProgressCallback):
+        self.embeddings = embeddings
+        self.progress: Optional[ProgressCallback] = progress
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.slice_size):
+            vectors.extend(self.embeddings.embed_documents(texts[start:start + self.slice_size]))
+            if self.progress is not None:
+                self.progress("embedding", len(vectors), len(texts))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+
+
+class SharedBankIndex:
+    """Vector stores of every bank, loaded once per process and searched per bank"""
+
+    def __init__(self, embeddings: Embeddings, index_store: IndexStore, text_splitter,
+                 vector_db: str, chunk_size: int, chunk_overlap: int, embedding_model: str,
+                 chunking_strategy: str = "recursive", memory_budget_mb: float = 0,
+                 near_duplicate_filter: Optional[NearDuplicateFilter] = None):
+        self.embeddings = embeddings
+        self.index_store = index_store
+        self.text_splitter = text_splitter
+        self.vector_db = vector_db.lower()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.embedding_model = embedding_model
+        # "speaker" builds chunks from preprocessed speaker sections, "recursive" from pages
+        self.chunking_strategy = chunking_strategy
+        self.section_chunker = SpeakerSectionChunker(text_splitter)
+        # Drops repeated disclaimers and operator prompts before embedding
+        self.near_duplicate_filter = near_duplicate_filter
+
+        self.data_manager = DataManager()
+        self.banks_config = self.data_manager.banks_config.get("banks", {})
+
+        # bank_key -> vector store / index key of the transcript it holds
+        self._partitions: Dict[str, Any] = {}
+        self._index_keys: Dict[str, str] = {}
+        # bank_key -> added / removed / unchanged / duplicate chunk counts of its last (re)index
+        self._update_stats: Dict[str, Dict[str, int]] = {}
+        # (bank_key, metadata filter) -> FAISS positions matching it
+        self._filter_positions: Dict[Tuple[str, str], np.ndarray] = {}
+        # bank_key -> summary tree of its transcript, small enough to stay loaded
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+
+        # Open partitions, least recently used first, with their estimated resident bytes.
+        # Persisted partitions beyond the budget are closed and reopened on their next query
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self._persisted: set = set()
+        self._lock = threading.RLock()
+        # bank_key -> lock serializing (re)indexing of that bank, e.g. warmup and a request's ensure_bank
+        self._bank_locks: Dict[str, threading.Lock] = {}
+
+    def _bank_lock(self, bank_key: str) -> threading.Lock:
+        with self._lock:
+            return self._bank_locks.setdefault(bank_key, threading.Lock())
+
+    @property
+    def bank_keys(self) -> List[str]:
+        """Every indexed bank, including partitions closed to stay within the memory budget"""
+        with self._lock:
+            return list(self._index_keys)
+
+    def compute_key(self, raw_text: str) -> str:
+        return IndexStore.compute_key(
+            hash_text(raw_text), self.chunk_size, self.chunk_overlap,
+            self.embedding_model, self.vector_db, self.index_spec, self.chunking_strategy,
+            self.dedup_threshold,
+        )
+
+    @property
+    def dedup_threshold(self) -> float:
+        return self.near_duplicate_filter.threshold if self.near_duplicate_filter is not None else 0.0
+
+    @property
+    def config_key(self) -> str:
+        return IndexStore.compute_config_key(
+            self.chunk_size, self.chunk_overlap, self.embedding_model, self.vector_db,
+            self.index_spec, self.chunking_strategy,
+        )
+
+    @property
+    def index_spec(self) -> str:
+        # Chroma manages its own index, compression only applies to FAISS
+        return self.index_store.index_spec if self.vector_db == "faiss" else "Flat"
+
+    def _manifest_fields(self) -> Dict[str, Any]:
+        return {
+            "chunking": self.chunking_strategy,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "embedding_model": self.embedding_model,
+            "vector_db": self.vector_db,
+            "index_spec": self.index_spec,
+            "dedup_threshold": self.dedup_threshold,
+            "schema_version": INDEX_SCHEMA_VERSION,
+        }
+
+    def load_persisted(self):
+        """Load the persisted index of every configured bank that has one"""
+        for bank_key in self.banks_config:
+            with self._lock:
+                if bank_key in self._index_keys:
+                    continue
+                over_budget = self.memory_budget_bytes and sum(self._lru.values()) >= self.memory_budget_bytes
+            if over_budget:
+                # Registered without opening: a cold index costs nothing until it is queried
+                manifest = self.index_store.load_manifest(bank_key)
+                fields = self._manifest_fields()
+                if manifest and all(manifest.get(field) == value for field, value in fields.items()):
+                    with self._lock:
+                        self._index_keys[bank_key] = manifest["key"]
+                        self._persisted.add(bank_key)
+                continue
+            loaded = self.index_store.load_current(
+                bank_key, self.embeddings, self.vector_db, self._manifest_fields()
+            )
+            if loaded is not None:
+                store, manifest = loaded
+                self._register(bank_key, store, manifest["key"], persisted=True)
+                logger.info(f"Shared index: loaded {bank_key} ({manifest.get('num_chunks')} chunks)")
+
+    def _register(self, bank_key: str, store, index_key: str, persisted: bool = False):
+        resident = self._resident_bytes(bank_key, store)
+        with self._lock:
+            self._partitions[bank_key] = store
+            self._index_keys[bank_key] = index_key
+            if persisted:
+                self._persisted.add(bank_key)
+            else:
+                self._persisted.discard(bank_key)
+            self._drop_filter_positions(bank_key)
+            self._lru[bank_key] = resident
+            self._lru.move_to_end(bank_key)
+            self._enforce_budget(keep=bank_key)
+
+    def _drop_filter_positions(self, bank_key: str):
+        self._filter_positions = {
+            key: positions for key, positions in self._filter_positions.items() if key[0] != bank_key
+        }
+
+    def _resident_bytes(self, bank_key: str, store) -> int:
+        """Estimated RAM a partition pins in this process; memory-mapped pages are shared and not counted"""
+        if not isinstance(store, FAISS):
+            # Chroma manages its own memory
+            return 0
+        sizes = self.index_store.file_sizes(bank_key, self.config_key)
+        docstore = sizes.get("docstore") or sum(
+            len(doc.page_content) * 2 for doc in store.docstore._dict.values()
+        )
+        if getattr(store, "mmapped", False):
+            return docstore
+        return docstore + (sizes.get("index") or store.index.ntotal * store.index.d * 4)
+
+    def _enforce_budget(self, keep: Optional[str] = None):
+        """Close least recently used persisted partitions until the open ones fit the budget"""
+        if not self.memory_budget_bytes:
+            return
+        with self._lock:
+            total = sum(self._lru.values())
+            for bank_key in list(self._lru):
+                if total <= self.memory_budget_bytes:
+                    break
+                # Partitions that were never persisted could not be reopened
+                if bank_key == keep or bank_key not in self._persisted:
+                    continue
+                total -= self._lru.pop(bank_key)
+                del self._partitions[bank_key]
+                self._drop_filter_positions(bank_key)
+                logger.info(f"Shared index: closed {bank_key} to stay within the memory budget")
+
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Open and closed partitions and their estimated resident memory"""
+        with self._lock:
+            return {
+                "open": list(self._lru),
+                "closed": [key for key in self._index_keys if key not in self._partitions],
+                "resident_mb": sum(self._lru.values()) / (1024 * 1024),
+                "budget_mb": self.memory_budget_bytes / (1024 * 1024),
+            }
+
+    def get_partition(self, bank_key: str):
+        """Vector store of a bank, reopening it from disk if it was closed for the memory budget"""
+        with self._lock:
+            store = self._partitions.get(bank_key)
+            if store is not None:
+                self._lru.move_to_end(bank_key)
+                return store
+            index_key = self._index_keys.get(bank_key) if bank_key in self._persisted else None
+        if index_key is None:
+            return None
+
+        # Disk I/O outside the lock; a concurrent reopen of the same bank is harmless
+        store = self.index_store.load(bank_key, index_key, self.embeddings, self.vector_db)
+        if store is None:
+            # The index changed or vanished on disk: forget it so the bank is indexed again
+            with self._lock:
+                if bank_key not in self._partitions:
+                    self._index_keys.pop(bank_key, None)
+                    self._persisted.discard(bank_key)
+            return None
+        with self._lock:
+            if bank_key in self._partitions:
+                return self._partitions[bank_key]
+        self._register(bank_key, store, index_key, persisted=True)
+        return store
+
+    def get_index_key(self, bank_key: str) -> Optional[str]:
+        with self._lock:
+            return self._index_keys.get(bank_key)
+
+    def get_update_stats(self, bank_key: str) -> Optional[Dict[str, int]]:
+        with self._lock:
+            return self._update_stats.get(bank_key)
+
+    def get_summaries(self, bank_key: str) -> Optional[Dict[str, Any]]:
+        """Summary tree of a bank's current transcript, loading it from disk on first use"""
+        with self._lock:
+            index_key = self._index_keys.get(bank_key)
+            tree = self._summaries.get(bank_key)
+        if index_key is None:
+            return None
+        if tree is not None and tree.get("key") == index_key:
+            return tree
+        tree = self.index_store.load_summaries(bank_key, index_key)
+        if tree is not None:
+            with self._lock:
+                self._summaries[bank_key] = tree
+        return tree
+
+    def ensure_summaries(self, bank_key: str, raw_text: str, builder,
+                         text_sections: Optional[List[Dict[str, Any]]] = None,
+                         persist: bool = True, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Build the summary tree of an indexed transcript unless it already exists
+
+        Sections whose chunks are unchanged since the previous tree of the
+        bank keep their summaries; only the others and the overview are rebuilt.
+
+        Args:
+            builder: SummaryTreeBuilder used when no tree matches the current index
+            progress: Optional callback receiving ("summarizing", done, total)
+
+        Returns:
+            The summary tree
+        """
+        tree = self.get_summaries(bank_key)
+        if tree is not None:
+            return tree
+
+        with self._bank_lock(bank_key):
+            # Another caller may have built it while this one waited
+            tree = self.get_summaries(bank_key)
+            if tree is not None:
+                return tree
+
+            # The tree of the previous transcript, when built with the same chunking
+            # and embeddings, lends its summaries to the sections that did not change
+            with self._lock:
+                previous = self._summaries.get(bank_key)
+            if previous is None:
+                previous = self.index_store.load_summaries(bank_key)
+            if previous is not None and previous.get("config_key") != self.config_key:
+                previous = None
+
+            index_key = self.compute_key(raw_text)
+            # Chunking again is cheap next to summarizing, and keeps the tree aligned with the index
+            tree = builder.build(
+                self.build_chunks(raw_text, bank_key, text_sections), index_key, progress, previous=previous
+            )
+            tree["config_key"] = self.config_key
+            if persist:
+                self.index_store.save_summaries(bank_key, tree)
+            with self._lock:
+                self._summaries[bank_key] = tree
+            return tree
+
+    def build_chunks(self, raw_text: str, bank_key: str,
+                     text_sections: Optional[List[Dict[str, Any]]] = None) -> List[Document]:
+        """Split a transcript into chunks, without near-duplicates when the filter is enabled"""
+        chunks, _ = self._build_chunks(raw_text, bank_key, text_sections)
+        return chunks
+
+    def _build_chunks(self, raw_text: str, bank_key: str,
+                      text_sections: Optional[List[Dict[str, Any]]] = None) -> Tuple[List[Document], Dict[str, int]]:
+        """
+        Split a transcript into chunks carrying bank, quarter, speaker and role metadata
+
+        With the speaker strategy, chunks are built from the preprocessed
+        speaker sections and never span two speaker turns. Without sections
+        the transcript is split page by page and speakers are matched afterwards.
+
+        Returns:
+            (chunks, {"duplicates", "duplicate_tokens"} removed by the near-duplicate filter)
+        """
+        bank_info = self.banks_config.get(bank_key, {})
+        base_metadata = {
+            "bank_key": bank_key,
+            "bankfile": bank_info.get("bankfile", bank_key),
+        }
+
+        if self.chunking_strategy == "speaker" and text_sections:
+            chunks = self.section_chunker.split_sections(text_sections, base_metadata)
+        else:
+            # Form feeds separate PDF pages in the extracted text
+            pages = [
+                Document(page_content=page, metadata={**base_metadata, "page": number})
+                for number, page in enumerate(raw_text.split("\f"), start=1)
+                if page.strip()
+            ]
+            chunks = self.text_splitter.split_documents(pages)
+
+            if text_sections:
+                assign_speakers(chunks, text_sections)
+            for chunk in chunks:
+                chunk.metadata.setdefault("speaker", "")
+                chunk.metadata["role"] = speaker_role(chunk.metadata["speaker"])
+
+        if self.near_duplicate_filter is None:
+            return chunks, {"duplicates": 0, "duplicate_tokens": 0}
+        chunks, removed = self.near_duplicate_filter.filter(chunks)
+        return chunks, {"duplicates": removed["removed"], "duplicate_tokens": removed["removed_tokens"]}
+
+    def index_document(self, bank_key: str, raw_text: str,
+                       text_sections: Optional[List[Dict[str, Any]]] = None,
+                       persist: bool = True, progress: Optional[ProgressCallback] = None) -> str:
+        """
+        Make a bank's transcript searchable, reusing its persisted index when possible
+
+        A changed transcript is applied to the persisted index as a diff: only
+        new or edited chunks are embedded, removed chunks are deleted.
+
+        Args:
+            progress: Optional callback receiving (stage, done, total) while indexing
+
+        Returns:
+            The index key of the transcript
+        """
+        index_key = self.compute_key(raw_text)
+        # Checking and updating under the bank's lock keeps concurrent callers from indexing it twice
+        with self._bank_lock(bank_key):
+            if self.get_index_key(bank_key) == index_key:
+                return index_key
+
+            report = progress or (lambda stage, done, total: None)
+            embeddings = self.embeddings if progress is None else _ProgressEmbeddings(self.embeddings, progress)
+
+            store = None
+            if persist:
+                report("loading", 0, 0)
+                store = self.index_store.load(bank_key, index_key, self.embeddings, self.vector_db)
+                if store is not None:
+                    print(f"⚡ Loaded persisted {self.vector_db} index for {bank_key}")
+
+            if store is None:
+                report("chunking", 0, 0)
+                chunks, duplicates = self._build_chunks(raw_text, bank_key, text_sections)
+                print(f"✂️ Created {len(chunks)} chunks")
+                if duplicates["duplicates"]:
+                    print(
+                        f"🧹 Dropped {duplicates['duplicates']} near-duplicate chunks "
+                        f"(~{duplicates['duplicate_tokens']:,} embedding tokens)"
+                    )
+
+                if persist:
+                    store, stats = self.index_store.update(
+                        bank_key, index_key, self.config_key, chunks, embeddings, self.vector_db,
+                        metadata={"text_hash": hash_text(raw_text), **self._manifest_fields()},
+                    )
+                    print(
+                        f"✅ Persisted {self.vector_db} vector store: {stats['added']} chunks added, "
+                        f"{stats['removed']} removed, {stats['unchanged']} unchanged"
+                    )
+                elif self.vector_db == "chroma":
+                    store = Chroma.from_documents(chunks, embeddings)
+                    stats = {"added": len(chunks), "removed": 0, "unchanged": 0}
+                    print("✅ Created ChromaDB vector store")
+                else:
+                    store = create_faiss_store(chunks, embeddings, index_options=self.index_store.index_options)
+                    stats = {"added": len(chunks), "removed": 0, "unchanged": 0}
+                    print("✅ Created FAISS vector store")
+            else:
+                stats = {"added": 0, "removed": 0, "unchanged": self._count_chunks(store)}
+                duplicates = {"duplicates": 0, "duplicate_tokens": 0}
+
+            if isinstance(embeddings, _ProgressEmbeddings):
+                # The store keeps the wrapper for later additions, which should not report here
+                embeddings.progress = None
+
+            self._register(bank_key, store, index_key, persisted=persist)
+            with self._lock:
+                self._update_stats[bank_key] = {**stats, **duplicates}
+            return index_key
+
+    @staticmethod
+    def _count_chunks(store) -> int:
+        if isinstance(store, FAISS):
+            return store.index.ntotal
+        return store._collection.count()
+
+    def ensure_bank(self, bank_key: str, persist: bool = True) -> bool:
+        """Index a bank from its saved preprocessing output if it is not loaded yet"""
+        if self.get_partition(bank_key) is not None:
+            return True
+
+        document_data = self.data_manager.load_analysis_results(bank_key, "document_data")
+        if not document_data or not document_data.get("text"):
+            return False
+
+        # index_document returns at once if a concurrent caller indexed the bank meanwhile
+        self.index_document(
+            bank_key, document_data["text"], document_data.get("text_sections"), persist=persist
+        )
+        return True
+
+    @staticmethod
+    def _matches(metadata: Dict[str, Any], metadata_filter: Dict[str, Any]) -> bool:
+        """Same semantics as LangChain's FAISS filter: a list value means "any of" """
+        for field, value in metadata_filter.items():
+            if isinstance(value, list):
+                if metadata.get(field) not in value:
+                    return False
+            elif metadata.get(field) != value:
+                return False
+        return True
+
+    def _get_filter_positions(self, bank_key: str, store: FAISS,
+                              metadata_filter: Dict[str, Any]) -> np.ndarray:
+        """FAISS positions of a partition's chunks matching a filter, computed once per partition"""
+        cache_key = (bank_key, json.dumps(metadata_filter, sort_keys=True, default=str))
+        with self._lock:
+            positions = self._filter_positions.get(cache_key)
+        if positions is None:
+            positions = np.array([
+                position for position, doc_id in store.index_to_docstore_id.items()
+                if self._matches(store.docstore.search(doc_id).metadata, metadata_filter)
+            ], dtype=np.int64)
+            with self._lock:
+                self._filter_positions[cache_key] = positions
+        return positions
+
+    def _prefiltered_search(self, bank_key: str, store: FAISS, query_vector: List[float], k: int,
+                            metadata_filter: Dict[str, Any]) -> List[Tuple[Document, float]]:
+        """Search only the vectors matching the filter instead of filtering the top results"""
+        positions = self._get_filter_positions(bank_key, store, metadata_filter)
+        if not len(positions):
+            return []
+
+        faiss = dependable_faiss_import()
+        vector = np.array([query_vector], dtype=np.float32)
+        if store._normalize_L2:
+            faiss.normalize_L2(vector)
+        selector = faiss.IDSelectorBatch(positions)
+        params = faiss.SearchParameters(sel=selector)
+        distances, indices = store.index.search(vector, min(k, len(positions)), params=params)
+
+        relevance_fn = _relevance_fn(store)
+        return [
+            (store.docstore.search(store.index_to_docstore_id[int(position)]), relevance_fn(float(distance)))
+            for distance, position in zip(distances[0], indices[0]) if position >= 0
+        ]
+
+    def _search_store(self, bank_key: str, store, query_vector: List[float], k: int,
+                      metadata_filter: Optional[Dict[str, Any]]) -> List[Tuple[Document, float]]:
+        """Search one partition and convert distances to relevance scores (higher is better)"""
+        # Flat FAISS partitions are pre-filtered; compressed ones and Chroma filter themselves
+        if metadata_filter and type(store) is FAISS:
+            return self._prefiltered_search(bank_key, store, query_vector, k, metadata_filter)
+
+        if isinstance(store, FAISS):
+            pairs = store.similarity_search_with_score_by_vector(query_vector, k, filter=metadata_filter)
+        else:
+            pairs = store.similarity_search_by_vector_with_relevance_scores(
+                query_vector, k, filter=metadata_filter
+            )
+        relevance_fn = _relevance_fn(store)
+        return [(doc, relevance_fn(score)) for doc, score in pairs]
+
+    def _search_bank(self, bank_key: str, query_vector: List[float], k: int,
+                     metadata_filter: Optional[Dict[str, Any]]) -> List[Tuple[Document, float]]:
+        store = self.get_partition(bank_key)
+        if store is None:
+            return []
+        return self._search_store(bank_key, store, query_vector, k, metadata_filter)
+
+    def search(self, query_vector: List[float], k: int, bank_keys: Optional[List[str]] = None,
+               metadata_filter: Optional[Dict[str, Any]] = None,
+               per_bank: bool = False) -> List[Tuple[Document, float]]:
+        """
+        Search the selected banks only
+
+        Args:
+            query_vector: Embedded query
+            k: Number of chunks to return
+            bank_keys: Partitions to scan; all loaded banks when None
+            metadata_filter: Extra metadata filter applied inside each partition
+            per_bank: Return the top k of every bank instead of the top k overall,
+                so a comparison sees each bank even when one scores higher
+
+        Returns:
+            (chunk, relevance) pairs, most relevant first
+        """
+        keys = bank_keys if bank_keys is not None else self.bank_keys
+
+        if len(keys) == 1:
+            results = self._search_bank(keys[0], query_vector, k, metadata_filter)
+        else:
+            # One partition per worker, so N banks cost about as much as the slowest one
+            futures = [
+                _search_executor.submit(self._search_bank, bank_key, query_vector, k, metadata_filter)
+                for bank_key in keys
+            ]
+            results = [pair for future in futures for pair in future.result()]
+
+        results.sort(key=lambda pair: pair[1], reverse=True)
+        return results if per_bank else results[:k]
+
+
+class SharedIndexRetriever(BaseRetriever):
+    """Retriever over the partitions of selected banks of a SharedBankIndex"""
+
+    index: Any
+    bank_keys: List[str]
+    k: int = 5
+    metadata_filter: Optional[Dict[str, Any]] = None
+    # Top k of each bank rather than overall, for comparative questions
+    per_bank: bool = False
+
+    def _to_documents(self, results: List[Tuple[Document, float]]) -> List[Document]:
+        # Copies keep the stored chunks untouched
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "score": score})
+            for doc, score in results
+        ]
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        query_vector = self.index.embeddings.embed_query(query)
+        return self._to_documents(
+            self.index.search(query_vector, self.k, self.bank_keys, self.metadata_filter, self.per_bank)
+        )
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        query_vector = await self.index.embeddings.aembed_query(query)
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, partial(self.index.search, query_vector, self.k, self.bank_keys,
+                          self.metadata_filter, self.per_bank)
+        )
+        return self._to_documents(results)
+
+
+_shared_index: Optional[SharedBankIndex] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_index(embeddings: Embeddings, index_store: IndexStore, text_splitter,
+                     vector_db: str, chunk_size: int, chunk_overlap: int,
+                     embedding_model: str, preload: bool = True,
+                     chunking_strategy: str = "recursive", memory_budget_mb: float = 0,
+                     near_duplicate_filter: Optional[NearDuplicateFilter] = None) -> SharedBankIndex:
+    """Return the process-wide index, loading persisted bank indexes on first use"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = SharedBankIndex(
+                embeddings, index_store, text_splitter, vector_db,
+                chunk_size, chunk_overlap, embedding_model, chunking_strategy, memory_budget_mb,
+                near_duplicate_filter,
+            )
+            if preload:
+                _shared_index.load_persisted()
+        return _shared_index
@@ -0,0 +1,69 @@
+"""
+Speaker Section Chunker
+Builds chunks from the preprocessed speaker sections of a transcript, so no
+chunk spans two speaker turns and every chunk carries speaker and role metadata
+"""
+
+import re
+from typing import Any, Dict, List
+
+from langchain.schema import Document
+
+ROLES = ("management", "analyst", "operator")
+
+_ANALYST_PATTERN = re.compile(r"\banalyst\b|\bresearch\b", re.IGNORECASE)
+_MANAGEMENT_PATTERN = re.compile(
+    r"\bchief\b|\bofficer\b|\bceo\b|\bcfo\b|\bcoo\b|\bpresident\b|\bchair(man|woman)?\b|"
+    r"\bhead of\b|\binvestor relations\b|\btreasurer\b|\bdirector\b|\bexecutive\b",
+    re.IGNORECASE,
+)
+
+
+def speaker_role(speaker: str) -> str:
+    """Classify a speaker line as management, analyst or operator ("" when unclear)"""
+    if not speaker:
+        return ""
+    if speaker.strip().lower().startswith("operator"):
+        return "operator"
+    if _ANALYST_PATTERN.search(speaker):
+        return "analyst"
+    if _MANAGEMENT_PATTERN.search(speaker):
+        return "management"
+    return ""
+
+
+class SpeakerSectionChunker:
+    """Turn speaker sections into chunks, splitting only sections longer than a chunk"""
+
+    def __init__(self, text_splitter):
+        # The splitter must be created with add_start_index=True
+        self.text_splitter = text_splitter
+
+    def split_sections(self, text_sections: List[Dict[str, Any]],
+                       base_metadata: Dict[str, Any]) -> List[Document]:
+        """
+        Build chunks from speaker sections
+
+        Args:
+            text_sections: Sections with "speaker", "speech" and optionally "role"
+            base_metadata: Metadata shared by every chunk (bank, file)
+
+        Returns:
+            Chunks in transcript order with speaker, role, section and
+            start_index (offset within the section) metadata
+        """
+        chunks: List[Document] = []
+        for number, section in enumerate(text_sections, start=1):
+            speech = (section.get("speech") or "").strip()
+            if not speech:
+                continue
+
+            speaker = section.get("speaker", "")
+            metadata = {
+                **base_metadata,
+                "section": number,
+                "speaker": speaker,
+                "role": section.get("role") or speaker_role(speaker),
+            }
+            chunks.extend(self.text_splitter.create_documents([speech], metadatas=[metadata]))
+        return chunks
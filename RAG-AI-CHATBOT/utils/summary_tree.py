@@ -0,0 +1,228 @@
+"""
+Summary Tree
+Section and whole-call summaries of a transcript, built once at ingestion and
+used instead of raw chunks to answer broad, overview-style questions
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.retrievers import BaseRetriever
+from langchain.schema import Document
+from loguru import logger
+
+from utils.index_store import chunk_id
+from utils.tokens import count_tokens
+
+# Questions about the call as a whole rather than a specific figure or remark
+BROAD_QUESTION_PATTERN = re.compile(
+    r"\b(summari[sz]e|summary|overview|outline|recap|gist|main (themes|points|topics)|"
+    r"key (takeaways|themes|points|messages)|highlights|big picture|tl;?dr)\b",
+    re.IGNORECASE,
+)
+
+SECTION_PROMPT = (
+    "Summarize this part of a bank's earnings call transcript in at most six sentences. "
+    "Keep figures, guidance, risks and who said what; drop pleasantries."
+)
+
+DOCUMENT_PROMPT = (
+    "Combine these section summaries of one earnings call into an overview of the whole call: "
+    "results, outlook and guidance, risks, and what analysts pressed on. At most ten sentences."
+)
+
+
+def is_broad_question(message: str) -> bool:
+    """True when a question asks for an overview rather than a specific fact"""
+    return bool(BROAD_QUESTION_PATTERN.search(message))
+
+
+def _section_title(chunks: List[Document]) -> str:
+    """Short label of a group of chunks: its speakers, or its pages"""
+    speakers = []
+    for chunk in chunks:
+        speaker = chunk.metadata.get("speaker", "")
+        if speaker and speaker not in speakers:
+            speakers.append(speaker)
+    if speakers:
+        more = f" and {len(speakers) - 3} more" if len(speakers) > 3 else ""
+        return ", ".join(speakers[:3]) + more
+    pages = [chunk.metadata.get("page") for chunk in chunks if chunk.metadata.get("page")]
+    return f"Pages {min(pages)}-{max(pages)}" if pages else "Section"
+
+
+def _group_hash(chunks: List[Document]) -> str:
+    """Content address of a group of chunks, from their ids"""
+    return hashlib.sha256("\n".join(chunk_id(chunk) for chunk in chunks).encode("utf-8")).hexdigest()[:32]
+
+
+class SummaryTreeBuilder:
+    """Summarizes consecutive groups of chunks, then the whole transcript from those summaries"""
+
+    def __init__(self, llm, embeddings: Embeddings, section_tokens: int = 3000,
+                 max_concurrency: int = 8, model: str = "gpt-4o-mini"):
+        self.llm = llm
+        self.embeddings = embeddings
+        self.section_tokens = section_tokens
+        self.max_concurrency = max_concurrency
+        self.model = model
+
+    def _group(self, chunks: List[Document]) -> List[List[Document]]:
+        """
+        Split chunks, in transcript order, into groups of about section_tokens tokens
+
+        Past half the target size a group ends after any chunk whose id falls on
+        a boundary (one in four ids), so boundaries follow content: an edit only
+        regroups the chunks around it and the other sections keep their summaries.
+        """
+        groups, current, used = [], [], 0
+        for chunk in chunks:
+            tokens = count_tokens(chunk.page_content, self.model)
+            if current and used + tokens > self.section_tokens:
+                groups.append(current)
+                current, used = [], 0
+            current.append(chunk)
+            used += tokens
+            if used >= self.section_tokens // 2 and int(chunk_id(chunk)[:8], 16) % 4 == 0:
+                groups.append(current)
+                current, used = [], 0
+        if current:
+            groups.append(current)
+        return groups
+
+    def build(self, chunks: List[Document], key: str, progress=None,
+              previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Build the summary tree of one transcript
+
+        Args:
+            chunks: The transcript's chunks in transcript order
+            key: Index key of the transcript, stored with the tree
+            progress: Optional callback receiving ("summarizing", done, total)
+            previous: Tree of an earlier version of the transcript; sections
+                over the same chunks keep their summaries and vectors, and the
+                overview is only regenerated when a section changed
+
+        Returns:
+            {"key", "document": node, "sections": [node, ...]}; nodes hold
+            title, text, and for sections their chunk range, chunk hash and vector
+        """
+        groups = self._group(chunks)
+        reusable = {
+            section["chunk_hash"]: section
+            for section in (previous or {}).get("sections", [])
+            if "chunk_hash" in section
+        }
+
+        sections, first_chunk = [], 0
+        for group in groups:
+            chunk_hash = _group_hash(group)
+            section = {
+                "title": _section_title(group),
+                "first_chunk": first_chunk,
+                "num_chunks": len(group),
+                "chunk_hash": chunk_hash,
+            }
+            if chunk_hash in reusable:
+                section["text"] = reusable[chunk_hash]["text"]
+                section["vector"] = reusable[chunk_hash]["vector"]
+            sections.append(section)
+            first_chunk += len(group)
+
+        stale = [number for number, section in enumerate(sections) if "text" not in section]
+        unchanged = previous is not None and not stale and \
+            [section["chunk_hash"] for section in sections] == \
+            [section.get("chunk_hash") for section in previous.get("sections", [])]
+        total = len(stale) + (0 if unchanged else 1)
+        if progress is not None:
+            progress("summarizing", 0, total)
+
+        # Changed sections are summarized concurrently, in one batch
+        if stale:
+            responses = self.llm.batch(
+                [
+                    [SystemMessage(content=SECTION_PROMPT),
+                     HumanMessage(content="\n\n".join(chunk.page_content for chunk in groups[number]))]
+                    for number in stale
+                ],
+                config={"max_concurrency": self.max_concurrency},
+            )
+            vectors = self.embeddings.embed_documents([response.content.strip() for response in responses])
+            for number, response, vector in zip(stale, responses, vectors):
+                sections[number]["text"] = response.content.strip()
+                sections[number]["vector"] = [float(value) for value in vector]
+            if progress is not None:
+                progress("summarizing", len(stale), total)
+
+        if unchanged:
+            document = previous["document"]
+        else:
+            overview = self.llm.invoke([
+                SystemMessage(content=DOCUMENT_PROMPT),
+                HumanMessage(content="\n\n".join(
+                    f"{section['title']}:\n{section['text']}" for section in sections
+                )),
+            ])
+            document = {"title": "Whole call", "text": overview.content.strip()}
+        if progress is not None:
+            progress("summarizing", total, total)
+
+        logger.info(
+            f"Summary tree: {len(sections)} section summaries over {len(chunks)} chunks "
+            f"({len(stale)} regenerated)"
+        )
+        return {"key": key, "document": document, "sections": sections}
+
+
+class SummaryRetriever(BaseRetriever):
+    """Returns the whole-call summary and the section summaries closest to the question"""
+
+    index: Any
+    bank_keys: List[str]
+    k: int = 3
+
+    def _documents(self, query_vector: List[float]) -> List[Document]:
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        documents = []
+        for bank_key in self.bank_keys:
+            tree = self.index.get_summaries(bank_key)
+            if not tree:
+                continue
+            bankfile = self.index.banks_config.get(bank_key, {}).get("bankfile", bank_key)
+            metadata = {"bank_key": bank_key, "bankfile": bankfile}
+            documents.append(Document(
+                page_content=f"Overview of the call: {tree['document']['text']}",
+                metadata={**metadata, "level": "document", "score": 1.0},
+            ))
+
+            sections = tree["sections"]
+            if not sections:
+                continue
+            vectors = np.asarray([section["vector"] for section in sections], dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+            scores = vectors @ query
+            # The chosen sections are kept in transcript order
+            for position in sorted(np.argsort(-scores)[:self.k]):
+                section = sections[position]
+                documents.append(Document(
+                    page_content=f"Summary of {section['title']}: {section['text']}",
+                    metadata={**metadata, "level": "section", "section": int(position),
+                              "score": float(scores[position])},
+                ))
+        return documents
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self._documents(self.index.embeddings.embed_query(query))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        return self._documents(await self.index.embeddings.aembed_query(query))
+
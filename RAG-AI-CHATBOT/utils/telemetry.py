@@ -0,0 +1,185 @@
+"""
+Chat Turn Telemetry
+Per-turn retrieval / LLM timings and token counts, logged as JSON lines and
+aggregated into rolling percentiles
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from loguru import logger
+
+# Numeric turn fields summarized as rolling percentiles
+METRIC_FIELDS = (
+    "total_ms", "retrieval_ms", "llm_ms", "ttft_ms",
+    "retrieved_chunks", "retrieved_chars", "prompt_tokens", "completion_tokens",
+)
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class TurnTelemetry(BaseCallbackHandler):
+    """Callback handler collecting the timings and token counts of one chat turn"""
+
+    # Run in the caller's thread / event loop so timestamps are not skewed by an executor
+    run_inline = True
+
+    def __init__(self, mode: str, bank_key: Optional[str] = None):
+        self.mode = mode
+        self.bank_key = bank_key
+        self.cached = False
+        # "rag", "metric" when the metric router answered without retrieval or the LLM,
+        # or "extractive" when the LLM missed its deadline
+        self.route = "rag"
+        # RouteDecision of a latency-routed turn
+        self.route_decision = None
+        self._start = time.perf_counter()
+
+        self._retrieval_start: Optional[float] = None
+        self.retrieval_ms: Optional[float] = None
+        self.retrieved_chunks = 0
+        self.retrieved_chars = 0
+
+        self._llm_start: Optional[float] = None
+        self.llm_ms: Optional[float] = None
+        self.ttft_ms: Optional[float] = None
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+
+    def on_retriever_start(self, serialized: Dict[str, Any], query: str, **kwargs: Any):
+        self._retrieval_start = time.perf_counter()
+
+    def on_retriever_end(self, documents, **kwargs: Any):
+        if self._retrieval_start is not None:
+            self.retrieval_ms = _elapsed_ms(self._retrieval_start)
+        self.retrieved_chunks = len(documents)
+        self.retrieved_chars = sum(len(doc.page_content) for doc in documents)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, **kwargs: Any):
+        self._llm_start = time.perf_counter()
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any):
+        self._llm_start = time.perf_counter()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any):
+        # Time to first token, measured from the start of the LLM call
+        if self.ttft_ms is None and self._llm_start is not None and token:
+            self.ttft_ms = _elapsed_ms(self._llm_start)
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        if self._llm_start is not None:
+            self.llm_ms = _elapsed_ms(self._llm_start)
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self.prompt_tokens = usage.get("prompt_tokens")
+        self.completion_tokens = usage.get("completion_tokens")
+
+        # Streamed responses report usage on the message instead
+        if self.prompt_tokens is None:
+            for generations in response.generations:
+                for generation in generations:
+                    usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if usage_metadata:
+                        self.prompt_tokens = usage_metadata.get("input_tokens")
+                        self.completion_tokens = usage_metadata.get("output_tokens")
+
+    def finish(self, error: bool = False) -> Dict[str, Any]:
+        """Close the turn and return its metrics"""
+        return {
+            "event": "chat_turn",
+            "turn_id": uuid.uuid4().hex[:12],
+            "timestamp": datetime.now().isoformat(),
+            "mode": self.mode,
+            "bank_key": self.bank_key,
+            "cached": self.cached,
+            "route": self.route,
+            "error": error,
+            "total_ms": _elapsed_ms(self._start),
+            "retrieval_ms": self.retrieval_ms,
+            "retrieved_chunks": self.retrieved_chunks,
+            "retrieved_chars": self.retrieved_chars,
+            "llm_ms": self.llm_ms,
+            "ttft_ms": self.ttft_ms,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+class TelemetryLog:
+    """Rolling window of recent turns, shared by every chatbot in the process"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._turns: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: Dict[str, Any]):
+        """Emit a turn as one JSON log line and add it to the window"""
+        logger.bind(telemetry=True).info(json.dumps(metrics))
+        with self._lock:
+            self._turns.append(metrics)
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Return p50 / p95 of every metric over the window, plus cache, direct answer and error rates"""
+        with self._lock:
+            turns = list(self._turns)
+
+        summary: Dict[str, Any] = {"turns": len(turns)}
+        if not turns:
+            return summary
+
+        summary["cache_hit_rate"] = sum(turn["cached"] for turn in turns) / len(turns)
+        summary["direct_answer_rate"] = sum(turn.get("route") == "metric" for turn in turns) / len(turns)
+        summary["error_rate"] = sum(turn["error"] for turn in turns) / len(turns)
+        for field in METRIC_FIELDS:
+            # Cached and directly answered turns skip retrieval and the LLM, so they would drag the percentiles down
+            values = [
+                turn[field] for turn in turns
+                if turn.get(field) is not None and not turn["cached"] and turn.get("route", "rag") != "metric"
+            ]
+            if values:
+                summary[field] = {"p50": _percentile(values, 50), "p95": _percentile(values, 95)}
+        return summary
+
+
+_telemetry_log: Optional[TelemetryLog] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry_log(window: int = 200, log_path: str = "") -> TelemetryLog:
+    """
+    Return the process-wide telemetry log
+
+    Args:
+        window: Number of recent turns kept for percentiles
+        log_path: Optional JSON-lines file receiving only the turn records
+    """
+    global _telemetry_log
+    with _telemetry_lock:
+        if _telemetry_log is None:
+            _telemetry_log = TelemetryLog(window)
+            if log_path:
+                Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+                logger.add(
+                    log_path,
+                    format="{message}",
+                    filter=lambda record: record["extra"].get("telemetry", False),
+                    rotation="50 MB",
+                )
+        return _telemetry_log
@@ -0,0 +1,45 @@
+"""
+Token Counting Helpers
+Counts tokens with the model's tiktoken encoding, falling back to an estimate
+"""
+
+import threading
+from typing import Dict, Optional
+
+from loguru import logger
+
+_encodings: Dict[str, Optional[object]] = {}
+_lock = threading.Lock()
+
+
+def _get_encoding(model: str):
+    """Return the tiktoken encoding of a model, or None when it is unavailable"""
+    with _lock:
+        if model not in _encodings:
+            try:
+                import tiktoken
+                try:
+                    _encodings[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    _encodings[model] = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken unavailable for {model}, estimating tokens: {e}")
+                _encodings[model] = None
+        return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    Count the tokens of a text for a model
+
+    Args:
+        text: Text to measure
+        model: OpenAI model name used to pick the tokenizer
+
+    Returns:
+        Exact token count, or roughly one token per four characters offline
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text, disallowed_special=()))